@@ -8,13 +8,50 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_ADDRESS, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
-
-from .const import DOMAIN
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.typing import ConfigType
+
+from .const import (
+    CONF_AGGREGATE_STATISTICS,
+    CONF_BATCH_UPDATES,
+    CONF_CAPABILITIES,
+    DATA_BATCHER,
+    DATA_LOCALIZATION,
+    DOMAIN,
+    SIGNAL_HEATER_LOADED,
+    SIGNAL_HEATER_UNLOADED,
+)
 from .coordinator import DieselHeaterCoordinator
+from .dispatch import UpdateBatcher
+from .localization import LocalizationIndex
+from .long_term_stats import StatisticsAggregator
+from .protocol.capabilities import Capabilities
+from .services import async_setup_services
+from .websocket import async_setup_websocket
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = [Platform.SWITCH, Platform.SENSOR, Platform.SELECT, Platform.NUMBER]
+PLATFORMS = [
+    Platform.BINARY_SENSOR,
+    Platform.CLIMATE,
+    Platform.SWITCH,
+    Platform.SENSOR,
+    Platform.SELECT,
+    Platform.NUMBER,
+]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Diesel Heater BLE domain."""
+    hass.data.setdefault(DOMAIN, {})[DATA_LOCALIZATION] = (
+        await hass.async_add_executor_job(LocalizationIndex.load)
+    )
+    async_setup_services(hass)
+    async_setup_websocket(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -29,29 +66,80 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         raise ConfigEntryNotReady(f"Could not find BLE device with address {address}")
 
     # Create coordinator
+    capabilities = Capabilities.from_dict(entry.data.get(CONF_CAPABILITIES, {}))
     coordinator = DieselHeaterCoordinator(
         hass,
         ble_device,
         entry.title,
+        entry.options,
+        capabilities,
     )
+    await coordinator.async_load()
+    if entry.options.get(CONF_BATCH_UPDATES, False):
+        domain_data = hass.data.setdefault(DOMAIN, {})
+        if (batcher := domain_data.get(DATA_BATCHER)) is None:
+            batcher = domain_data[DATA_BATCHER] = UpdateBatcher(hass.loop)
+        coordinator.batcher = batcher
+    entry.async_on_unload(coordinator.async_start())
 
     # Fetch initial data
     await coordinator.async_config_entry_first_refresh()
 
+    # Probe firmware features once. The probe moves setpoints, so it only
+    # runs by itself on an idle heater; the probe_capabilities service runs
+    # it on demand
+    state = coordinator.data
+    if not capabilities.probed and state is not None and not state.is_on:
+        probed = await coordinator.async_probe_capabilities()
+        if probed is not None and probed != capabilities:
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_CAPABILITIES: probed.as_dict()}
+            )
+
+    # Share the connection with local tools
+    if (multiplexer := coordinator.multiplexer) is not None:
+        try:
+            await multiplexer.start()
+        except OSError as err:
+            _LOGGER.warning("Could not share %s on a local socket: %s", entry.title, err)
+        else:
+            entry.async_on_unload(multiplexer.stop)
+
+    # Aggregate measurements into long-term statistics
+    if entry.options.get(CONF_AGGREGATE_STATISTICS, False):
+        if "recorder" in hass.config.components:
+            aggregator = StatisticsAggregator(hass, coordinator)
+            await aggregator.async_load()
+            entry.async_on_unload(
+                coordinator.async_add_listener(aggregator.async_update)
+            )
+            entry.async_on_unload(aggregator.async_save)
+        else:
+            _LOGGER.warning("Recorder is not loaded, statistics aggregation disabled")
+
     # Store coordinator
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
     # Forward to platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    async_dispatcher_send(hass, SIGNAL_HEATER_LOADED, coordinator)
+
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         coordinator: DieselHeaterCoordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        async_dispatcher_send(hass, SIGNAL_HEATER_UNLOADED, coordinator)
         await coordinator.async_shutdown()
 
     return unload_ok
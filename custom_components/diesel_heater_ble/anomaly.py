@@ -0,0 +1,118 @@
+"""Streaming anomaly detection for Diesel Heater BLE."""
+from __future__ import annotations
+
+import math
+
+from .const import (
+    ANOMALY_IGNITION_FAILURE,
+    ANOMALY_NO_TEMP_RISE,
+    ANOMALY_VOLTAGE_SAG,
+    IGNITION_FAILURE_THRESHOLD,
+    TEMP_RISE_MIN,
+    TEMP_RISE_WINDOW,
+    VOLTAGE_BASELINE_ALPHA,
+    VOLTAGE_SAG_MIN,
+    VOLTAGE_SAG_SIGMA,
+    RunningState,
+)
+from .models import HeaterState
+
+
+class RollingStats:
+    """Exponentially weighted mean and variance, O(1) per sample."""
+
+    def __init__(self, alpha: float) -> None:
+        """Initialize the statistics."""
+        self.alpha = alpha
+        self.mean: float | None = None
+        self.variance = 0.0
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        if self.mean is None:
+            self.mean = value
+            return
+        delta = value - self.mean
+        self.mean += self.alpha * delta
+        self.variance = (1 - self.alpha) * (self.variance + self.alpha * delta * delta)
+
+    @property
+    def std(self) -> float:
+        """Return the standard deviation."""
+        return math.sqrt(self.variance)
+
+
+class AnomalyDetector:
+    """Flag failing heaters from successive HeaterState frames.
+
+    - Ignition failure: repeated start cycles that leave GLOWPLUG and fall
+      back to IDLE or COOLING without reaching HEATING.
+    - No temperature rise: combustion temperature has not risen by
+      TEMP_RISE_MIN within TEMP_RISE_WINDOW seconds of entering GLOWPLUG.
+    - Voltage sag: supply voltage under glow plug load drops below the
+      rolling baseline measured outside the glow plug phase.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the detector."""
+        self.active: set[str] = set()
+        self.failed_ignitions = 0
+        self.voltage_baseline = RollingStats(VOLTAGE_BASELINE_ALPHA)
+        self._running_state: RunningState | None = None
+        self._attempting = False
+        self._ignition_started: float | None = None
+        self._ignition_temp = 0
+
+    def update(self, state: HeaterState, now: float) -> set[str]:
+        """Add a frame and return anomalies that were raised by it."""
+        previous = self._running_state
+        running_state = state.running_state
+        self._running_state = running_state
+        raised: set[str] = set()
+
+        # Start cycle tracking
+        if running_state == RunningState.GLOWPLUG and previous != RunningState.GLOWPLUG:
+            if not self._attempting:
+                self._ignition_started = now
+                self._ignition_temp = state.combustion_temp
+            self._attempting = True
+        elif running_state == RunningState.HEATING:
+            self._attempting = False
+            self._ignition_started = None
+            self.failed_ignitions = 0
+            self.active.discard(ANOMALY_IGNITION_FAILURE)
+            self.active.discard(ANOMALY_NO_TEMP_RISE)
+        elif self._attempting and running_state in (
+            RunningState.IDLE,
+            RunningState.COOLING,
+        ):
+            self._attempting = False
+            self._ignition_started = None
+            self.failed_ignitions += 1
+            if self.failed_ignitions >= IGNITION_FAILURE_THRESHOLD:
+                raised.add(ANOMALY_IGNITION_FAILURE)
+
+        if (
+            self._ignition_started is not None
+            and now - self._ignition_started >= TEMP_RISE_WINDOW
+        ):
+            if state.combustion_temp - self._ignition_temp < TEMP_RISE_MIN:
+                raised.add(ANOMALY_NO_TEMP_RISE)
+            self._ignition_started = None
+
+        # Voltage under glow plug load against the unloaded baseline
+        voltage = state.supply_voltage
+        baseline = self.voltage_baseline
+        if running_state == RunningState.GLOWPLUG:
+            if baseline.mean is not None:
+                threshold = max(VOLTAGE_SAG_MIN, VOLTAGE_SAG_SIGMA * baseline.std)
+                if baseline.mean - voltage >= threshold:
+                    raised.add(ANOMALY_VOLTAGE_SAG)
+                else:
+                    self.active.discard(ANOMALY_VOLTAGE_SAG)
+        else:
+            baseline.add(voltage)
+
+        raised -= self.active
+        self.active |= raised
+        return raised
@@ -0,0 +1,60 @@
+"""Binary sensor platform for Diesel Heater BLE."""
+from __future__ import annotations
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import (
+    ANOMALY_IGNITION_FAILURE,
+    ANOMALY_NO_TEMP_RISE,
+    ANOMALY_VOLTAGE_SAG,
+    DOMAIN,
+)
+from .coordinator import DieselHeaterCoordinator
+from .entity import DieselHeaterEntity
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the binary sensor platform."""
+    coordinator: DieselHeaterCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    async_add_entities([
+        DieselHeaterAnomalySensor(coordinator, ANOMALY_IGNITION_FAILURE),
+        DieselHeaterAnomalySensor(coordinator, ANOMALY_NO_TEMP_RISE),
+        DieselHeaterAnomalySensor(coordinator, ANOMALY_VOLTAGE_SAG),
+    ])
+
+
+class DieselHeaterAnomalySensor(DieselHeaterEntity, BinarySensorEntity):
+    """Binary sensor for a detected heater anomaly."""
+
+    _attr_device_class = BinarySensorDeviceClass.PROBLEM
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator: DieselHeaterCoordinator, anomaly: str) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator, anomaly)
+        self._anomaly = anomaly
+        self._attr_translation_key = anomaly
+
+    @property
+    def is_on(self) -> bool:
+        """Return True if the anomaly is active."""
+        return self._anomaly in self.coordinator.anomalies.active
+
+    @property
+    def extra_state_attributes(self) -> dict[str, int] | None:
+        """Return the failed start count for ignition failures."""
+        if self._anomaly != ANOMALY_IGNITION_FAILURE:
+            return None
+        return {"failed_ignitions": self.coordinator.anomalies.failed_ignitions}
@@ -0,0 +1,86 @@
+"""Circuit breaker for unreachable heaters."""
+from __future__ import annotations
+
+import random
+from collections.abc import Callable
+from enum import StrEnum
+
+from .const import BREAKER_BASE_BACKOFF, BREAKER_FAILURE_THRESHOLD, BREAKER_MAX_BACKOFF
+
+
+class BreakerState(StrEnum):
+    """Circuit breaker state."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop polling a heater that keeps failing.
+
+    After BREAKER_FAILURE_THRESHOLD consecutive failures the breaker opens
+    and polls are refused for an exponentially growing, jittered backoff.
+    Once it expires the breaker goes half-open: a single real attempt is
+    only let through after the heater has advertised since the breaker
+    opened, so an out-of-range heater costs nothing but an advertisement
+    lookup until it comes back. A connected heater does not advertise, so
+    while the link is up the trial is let through without one.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_backoff: float = BREAKER_BASE_BACKOFF,
+        max_backoff: float = BREAKER_MAX_BACKOFF,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        """Initialize the breaker."""
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._jitter = jitter
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at: float | None = None
+        self.retry_at: float | None = None
+
+    def allow(
+        self, now: float, last_seen: float | None, connected: bool = False
+    ) -> bool:
+        """Return True if an attempt to reach the heater may be made."""
+        if self.state == BreakerState.CLOSED:
+            return True
+        if self.state == BreakerState.OPEN:
+            if now < self.retry_at:
+                return False
+            self.state = BreakerState.HALF_OPEN
+        # Half-open: probe with the advertisement before spending a connect
+        return connected or (last_seen is not None and last_seen >= self.opened_at)
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self.retry_at = None
+
+    def record_failure(self, now: float) -> None:
+        """Count a failure, opening the breaker when needed."""
+        self.failures += 1
+        if self.state == BreakerState.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        """Open the breaker with equal-jitter exponential backoff.
+
+        The wait is drawn between half and all of the backoff, so retries
+        spread out without ever coming back right away.
+        """
+        backoff = min(self.max_backoff, self.base_backoff * 2**self.trips)
+        self.state = BreakerState.OPEN
+        self.trips += 1
+        self.opened_at = now
+        self.retry_at = now + backoff * (0.5 + self._jitter() / 2)
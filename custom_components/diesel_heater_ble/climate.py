@@ -0,0 +1,123 @@
+"""Climate platform for Diesel Heater BLE."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.climate import (
+    ClimateEntity,
+    ClimateEntityFeature,
+    HVACAction,
+    HVACMode,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+
+from .const import DEFAULT_CLIMATE_TARGET, DOMAIN, MAX_TEMP_C, MIN_TEMP_C, RunningState
+from .coordinator import DieselHeaterCoordinator
+from .entity import DieselHeaterEntity
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the climate platform."""
+    coordinator: DieselHeaterCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    async_add_entities([
+        DieselHeaterClimate(coordinator),
+    ])
+
+
+class DieselHeaterClimate(DieselHeaterEntity, ClimateEntity, RestoreEntity):
+    """Climate entity running a local PI loop on the heater level."""
+
+    _attr_translation_key = "climate"
+    _attr_name = None
+    _attr_hvac_modes = [HVACMode.OFF, HVACMode.HEAT]
+    _attr_supported_features = ClimateEntityFeature.TARGET_TEMPERATURE
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _attr_min_temp = MIN_TEMP_C
+    _attr_max_temp = MAX_TEMP_C
+    _attr_target_temperature_step = 0.5
+    _enable_turn_on_off_backwards_compatibility = False
+
+    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the climate entity."""
+        super().__init__(coordinator, "climate")
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the setpoint and loop state."""
+        await super().async_added_to_hass()
+        controller = self.coordinator.controller
+        target = DEFAULT_CLIMATE_TARGET
+        if (last_state := await self.async_get_last_state()) is not None:
+            target = last_state.attributes.get(ATTR_TEMPERATURE) or target
+            if last_state.state == HVACMode.HEAT and self.coordinator.data is not None:
+                controller.enable(target, self.coordinator.data.level)
+        controller.target_temperature = target
+
+    @property
+    def hvac_mode(self) -> HVACMode:
+        """Return HEAT while the local loop is active and the heater is on."""
+        data = self.coordinator.data
+        if self.coordinator.controller.enabled and data is not None and data.is_on:
+            return HVACMode.HEAT
+        return HVACMode.OFF
+
+    @property
+    def hvac_action(self) -> HVACAction | None:
+        """Return what the heater is doing."""
+        if self.coordinator.data is None:
+            return None
+        if not self.coordinator.data.is_on:
+            return HVACAction.OFF
+        if self.coordinator.data.running_state in (
+            RunningState.HEATING,
+            RunningState.GLOWPLUG,
+            RunningState.PREHEATING,
+        ):
+            return HVACAction.HEATING
+        return HVACAction.IDLE
+
+    @property
+    def current_temperature(self) -> float | None:
+        """Return the room temperature the loop controls on."""
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.control_temperature(self.coordinator.data)
+
+    @property
+    def target_temperature(self) -> float | None:
+        """Return the setpoint."""
+        return self.coordinator.controller.target_temperature
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return loop diagnostics."""
+        controller = self.coordinator.controller
+        output = controller.output
+        return {
+            "controller_output": round(output, 2) if output is not None else None,
+            "commands_remaining": controller.budget.remaining_now(),
+        }
+
+    async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
+        """Start or stop the local loop."""
+        if hvac_mode == HVACMode.HEAT:
+            await self.coordinator.async_enable_climate(
+                self.coordinator.controller.target_temperature or DEFAULT_CLIMATE_TARGET
+            )
+        else:
+            await self.coordinator.async_disable_climate()
+        self.async_write_ha_state()
+
+    async def async_set_temperature(self, **kwargs: Any) -> None:
+        """Set the setpoint; the loop picks it up on the next frame."""
+        if (temperature := kwargs.get(ATTR_TEMPERATURE)) is not None:
+            self.coordinator.controller.target_temperature = temperature
+        self.async_write_ha_state()
@@ -1,7 +1,9 @@
 """Config flow for Diesel Heater BLE integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from typing import Any
 
 import voluptuous as vol
@@ -9,13 +11,117 @@ from homeassistant.components.bluetooth import (
     BluetoothServiceInfoBleak,
     async_discovered_service_info,
 )
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import selector
 
-from .const import DOMAIN, SERVICE_UUID
+from .const import (
+    CMD_GET_STATUS,
+    CONF_ABS_DEADBAND,
+    CONF_AGGREGATE_STATISTICS,
+    CONF_BATCH_UPDATES,
+    CONF_COALESCE_WRITES,
+    CONF_DEADBAND,
+    CONF_FILTERS,
+    CONF_FUEL_RATES,
+    CONF_HEARTBEAT,
+    CONF_HYSTERESIS,
+    CONF_IDLE_DISCONNECT,
+    CONF_IDLE_POLL_INTERVAL,
+    CONF_MAX_COMMANDS_PER_HOUR,
+    CONF_MIN_INTERVAL,
+    CONF_OUTSIDE_TEMPERATURE_SENSOR,
+    CONF_REL_DEADBAND,
+    CONF_SENSOR,
+    CONF_SOCKET_PATH,
+    CONF_SOCKET_PORT,
+    CONF_TEMPERATURE_SENSOR,
+    DATA_PROBE_CACHE,
+    DEFAULT_DEADBAND,
+    DEFAULT_HEARTBEAT,
+    DEFAULT_IDLE_DISCONNECT,
+    DEFAULT_IDLE_POLL_INTERVAL,
+    DEFAULT_MAX_COMMANDS_PER_HOUR,
+    DOMAIN,
+    FILTERED_SENSORS,
+    MAX_LEVEL,
+    MIN_LEVEL,
+    PROBE_CACHE_TTL,
+    PROBE_CONCURRENCY,
+    PROBE_NEGATIVE_TTL,
+    RESPONSE_HEADER,
+    SERVICE_UUID,
+    VERIFY_TIMEOUT,
+)
+from .ble_client import DieselHeaterBLEClient
+from .filters import FilterConfig, get_filter_config
+from .metrics import get_fuel_rates
 
 _LOGGER = logging.getLogger(__name__)
 
+# Service UUIDs of heaters as advertised, Home Assistant lowercases them
+HEATER_SERVICE_UUIDS = frozenset({SERVICE_UUID.lower()})
+
+
+async def _async_verify_heater(info: BluetoothServiceInfoBleak) -> bool:
+    """Return True if the device answers a status request like a heater.
+
+    The client is disconnected however the check ends, including a
+    connection attempt still running when it times out or is cancelled.
+    """
+    client = DieselHeaterBLEClient(info.device)
+    try:
+        async with asyncio.timeout(VERIFY_TIMEOUT):
+            response = await client.send_command(CMD_GET_STATUS)
+    except TimeoutError:
+        response = None
+    finally:
+        await client.disconnect()
+    return (
+        response is not None
+        and response[:4] == RESPONSE_HEADER
+        and DieselHeaterBLEClient.parse_response(response) is not None
+    )
+
+
+async def async_find_heaters(
+    hass: HomeAssistant,
+    candidates: list[BluetoothServiceInfoBleak],
+) -> list[BluetoothServiceInfoBleak]:
+    """Return the candidates that are verified heaters.
+
+    FFF0 is a common service UUID, so every candidate is asked for a
+    status frame, a few at a time. Heaters are cached per address for
+    PROBE_CACHE_TTL so reopening the flow does not connect again; other
+    devices only for PROBE_NEGATIVE_TTL, so a heater that was out of
+    range or busy is checked again soon.
+    """
+    cache: dict[str, tuple[bool, float]] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        DATA_PROBE_CACHE, {}
+    )
+    semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+    async def _async_check(info: BluetoothServiceInfoBleak) -> bool:
+        if (cached := cache.get(info.address)) is not None:
+            verified, checked = cached
+            ttl = PROBE_CACHE_TTL if verified else PROBE_NEGATIVE_TTL
+            if time.monotonic() - checked < ttl:
+                return verified
+        async with semaphore:
+            verified = await _async_verify_heater(info)
+        _LOGGER.debug("%s %s a heater", info.address, "is" if verified else "is not")
+        cache[info.address] = (verified, time.monotonic())
+        return verified
+
+    results = await asyncio.gather(*(_async_check(info) for info in candidates))
+    return [info for info, verified in zip(candidates, results) if verified]
+
 
 class DieselHeaterBLEConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Diesel Heater BLE."""
@@ -26,6 +132,13 @@ class DieselHeaterBLEConfigFlow(ConfigFlow, domain=DOMAIN):
         """Initialize the config flow."""
         self._discovery_info: BluetoothServiceInfoBleak | None = None
         self._discovered_devices: dict[str, BluetoothServiceInfoBleak] = {}
+        self._verify_task: asyncio.Task[list[BluetoothServiceInfoBleak]] | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Return the options flow."""
+        return DieselHeaterBLEOptionsFlow(config_entry)
 
     async def async_step_bluetooth(
         self, discovery_info: BluetoothServiceInfoBleak
@@ -61,7 +174,52 @@ class DieselHeaterBLEConfigFlow(ConfigFlow, domain=DOMAIN):
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
-        """Handle the user step to pick discovered device."""
+        """Verify the discovered devices while showing progress."""
+        if self._verify_task is None:
+            # Discover devices advertising the heater service, then verify them
+            current_addresses = self._async_current_ids()
+            candidates = [
+                discovery_info
+                for discovery_info in async_discovered_service_info(self.hass)
+                if discovery_info.address not in current_addresses
+                and not HEATER_SERVICE_UUIDS.isdisjoint(discovery_info.service_uuids)
+            ]
+            self._verify_task = self.hass.async_create_task(
+                async_find_heaters(self.hass, candidates),
+                f"{DOMAIN} verify heaters",
+            )
+        if not self._verify_task.done():
+            return self.async_show_progress(
+                step_id="user",
+                progress_action="verify",
+                progress_task=self._verify_task,
+            )
+
+        self._discovered_devices = {
+            discovery_info.address: discovery_info
+            for discovery_info in self._verify_task.result()
+        }
+        self._verify_task = None
+        if not self._discovered_devices:
+            return self.async_show_progress_done(next_step_id="no_devices")
+        return self.async_show_progress_done(next_step_id="pick_device")
+
+    @callback
+    def async_remove(self) -> None:
+        """Stop verifying candidates when the flow is closed."""
+        if self._verify_task is not None:
+            self._verify_task.cancel()
+
+    async def async_step_no_devices(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Abort when no candidate answered like a heater."""
+        return self.async_abort(reason="no_devices_found")
+
+    async def async_step_pick_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Handle the step to pick a verified device."""
         if user_input is not None:
             address = user_input[CONF_ADDRESS]
             await self.async_set_unique_id(address, raise_on_progress=False)
@@ -73,18 +231,6 @@ class DieselHeaterBLEConfigFlow(ConfigFlow, domain=DOMAIN):
                 data={CONF_ADDRESS: address},
             )
 
-        # Discover devices
-        self._discovered_devices = {}
-        for discovery_info in async_discovered_service_info(self.hass):
-            # Check if device has our service UUID
-            if SERVICE_UUID.lower() in [
-                s.lower() for s in discovery_info.service_uuids
-            ]:
-                self._discovered_devices[discovery_info.address] = discovery_info
-
-        if not self._discovered_devices:
-            return self.async_abort(reason="no_devices_found")
-
         # Build selection list
         device_options = {
             address: f"{info.name or 'Unknown'} ({address})"
@@ -92,8 +238,244 @@ class DieselHeaterBLEConfigFlow(ConfigFlow, domain=DOMAIN):
         }
 
         return self.async_show_form(
-            step_id="user",
+            step_id="pick_device",
             data_schema=vol.Schema(
                 {vol.Required(CONF_ADDRESS): vol.In(device_options)}
             ),
         )
+
+
+class DieselHeaterBLEOptionsFlow(OptionsFlow):
+    """Handle options for Diesel Heater BLE."""
+
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+        self._options = dict(config_entry.options)
+        self._sensor: str | None = None
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        return self.async_show_menu(
+            step_id="init",
+            menu_options=[
+                "general",
+                "sensor_filters",
+                "fuel_rates",
+                "climate",
+                "sharing",
+                "connection",
+            ],
+        )
+
+    async def async_step_general(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage statistics aggregation."""
+        if user_input is not None:
+            return self.async_create_entry(data={**self._options, **user_input})
+
+        options = self._options
+        return self.async_show_form(
+            step_id="general",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_AGGREGATE_STATISTICS,
+                        default=options.get(CONF_AGGREGATE_STATISTICS, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_DEADBAND,
+                        default=options.get(CONF_DEADBAND, DEFAULT_DEADBAND),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_HEARTBEAT,
+                        default=options.get(CONF_HEARTBEAT, DEFAULT_HEARTBEAT),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10)),
+                    vol.Required(
+                        CONF_BATCH_UPDATES,
+                        default=options.get(CONF_BATCH_UPDATES, False),
+                    ): bool,
+                }
+            ),
+        )
+
+    async def async_step_sensor_filters(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Pick the sensor to configure filtering for."""
+        if user_input is not None:
+            self._sensor = user_input[CONF_SENSOR]
+            return await self.async_step_sensor_filter()
+
+        return self.async_show_form(
+            step_id="sensor_filters",
+            data_schema=vol.Schema(
+                {vol.Required(CONF_SENSOR): vol.In(list(FILTERED_SENSORS))}
+            ),
+        )
+
+    async def async_step_sensor_filter(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Configure the publication filter for one sensor."""
+        if user_input is not None:
+            filters = dict(self._options.get(CONF_FILTERS, {}))
+            filters[self._sensor] = FilterConfig.from_dict(user_input).as_dict()
+            return self.async_create_entry(data={**self._options, CONF_FILTERS: filters})
+
+        config = get_filter_config(self._options, self._sensor)
+        return self.async_show_form(
+            step_id="sensor_filter",
+            description_placeholders={"sensor": self._sensor},
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_ABS_DEADBAND, default=config.abs_deadband
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_REL_DEADBAND, default=config.rel_deadband
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                    vol.Required(
+                        CONF_HYSTERESIS, default=config.hysteresis
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_MIN_INTERVAL, default=config.min_interval
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_HEARTBEAT, default=config.heartbeat
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                }
+            ),
+        )
+
+    async def async_step_fuel_rates(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Configure the fuel rate per heat level."""
+        levels = range(MIN_LEVEL, MAX_LEVEL + 1)
+        if user_input is not None:
+            rates = [user_input[f"level_{level}"] for level in levels]
+            return self.async_create_entry(data={**self._options, CONF_FUEL_RATES: rates})
+
+        rates = get_fuel_rates(self._options)
+        return self.async_show_form(
+            step_id="fuel_rates",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        f"level_{level}", default=rates[level - MIN_LEVEL]
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=5))
+                    for level in levels
+                }
+            ),
+        )
+
+    async def async_step_climate(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Configure the local climate loop."""
+        if user_input is not None:
+            options = {**self._options, **user_input}
+            for sensor in (CONF_TEMPERATURE_SENSOR, CONF_OUTSIDE_TEMPERATURE_SENSOR):
+                if sensor not in user_input:
+                    options.pop(sensor, None)
+            return self.async_create_entry(data=options)
+
+        return self.async_show_form(
+            step_id="climate",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_TEMPERATURE_SENSOR,
+                        description={
+                            "suggested_value": self._options.get(CONF_TEMPERATURE_SENSOR)
+                        },
+                    ): selector.EntitySelector(
+                        selector.EntitySelectorConfig(
+                            domain="sensor", device_class="temperature"
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_OUTSIDE_TEMPERATURE_SENSOR,
+                        description={
+                            "suggested_value": self._options.get(
+                                CONF_OUTSIDE_TEMPERATURE_SENSOR
+                            )
+                        },
+                    ): selector.EntitySelector(
+                        selector.EntitySelectorConfig(
+                            domain="sensor", device_class="temperature"
+                        )
+                    ),
+                    vol.Required(
+                        CONF_MAX_COMMANDS_PER_HOUR,
+                        default=self._options.get(
+                            CONF_MAX_COMMANDS_PER_HOUR, DEFAULT_MAX_COMMANDS_PER_HOUR
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+                }
+            ),
+        )
+
+    async def async_step_sharing(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Configure the local socket that shares the heater connection."""
+        if user_input is not None:
+            options = {**self._options, **user_input}
+            if not user_input.get(CONF_SOCKET_PATH):
+                options.pop(CONF_SOCKET_PATH, None)
+            return self.async_create_entry(data=options)
+
+        return self.async_show_form(
+            step_id="sharing",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_SOCKET_PATH,
+                        description={
+                            "suggested_value": self._options.get(CONF_SOCKET_PATH)
+                        },
+                    ): str,
+                    vol.Required(
+                        CONF_SOCKET_PORT,
+                        default=self._options.get(CONF_SOCKET_PORT, 0),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=65535)),
+                }
+            ),
+        )
+
+    async def async_step_connection(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Configure connecting on demand and packing of writes."""
+        if user_input is not None:
+            return self.async_create_entry(data={**self._options, **user_input})
+
+        options = self._options
+        return self.async_show_form(
+            step_id="connection",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_IDLE_DISCONNECT,
+                        default=options.get(
+                            CONF_IDLE_DISCONNECT, DEFAULT_IDLE_DISCONNECT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                    vol.Required(
+                        CONF_IDLE_POLL_INTERVAL,
+                        default=options.get(
+                            CONF_IDLE_POLL_INTERVAL, DEFAULT_IDLE_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                    vol.Required(
+                        CONF_COALESCE_WRITES,
+                        default=options.get(CONF_COALESCE_WRITES, False),
+                    ): bool,
+                }
+            ),
+        )
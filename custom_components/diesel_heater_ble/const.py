@@ -1,97 +1,197 @@
 """Constants for Diesel Heater BLE integration."""
-from enum import IntEnum
+from .protocol.const import (  # noqa: F401
+    CMD_CELSIUS,
+    CMD_DOWN,
+    CMD_FAHRENHEIT,
+    CMD_FAN_MODE,
+    CMD_GET_STATUS,
+    CMD_HEADER,
+    CMD_LENGTH,
+    CMD_LEVEL_MODE,
+    CMD_PLATEAU_MODE,
+    CMD_POWER_TOGGLE,
+    CMD_PRESS_DOWN,
+    CMD_PRESS_UP,
+    CMD_SET_CELSIUS,
+    CMD_SET_FAHRENHEIT,
+    CMD_SET_FAN_MODE,
+    CMD_SET_LEVEL_MODE,
+    CMD_SET_TEMP_MODE,
+    CMD_TEMP_MODE,
+    CMD_TOGGLE_PLATEAU_MODE,
+    CMD_TOGGLE_POWER,
+    CMD_TYPE_CONTROL,
+    CMD_TYPE_STATUS,
+    CMD_UP,
+    DEFAULT_SCAN_INTERVAL,
+    MAX_LEVEL,
+    MAX_TEMP_C,
+    MIN_LEVEL,
+    MIN_TEMP_C,
+    NOTIFY_CHARACTERISTIC_UUID,
+    RESPONSE_HEADER,
+    RESPONSE_LENGTH,
+    SERVICE_UUID,
+    WRITE_CHARACTERISTIC_UUID,
+    AltitudeUnit,
+    ControlMode,
+    OperatingMode,
+    RunningState,
+    TemperatureUnit,
+)
 
 DOMAIN = "diesel_heater_ble"
 
-# BLE UUIDs
-SERVICE_UUID = "0000fff0-0000-1000-8000-00805f9b34fb"
-WRITE_CHARACTERISTIC_UUID = "0000fff2-0000-1000-8000-00805f9b34fb"
-NOTIFY_CHARACTERISTIC_UUID = "0000fff1-0000-1000-8000-00805f9b34fb"
-
-# Command header
-CMD_HEADER = bytes([0xBA, 0xAB])
-CMD_LENGTH = 0x04
-
-# Command types
-CMD_TYPE_STATUS = 0xCC
-CMD_TYPE_CONTROL = 0xBB
-
-# Control command codes
-CMD_POWER_TOGGLE = 0xA1
-CMD_UP = 0xA2
-CMD_DOWN = 0xA3
-CMD_FAN_MODE = 0xA4
-CMD_PLATEAU_MODE = 0xA5
-CMD_CELSIUS = 0xA7
-CMD_FAHRENHEIT = 0xA8
-CMD_LEVEL_MODE = 0xAC
-CMD_TEMP_MODE = 0xAD
-
-# Pre-built commands (8 bytes each)
-CMD_GET_STATUS = bytes([0xBA, 0xAB, 0x04, 0xCC, 0x00, 0x00, 0x00, 0x35])
-CMD_TOGGLE_POWER = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA1, 0x00, 0x00, 0xC5])
-CMD_PRESS_UP = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA2, 0x00, 0x00, 0xC6])
-CMD_PRESS_DOWN = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA3, 0x00, 0x00, 0xC7])
-CMD_SET_FAN_MODE = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA4, 0x00, 0x00, 0xC8])
-CMD_TOGGLE_PLATEAU_MODE = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA5, 0x00, 0x00, 0xC9])
-CMD_SET_CELSIUS = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA7, 0x00, 0x00, 0xCB])
-CMD_SET_FAHRENHEIT = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA8, 0x00, 0x00, 0xCC])
-CMD_SET_LEVEL_MODE = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xAC, 0x00, 0x00, 0xD0])
-CMD_SET_TEMP_MODE = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xAD, 0x00, 0x00, 0xD1])
-
-# Response header
-RESPONSE_HEADER = bytes([0xAB, 0xBA, 0x11, 0xCC])
-RESPONSE_LENGTH = 21
-
-
-class OperatingMode(IntEnum):
-    """Heater operating mode."""
-
-    IDLE = 0
-    HEATING = 1
-    COOLING = 2
-    FAN_ONLY = 4
-
-
-class ControlMode(IntEnum):
-    """Heater control mode."""
-
-    LEVEL = 0
-    TEMPERATURE = 1
-    ERROR = 0xFF
-
-
-class RunningState(IntEnum):
-    """Heater running state."""
-
-    IDLE = 0
-    COOLING = 1
-    GLOWPLUG = 3
-    HEATING = 5
-    PREHEATING = 7
-
-
-class TemperatureUnit(IntEnum):
-    """Temperature unit."""
-
-    CELSIUS = 0
-    FAHRENHEIT = 1
-
-
-class AltitudeUnit(IntEnum):
-    """Altitude unit."""
-
-    METERS = 0
-    FEET = 1
-
-
-# Polling interval in seconds
-DEFAULT_SCAN_INTERVAL = 2.5
-
-# Level range
-MIN_LEVEL = 1
-MAX_LEVEL = 6
-
-# Temperature range (Celsius)
-MIN_TEMP_C = 8
-MAX_TEMP_C = 36
+# hass.data[DOMAIN] keys
+DATA_LOCALIZATION = "localization"  # LocalizationIndex
+DATA_PROBE_CACHE = "probe_cache"  # Config flow heater verification results
+DATA_BATCHER = "batcher"  # UpdateBatcher shared by heaters that batch updates
+
+# Dispatcher signals, sent with the DieselHeaterCoordinator
+SIGNAL_HEATER_LOADED = f"{DOMAIN}_heater_loaded"
+SIGNAL_HEATER_UNLOADED = f"{DOMAIN}_heater_unloaded"
+
+# Options
+CONF_AGGREGATE_STATISTICS = "aggregate_statistics"
+CONF_DEADBAND = "deadband"
+CONF_HEARTBEAT = "heartbeat"
+CONF_FILTERS = "filters"
+CONF_SENSOR = "sensor"
+CONF_ABS_DEADBAND = "abs_deadband"
+CONF_REL_DEADBAND = "rel_deadband"
+CONF_HYSTERESIS = "hysteresis"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_FUEL_RATES = "fuel_rates"
+CONF_TEMPERATURE_SENSOR = "temperature_sensor"
+CONF_CAPABILITIES = "capabilities"
+CONF_MAX_COMMANDS_PER_HOUR = "max_commands_per_hour"
+CONF_SOCKET_PATH = "socket_path"
+CONF_SOCKET_PORT = "socket_port"
+CONF_IDLE_DISCONNECT = "idle_disconnect"
+CONF_IDLE_POLL_INTERVAL = "idle_poll_interval"
+CONF_OUTSIDE_TEMPERATURE_SENSOR = "outside_temperature_sensor"
+CONF_BATCH_UPDATES = "batch_updates"
+CONF_COALESCE_WRITES = "coalesce_writes"
+
+DEFAULT_DEADBAND = 1.0
+DEFAULT_HEARTBEAT = 300  # Seconds between forced state writes
+
+# Sensors that support publication filtering
+FILTERED_SENSORS = ("voltage", "environment_temp", "combustion_temp")
+
+# Statistics aggregation
+STATISTICS_BUCKET = 300  # Seconds per short-term bucket
+STATISTICS_PERIOD = 3600  # Seconds per imported long-term statistic row
+
+# Derived metrics
+DEFAULT_FUEL_RATES = (0.16, 0.22, 0.28, 0.34, 0.42, 0.50)  # Litres per hour, levels 1-6
+MAX_INTEGRATION_GAP = 30  # Seconds; longer gaps between frames are not integrated
+METRICS_SAVE_DELAY = 60  # Seconds
+STORAGE_VERSION = 1
+
+# Telemetry history
+HISTORY_SERIES = ("supply_voltage", "environment_temp", "combustion_temp")
+# (seconds per rollup bucket, seconds kept); 0 keeps every frame, in memory only
+HISTORY_TIERS = (
+    (0, 2 * 3600),
+    (60, 2 * 86400),
+    (600, 30 * 86400),
+    (3600, 365 * 86400),
+)
+HISTORY_SCAN_FACTOR = 4  # Points scanned per point returned, at most
+HISTORY_DEFAULT_POINTS = 500
+HISTORY_MAX_POINTS = 5000
+HISTORY_SAVE_DELAY = 600  # Seconds
+
+# Anomaly detection
+EVENT_ANOMALY = f"{DOMAIN}_anomaly"
+ANOMALY_IGNITION_FAILURE = "ignition_failure"
+ANOMALY_NO_TEMP_RISE = "no_temperature_rise"
+ANOMALY_VOLTAGE_SAG = "voltage_sag"
+IGNITION_FAILURE_THRESHOLD = 2  # Consecutive failed start cycles
+TEMP_RISE_WINDOW = 180  # Seconds after glow plug start
+TEMP_RISE_MIN = 20  # Celsius
+VOLTAGE_BASELINE_ALPHA = 0.05
+VOLTAGE_SAG_MIN = 2  # Volts
+VOLTAGE_SAG_SIGMA = 4
+
+# Lifecycle events
+EVENT_LIFECYCLE = f"{DOMAIN}_lifecycle"
+LIFECYCLE_IGNITION_STARTED = "ignition_started"
+LIFECYCLE_HEATING_REACHED = "heating_reached"
+LIFECYCLE_COOLDOWN_STARTED = "cooldown_started"
+LIFECYCLE_COOLDOWN_FINISHED = "cooldown_finished"
+LIFECYCLE_ERROR_RAISED = "error_raised"
+LIFECYCLE_ERROR_CLEARED = "error_cleared"
+LIFECYCLE_TYPES = (
+    LIFECYCLE_IGNITION_STARTED,
+    LIFECYCLE_HEATING_REACHED,
+    LIFECYCLE_COOLDOWN_STARTED,
+    LIFECYCLE_COOLDOWN_FINISHED,
+    LIFECYCLE_ERROR_RAISED,
+    LIFECYCLE_ERROR_CLEARED,
+)
+LIFECYCLE_DEBOUNCE = 5  # Seconds a new phase must hold before it counts
+
+# Local climate control
+CONTROL_KP = 0.8  # Levels per degree of error
+CONTROL_KI = 0.004  # Levels per degree-second of error
+CONTROL_INTERVAL = 120  # Seconds between level changes
+CONTROL_HYSTERESIS = 0.75  # Levels the output must move away from the current level
+DEFAULT_MAX_COMMANDS_PER_HOUR = 60
+DEFAULT_CLIMATE_TARGET = 20
+
+# Thermal model and ready-by scheduling
+THERMAL_WINDOW = 600  # Seconds of frames averaged into one model update
+THERMAL_FORGETTING = 0.998  # Recursive least squares forgetting factor per update
+THERMAL_INITIAL_COVARIANCE = 1000.0
+THERMAL_MAX_COVARIANCE = 1e6  # Covariance trace above which forgetting pauses
+THERMAL_MIN_UPDATES = 12  # Heating windows fitted before the model is trusted
+THERMAL_STARTUP_TIME = 240  # Seconds from power on to full heat output
+THERMAL_SAFETY_MARGIN = 0.15  # Fraction of the predicted warm-up added on top
+THERMAL_SAVE_UPDATES = 6  # Fitted windows between saves of the model, hourly
+
+# Adapter/proxy path selection
+PATH_RTT_ALPHA = 0.2
+PATH_RTT_WEIGHT = 0.1  # Score points per millisecond of round trip
+PATH_FAILURE_PENALTY = 10  # Score points per consecutive failure
+PATH_LOAD_PENALTY = 5  # Score points per other heater connected through the source
+PATH_SWITCH_MARGIN = 8  # Score points a path must win by to replace the current one
+PATH_MAX_FAILURES = 3  # Consecutive failures before failing over
+PATH_STALE = 300  # Seconds without advertisements before a path is ignored
+PATH_REBALANCE_INTERVAL = 600  # Seconds between rebalance checks while connected
+
+# Connect on demand
+DEFAULT_IDLE_DISCONNECT = 0  # Seconds idle before disconnecting, 0 stays connected
+DEFAULT_IDLE_POLL_INTERVAL = 60  # Seconds between polls while the heater is off
+DEFAULT_CONNECT_LATENCY = 5.0  # Seconds assumed until a connect has been timed
+PRECONNECT_MARGIN = 1.5  # Connect this many connect latencies before a poll
+MIN_DISCONNECTED_TIME = 10  # Seconds; shorter gaps are not worth a reconnect
+ACTIVITY_SLOT = 900  # Seconds per slot of the weekly activity profile
+ACTIVITY_HALF_LIFE = 28 * 86400  # Seconds for old activity to count half
+ACTIVITY_THRESHOLD = 1.5  # Slot weight at which a command is expected
+
+# Circuit breaker
+BREAKER_FAILURE_THRESHOLD = 3  # Consecutive failed polls before opening
+BREAKER_BASE_BACKOFF = 10  # Seconds
+BREAKER_MAX_BACKOFF = 600  # Seconds
+
+# Fleet commands
+DEFAULT_FLEET_TIMEOUT = 60  # Seconds per heater
+DEFAULT_FLEET_PER_ADAPTER = 2  # Concurrent heaters per adapter or proxy
+
+# Config flow heater verification
+PROBE_CONCURRENCY = 3  # Simultaneous connections while verifying candidates
+VERIFY_TIMEOUT = 15  # Seconds per candidate
+PROBE_CACHE_TTL = 600  # Seconds a verified heater is reused
+PROBE_NEGATIVE_TTL = 30  # Seconds a failed verification is reused
+
+# Batched update dispatch
+BATCH_WINDOW = 0.05  # Seconds an update may wait for others to join its batch
+BATCH_MAX_SIZE = 256  # Heaters in a batch that flush it before the window ends
+BATCH_SIZE_BUCKETS = (1, 4, 16, 64)  # Upper bounds of the batch size histogram
+
+# Live frame websocket subscriptions
+WS_QUEUE_SIZE = 100  # Frames buffered per subscriber before the oldest is dropped
+WS_DEFAULT_RATE = 5.0  # Messages per second per subscriber
+WS_MAX_RATE = 50.0
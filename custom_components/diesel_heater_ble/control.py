@@ -0,0 +1,158 @@
+"""Local closed-loop temperature control for Diesel Heater BLE."""
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Callable
+
+from .const import (
+    CONTROL_HYSTERESIS,
+    CONTROL_INTERVAL,
+    CONTROL_KI,
+    CONTROL_KP,
+    MAX_LEVEL,
+    MIN_LEVEL,
+)
+
+
+class PIController:
+    """PI controller with clamped output and conditional-integration anti-windup."""
+
+    def __init__(
+        self,
+        kp: float,
+        ki: float,
+        out_min: float,
+        out_max: float,
+    ) -> None:
+        """Initialize the controller."""
+        self.kp = kp
+        self.ki = ki
+        self.out_min = out_min
+        self.out_max = out_max
+        self.integral = 0.0
+
+    def reset(self, output: float = 0.0) -> None:
+        """Reset the integral so the next output starts near output."""
+        self.integral = min(max(output, self.out_min), self.out_max)
+
+    def update(self, error: float, dt: float) -> float:
+        """Return the clamped output for an error sample."""
+        proposed = self.integral + self.ki * error * dt
+        output = self.kp * error + proposed
+        # Only integrate while unsaturated, or when the error pulls the output
+        # back into range
+        if (
+            self.out_min < output < self.out_max
+            or (output >= self.out_max and error < 0)
+            or (output <= self.out_min and error > 0)
+        ):
+            self.integral = min(max(proposed, self.out_min), self.out_max)
+        output = self.kp * error + self.integral
+        return min(max(output, self.out_min), self.out_max)
+
+
+class CommandBudget:
+    """Sliding-window cap on BLE commands per hour."""
+
+    def __init__(self, max_per_hour: int) -> None:
+        """Initialize the budget."""
+        self.max_per_hour = max_per_hour
+        self._sent: deque[float] = deque()
+
+    def remaining(self, now: float) -> int:
+        """Return the number of commands still allowed in the window."""
+        while self._sent and now - self._sent[0] >= 3600:
+            self._sent.popleft()
+        return max(self.max_per_hour - len(self._sent), 0)
+
+    def remaining_now(self) -> int:
+        """Return the number of commands still allowed right now."""
+        return self.remaining(time.monotonic())
+
+    def consume(self, count: int, now: float) -> None:
+        """Record sent commands."""
+        self._sent.extend([now] * count)
+
+
+class ClimateController:
+    """Drive the heater level from a room temperature with a PI loop.
+
+    The loop samples every frame but only acts every CONTROL_INTERVAL
+    seconds, so changes in between are batched into one level change.
+    A level change costs the writes its command plan takes, which is one
+    with absolute setpoints and fewer than one per press when presses are
+    packed, and the step is clamped to what is left of the hourly command
+    budget. The estimate only picks the step: the caller charges the
+    budget with the writes the plan actually took.
+    """
+
+    def __init__(self, max_commands_per_hour: int) -> None:
+        """Initialize the controller."""
+        self.enabled = False
+        self.target_temperature: float | None = None
+        self.current_temperature: float | None = None
+        self.budget = CommandBudget(max_commands_per_hour)
+        self._pi = PIController(CONTROL_KP, CONTROL_KI, MIN_LEVEL, MAX_LEVEL)
+        self._last_sample: float | None = None
+        self._last_action: float | None = None
+        self._output: float | None = None
+
+    @property
+    def output(self) -> float | None:
+        """Return the last continuous controller output."""
+        return self._output
+
+    def enable(self, target_temperature: float, level: int | None) -> None:
+        """Start the loop, seeding the integral with the current level."""
+        self.enabled = True
+        self.target_temperature = target_temperature
+        self._pi.reset(level if level is not None else MIN_LEVEL)
+        self._last_sample = None
+        self._last_action = None
+
+    def disable(self) -> None:
+        """Stop the loop."""
+        self.enabled = False
+        self._output = None
+
+    def update(
+        self,
+        temperature: float,
+        level: int | None,
+        now: float,
+        cost: Callable[[int], int],
+    ) -> int | None:
+        """Add a temperature sample and return a new level to apply, if any.
+
+        cost returns the writes that setting a level takes from the
+        current state. Nothing is charged to the budget here.
+        """
+        self.current_temperature = temperature
+        if not self.enabled or self.target_temperature is None:
+            return None
+
+        dt = 0.0 if self._last_sample is None else now - self._last_sample
+        self._last_sample = now
+        self._output = self._pi.update(self.target_temperature - temperature, dt)
+
+        if self._last_action is not None and now - self._last_action < CONTROL_INTERVAL:
+            return None
+        if level is not None and abs(self._output - level) < CONTROL_HYSTERESIS:
+            return None
+
+        desired = round(self._output)
+        if desired == level:
+            return None
+
+        remaining = self.budget.remaining(now)
+        commands = cost(desired)
+        if level is not None:
+            while commands > remaining and desired != level:
+                desired += 1 if desired < level else -1
+                commands = cost(desired)
+        if commands == 0 or commands > remaining:
+            return None
+
+        self._last_action = now
+        return desired
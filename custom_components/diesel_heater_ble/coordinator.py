@@ -1,35 +1,91 @@
 """DataUpdateCoordinator for Diesel Heater BLE."""
 from __future__ import annotations
 
+import asyncio
 import logging
-from datetime import timedelta
-from typing import TYPE_CHECKING
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
 
 from homeassistant.components import bluetooth
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_point_in_utc_time,
+)
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
 
+from .anomaly import AnomalyDetector
 from .ble_client import DieselHeaterBLEClient
+from .breaker import CircuitBreaker
 from .const import (
     CMD_GET_STATUS,
     CMD_PRESS_DOWN,
     CMD_PRESS_UP,
     CMD_SET_FAN_MODE,
-    CMD_SET_LEVEL_MODE,
-    CMD_SET_TEMP_MODE,
     CMD_TOGGLE_PLATEAU_MODE,
     CMD_TOGGLE_POWER,
+    CONF_COALESCE_WRITES,
+    CONF_IDLE_DISCONNECT,
+    CONF_IDLE_POLL_INTERVAL,
+    CONF_MAX_COMMANDS_PER_HOUR,
+    CONF_OUTSIDE_TEMPERATURE_SENSOR,
+    CONF_SOCKET_PATH,
+    CONF_SOCKET_PORT,
+    CONF_TEMPERATURE_SENSOR,
+    DEFAULT_IDLE_DISCONNECT,
+    DEFAULT_IDLE_POLL_INTERVAL,
+    DEFAULT_MAX_COMMANDS_PER_HOUR,
     DEFAULT_SCAN_INTERVAL,
     DOMAIN,
+    EVENT_ANOMALY,
+    EVENT_LIFECYCLE,
+    HISTORY_SAVE_DELAY,
+    METRICS_SAVE_DELAY,
+    PATH_REBALANCE_INTERVAL,
+    STORAGE_VERSION,
+    THERMAL_SAVE_UPDATES,
     ControlMode,
+    OperatingMode,
 )
+from .control import ClimateController
+from .dispatch import UpdateBatcher
+from .duty import DutyCycle
+from .history import TelemetryHistory
+from .lifecycle import LifecycleDetector
+from .metrics import DerivedMetrics, get_fuel_rates
 from .models import HeaterState
+from .paths import PathSelector
+from .protocol.capabilities import Capabilities, probe_capabilities
+from .protocol.coalescer import WriteCoalescer
+from .protocol.frames import Frame, StatusFrame, TelemetryFrame
+from .protocol.multiplexer import HeaterMultiplexer
+from .protocol.plan import (
+    CommandPlan,
+    PlanResult,
+    command_stage,
+    level_plan,
+    mode_stage,
+    power_stage,
+    start_plan,
+    temperature_plan,
+)
+from .thermal import ReadyPlan, ThermalModel, plan_ready_by
 
 if TYPE_CHECKING:
     from bleak.backends.device import BLEDevice
 
 _LOGGER = logging.getLogger(__name__)
 
+# (coordinator, state, raw status frame if known)
+FrameListener = Callable[["DieselHeaterCoordinator", HeaterState, bytes | None], None]
+
 
 class DieselHeaterCoordinator(DataUpdateCoordinator[HeaterState | None]):
     """Coordinator for diesel heater BLE updates."""
@@ -39,6 +95,8 @@ class DieselHeaterCoordinator(DataUpdateCoordinator[HeaterState | None]):
         hass: HomeAssistant,
         ble_device: BLEDevice,
         name: str,
+        options: Mapping[str, Any] | None = None,
+        capabilities: Capabilities | None = None,
     ) -> None:
         """Initialize the coordinator."""
         super().__init__(
@@ -50,154 +108,704 @@ class DieselHeaterCoordinator(DataUpdateCoordinator[HeaterState | None]):
         self._ble_device = ble_device
         self._client = DieselHeaterBLEClient(ble_device)
         self._address = ble_device.address
+        options = options or {}
+
+        # Firmware features, probed once and cached in the config entry
+        self.capabilities = capabilities or Capabilities()
+        self._coalesce_writes = bool(options.get(CONF_COALESCE_WRITES, False))
+        self._apply_capabilities()
+
+        # Advertisement tracking
+        self.rssi: int | None = None
+        self.last_seen: float | None = None
+        self._advertising = True
+
+        # Adapter/proxy the connection goes through
+        self.paths = PathSelector()
+        self.source: str | None = None
+        self._last_rebalance = 0.0
+
+        self.breaker = CircuitBreaker()
+
+        # Shared batcher delivering updates together with other heaters
+        self.batcher: UpdateBatcher | None = None
+
+        # Local socket sharing the connection with other processes
+        self.multiplexer: HeaterMultiplexer | None = None
+        socket_path = options.get(CONF_SOCKET_PATH)
+        socket_port = options.get(CONF_SOCKET_PORT)
+        if socket_path or socket_port:
+            self.multiplexer = HeaterMultiplexer(self._client, socket_path, socket_port)
+
+        # Connect on demand while the heater is off
+        self.duty = DutyCycle(
+            options.get(CONF_IDLE_DISCONNECT, DEFAULT_IDLE_DISCONNECT),
+            options.get(CONF_IDLE_POLL_INTERVAL, DEFAULT_IDLE_POLL_INTERVAL),
+        )
+        self._last_update = time.monotonic()
+        self._cancel_idle: CALLBACK_TYPE | None = None
+        self._cancel_preconnect: CALLBACK_TYPE | None = None
+
+        self.fuel_rates = get_fuel_rates(options)
+        self.metrics = DerivedMetrics(self.fuel_rates)
+        self.anomalies = AnomalyDetector()
+        self.lifecycle = LifecycleDetector()
+        self.controller = ClimateController(
+            options.get(CONF_MAX_COMMANDS_PER_HOUR, DEFAULT_MAX_COMMANDS_PER_HOUR)
+        )
+        self.temperature_sensor: str | None = options.get(CONF_TEMPERATURE_SENSOR)
+        self.outside_temperature_sensor: str | None = options.get(
+            CONF_OUTSIDE_TEMPERATURE_SENSOR
+        )
+        self.thermal = ThermalModel()
+        self.scheduled_start: ReadyPlan | None = None
+        self._cancel_start: CALLBACK_TYPE | None = None
+        self.telemetry: tuple[int, ...] | None = None  # Variant heaters only
+        self._frame_listeners: list[FrameListener] = []
+        self._control_task: asyncio.Task | None = None
+        self._metrics_store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{slugify(self._address)}.metrics"
+        )
+        self.history = TelemetryHistory()
+        self._history_store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{slugify(self._address)}.history"
+        )
+        self._activity_store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{slugify(self._address)}.activity"
+        )
+        self._thermal_store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{slugify(self._address)}.thermal"
+        )
 
     @property
     def address(self) -> str:
         """Return device address."""
         return self._address
 
+    @property
+    def coalescer(self) -> WriteCoalescer:
+        """Return the write coalescer of the client."""
+        return self._client.coalescer
+
+    async def async_load(self) -> None:
+        """Restore persisted data."""
+        if (data := await self._metrics_store.async_load()) is not None:
+            self.metrics.restore(data)
+        if (data := await self._history_store.async_load()) is not None:
+            self.history.restore(data)
+        if (data := await self._activity_store.async_load()) is not None:
+            self.duty.activity.restore(data)
+        if (data := await self._thermal_store.async_load()) is not None:
+            self.thermal.restore(data)
+            if (start := data.get("scheduled_start")) is not None:
+                self._async_restore_start(ReadyPlan(**start))
+
     def update_ble_device(self, ble_device: BLEDevice) -> None:
         """Update the BLE device reference without disconnecting."""
         self._ble_device = ble_device
         self._client.set_ble_device(ble_device)
 
-    async def _async_update_data(self) -> HeaterState | None:
-        """Fetch data from heater."""
-        # Try to get fresh BLE device from scanner
-        if device := bluetooth.async_ble_device_from_address(
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Track advertisements from the heater, return a callback to stop."""
+        if service_info := bluetooth.async_last_service_info(
+            self.hass, self._address, connectable=True
+        ):
+            self._async_handle_bluetooth_event(
+                service_info, bluetooth.BluetoothChange.ADVERTISEMENT
+            )
+        cancel_advertisements = bluetooth.async_register_callback(
+            self.hass,
+            self._async_handle_bluetooth_event,
+            bluetooth.BluetoothCallbackMatcher(address=self._address, connectable=True),
+            bluetooth.BluetoothScanningMode.ACTIVE,
+        )
+        cancel_unavailable = bluetooth.async_track_unavailable(
+            self.hass, self._async_handle_unavailable, self._address, connectable=True
+        )
+        cancel_frames = self._client.register_callback(self._async_handle_frame)
+
+        @callback
+        def _async_stop() -> None:
+            cancel_advertisements()
+            cancel_unavailable()
+            cancel_frames()
+
+        return _async_stop
+
+    @callback
+    def _async_handle_bluetooth_event(
+        self,
+        service_info: bluetooth.BluetoothServiceInfoBleak,
+        change: bluetooth.BluetoothChange,  # noqa: ARG002
+    ) -> None:
+        """Record an advertisement from the heater."""
+        now = time.monotonic()
+        self.rssi = service_info.rssi
+        self.last_seen = now
+        self._advertising = True
+        self.paths.update_advertisement(
+            service_info.source, service_info.device, service_info.rssi, now
+        )
+
+    @callback
+    def _async_handle_unavailable(
+        self, service_info: bluetooth.BluetoothServiceInfoBleak  # noqa: ARG002
+    ) -> None:
+        """Handle the heater no longer being seen by any scanner."""
+        _LOGGER.debug("%s: no longer advertising", self.name)
+        self._advertising = False
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners now, or with the next batch when batching."""
+        if self.batcher is not None:
+            self.batcher.async_add(self)
+        else:
+            super().async_update_listeners()
+
+    @callback
+    def async_flush_listeners(self) -> None:
+        """Update listeners, called by the batcher."""
+        super().async_update_listeners()
+
+    @callback
+    def async_subscribe_frames(self, listener: FrameListener) -> CALLBACK_TYPE:
+        """Call listener with every decoded state, return a callback to stop.
+
+        Listeners see every frame, including ones that do not change the
+        coordinator data, without going through the state machine.
+        """
+        self._frame_listeners.append(listener)
+
+        @callback
+        def _async_unsubscribe() -> None:
+            self._frame_listeners.remove(listener)
+
+        return _async_unsubscribe
+
+    @callback
+    def _async_handle_frame(self, frame: Frame) -> None:
+        """Handle a frame the heater sent outside a command exchange."""
+        if isinstance(frame, TelemetryFrame):
+            self.telemetry = frame.words
+        elif isinstance(frame, StatusFrame):
+            self._async_process_state(frame.state, frame.raw)
+            self.async_set_updated_data(frame.state)
+
+    def _adapter_load(self) -> dict[str, int]:
+        """Return how many other heaters are connected through each source."""
+        load: dict[str, int] = {}
+        for coordinator in self.hass.data.get(DOMAIN, {}).values():
+            if (
+                isinstance(coordinator, DieselHeaterCoordinator)
+                and coordinator is not self
+                and coordinator.source is not None
+                and coordinator.is_connected
+            ):
+                load[coordinator.source] = load.get(coordinator.source, 0) + 1
+        return load
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if connected to the heater."""
+        return self._client.is_connected
+
+    @callback
+    def _async_select_path(self, now: float) -> None:
+        """Pick the adapter or proxy to connect through."""
+        for device in bluetooth.async_scanner_devices_by_address(
             self.hass, self._address, connectable=True
         ):
-            if device != self._ble_device:
-                self.update_ble_device(device)
+            self.paths.update_advertisement(
+                device.scanner.source,
+                device.ble_device,
+                device.advertisement.rssi,
+                now,
+            )
+        if (path := self.paths.best(now, self.source, self._adapter_load())) is None:
+            return
+        if path.source != self.source:
+            _LOGGER.debug("%s: connecting through %s", self.name, path.source)
+        self.source = path.source
+        self.update_ble_device(path.ble_device)
+
+    async def _async_rebalance(self, now: float) -> None:
+        """Drop the connection if a clearly better path is available."""
+        self._last_rebalance = now
+        path = self.paths.best(now, self.source, self._adapter_load())
+        if path is not None and path.source != self.source:
+            _LOGGER.debug(
+                "%s: moving connection from %s to %s", self.name, self.source, path.source
+            )
+            await self._client.disconnect()
+
+    async def _async_update_data(self) -> HeaterState | None:
+        """Fetch data from heater."""
+        # A connected heater stops advertising, so only skip while disconnected
+        if not self._advertising and not self._client.is_connected:
+            raise UpdateFailed("Heater has not advertised recently")
+
+        now = time.monotonic()
+        if not self.breaker.allow(now, self.last_seen, self._client.is_connected):
+            raise UpdateFailed(f"Heater unreachable, circuit breaker {self.breaker.state}")
+
+        try:
+            state, raw = await self._async_poll(now)
+        except UpdateFailed:
+            self.breaker.record_failure(time.monotonic())
+            raise
+        self.breaker.record_success()
+
+        self._async_process_state(state, raw)
+        return state
+
+    async def _async_poll(self, now: float) -> tuple[HeaterState, bytes]:
+        """Request a status frame, return it parsed and raw."""
+        if not self._client.is_connected:
+            self._async_select_path(now)
+        elif now - self._last_rebalance >= PATH_REBALANCE_INTERVAL:
+            await self._async_rebalance(now)
+            if not self._client.is_connected:
+                self._async_select_path(now)
 
         response = await self._client.send_command(CMD_GET_STATUS)
         if response is None:
+            if self.source is not None and self.paths.record_failure(self.source):
+                _LOGGER.debug("%s: path %s degraded, failing over", self.name, self.source)
+                await self._client.disconnect()
             raise UpdateFailed("Failed to get status from heater")
+        if self.source is not None:
+            self.paths.record_success(self.source, self._client.last_rtt)
 
         state = DieselHeaterBLEClient.parse_response(response)
         if state is None:
             raise UpdateFailed("Failed to parse heater response")
 
-        return state
+        return state, response
+
+    @callback
+    def _async_process_state(
+        self, state: HeaterState, raw: bytes | None = None
+    ) -> None:
+        """Feed a new frame to subscribers, metrics, detectors and climate loop."""
+        for frame_listener in self._frame_listeners:
+            frame_listener(self, state, raw)
+
+        now = time.monotonic()
+        self.metrics.update(state, now)
+        self._metrics_store.async_delay_save(self.metrics.as_dict, METRICS_SAVE_DELAY)
+        # The history and thermal model are saved hourly rather than on every
+        # frame or fit, to spare SD cards; shutdown saves the rest
+        if self.history.add(state, time.time()):
+            self._history_store.async_delay_save(
+                self.history.as_dict, HISTORY_SAVE_DELAY
+            )
+        if (
+            self.thermal.update(
+                self.control_temperature(state), self.outside_temperature(), state, now
+            )
+            and self.thermal.updates % THERMAL_SAVE_UPDATES == 0
+        ):
+            self._thermal_store.async_delay_save(self._thermal_data, METRICS_SAVE_DELAY)
+
+        self._last_update = now
+        if self.duty.enabled:
+            self.update_interval = timedelta(seconds=self.duty.poll_interval(state))
+            if not state.is_on:
+                self._async_schedule_idle(self.duty.idle_timeout)
+
+        for anomaly in self.anomalies.update(state, now):
+            _LOGGER.warning("%s: detected %s", self.name, anomaly)
+            self.hass.bus.async_fire(
+                EVENT_ANOMALY,
+                {
+                    "address": self._address,
+                    "name": self.name,
+                    "type": anomaly,
+                    "running_state": state.running_state.name.lower(),
+                    "supply_voltage": state.supply_voltage,
+                    "combustion_temp": state.combustion_temp,
+                },
+            )
+
+        if edges := self.lifecycle.update(state, now):
+            device = dr.async_get(self.hass).async_get_device({(DOMAIN, self._address)})
+            for edge in edges:
+                _LOGGER.debug("%s: %s", self.name, edge.type)
+                self.hass.bus.async_fire(
+                    EVENT_LIFECYCLE,
+                    {
+                        "device_id": device.id if device is not None else None,
+                        "address": self._address,
+                        "name": self.name,
+                        "type": edge.type,
+                        "from": edge.previous,
+                        "to": edge.phase,
+                        "error_code": edge.error_code,
+                    },
+                )
+
+        self._async_run_control(state, now)
+
+    def control_temperature(self, state: HeaterState) -> float:
+        """Return the room temperature used by the climate loop."""
+        if self.temperature_sensor and (
+            sensor_state := self.hass.states.get(self.temperature_sensor)
+        ):
+            try:
+                return float(sensor_state.state)
+            except ValueError:
+                pass
+        return state.environment_temp
+
+    def outside_temperature(self) -> float:
+        """Return the outside temperature for the thermal model, 0 if unknown."""
+        if self.outside_temperature_sensor and (
+            sensor_state := self.hass.states.get(self.outside_temperature_sensor)
+        ):
+            try:
+                return float(sensor_state.state)
+            except ValueError:
+                pass
+        return 0.0
+
+    def ready_by_plan(self, target: float, deadline: float) -> ReadyPlan | None:
+        """Plan a pre-heat that reaches target by the Unix time deadline."""
+        if self.data is None:
+            return None
+        return plan_ready_by(
+            self.thermal,
+            self.control_temperature(self.data),
+            self.outside_temperature(),
+            target,
+            deadline,
+            time.time(),
+            self.fuel_rates,
+        )
+
+    def _thermal_data(self) -> dict[str, Any]:
+        """Return the thermal model and the scheduled pre-heat to persist."""
+        plan = self.scheduled_start
+        return {
+            **self.thermal.as_dict(),
+            "scheduled_start": asdict(plan) if plan is not None else None,
+        }
+
+    @callback
+    def async_schedule_start(self, plan: ReadyPlan) -> None:
+        """Power on at the planned time and level, replacing an earlier schedule.
+
+        The schedule is persisted with the thermal model, so it survives a
+        reload or restart.
+        """
+        self.async_cancel_start()
+        self._async_arm_start(plan)
+        self._thermal_store.async_delay_save(self._thermal_data, METRICS_SAVE_DELAY)
+
+    @callback
+    def _async_arm_start(self, plan: ReadyPlan) -> None:
+        """Set the timer of a scheduled pre-heat."""
+
+        async def _async_start(_now: datetime) -> None:
+            self._cancel_start = None
+            self.scheduled_start = None
+            self._thermal_store.async_delay_save(self._thermal_data, METRICS_SAVE_DELAY)
+            _LOGGER.debug("%s: pre-heat starting at level %s", self.name, plan.level)
+            await self.async_power_on(level=plan.level)
+
+        self.scheduled_start = plan
+        self._cancel_start = async_track_point_in_utc_time(
+            self.hass, _async_start, dt_util.utc_from_timestamp(plan.start)
+        )
+
+    @callback
+    def _async_restore_start(self, plan: ReadyPlan) -> None:
+        """Re-arm a persisted pre-heat unless its deadline has passed.
+
+        A start missed while Home Assistant was down runs at once if the
+        heater can still help by the deadline.
+        """
+        if plan.start + plan.warmup <= time.time():
+            _LOGGER.warning(
+                "%s: dropping the pre-heat planned for %s, its deadline has passed",
+                self.name,
+                dt_util.utc_from_timestamp(plan.start).isoformat(),
+            )
+            return
+        _LOGGER.debug("%s: restoring the pre-heat planned for %s", self.name, plan.start)
+        self._async_arm_start(plan)
+
+    @callback
+    def async_cancel_start(self) -> None:
+        """Cancel a scheduled pre-heat."""
+        if self._cancel_start is not None:
+            self._cancel_start()
+            self._cancel_start = None
+        if self.scheduled_start is not None:
+            self.scheduled_start = None
+            self._thermal_store.async_delay_save(self._thermal_data, METRICS_SAVE_DELAY)
+
+    @callback
+    def _async_run_control(self, state: HeaterState, now: float) -> None:
+        """Run one step of the local climate loop."""
+        if self._control_task is not None and not self._control_task.done():
+            return
+        temperature = self.control_temperature(state)
+        if not state.is_on or state.operating_mode == OperatingMode.COOLING:
+            self.controller.current_temperature = temperature
+            if self.controller.enabled:
+                # Turned off outside the loop, e.g. on the remote: stop the
+                # loop so it does not hold the link or take over a restart
+                _LOGGER.info("%s: heater turned off, stopping climate loop", self.name)
+                self.controller.disable()
+            return
+        level = self.controller.update(
+            temperature,
+            state.level,
+            now,
+            lambda level: level_plan(level, self.capabilities).writes(
+                state, self.coalescer
+            ),
+        )
+        if level is None:
+            return
+        _LOGGER.debug("%s: climate loop setting level %s", self.name, level)
+        self._control_task = self.hass.async_create_background_task(
+            self._async_run_climate_plan(level_plan(level, self.capabilities)),
+            f"{DOMAIN} {self._address} climate",
+        )
+
+    async def _async_run_climate_plan(self, plan: CommandPlan) -> bool:
+        """Run a plan for the climate loop and charge the writes it took."""
+        result = await self._async_execute_plan(plan)
+        self.controller.budget.consume(result.writes, time.monotonic())
+        return result.success
+
+    @callback
+    def _async_schedule_idle(self, delay: float) -> None:
+        """Check for an idle connection after delay seconds."""
+        if self._cancel_idle is not None:
+            self._cancel_idle()
+        self._cancel_idle = async_call_later(self.hass, delay, self._async_idle)
+
+    @callback
+    def _async_link_wanted(self) -> bool:
+        """Return True if something needs the connection between polls."""
+        return (
+            self.data is None
+            or self.data.is_on
+            or self.controller.enabled
+            or bool(self._frame_listeners)
+            or (self.multiplexer is not None and self.multiplexer.consumers > 0)
+            or self.duty.activity.expected(
+                time.time(), self.update_interval.total_seconds()
+            )
+        )
+
+    async def _async_idle(self, _now: datetime) -> None:
+        """Disconnect an idle link and schedule the reconnect for the next poll."""
+        self._cancel_idle = None
+        if not self._client.is_connected or self._async_link_wanted():
+            return
+        now = time.monotonic()
+        if (remaining := self.duty.idle_remaining(self._client.last_activity, now)) > 0:
+            self._async_schedule_idle(remaining)
+            return
+        next_poll = self._last_update + self.update_interval.total_seconds()
+        delay = self.duty.preconnect_delay(next_poll, now, self._client.connect_latency)
+        if delay is None:
+            return
+        _LOGGER.debug("%s: idle, disconnecting for %.0f s", self.name, delay)
+        self.duty.disconnects += 1
+        await self._client.disconnect()
+        if self._cancel_preconnect is not None:
+            self._cancel_preconnect()
+        self._cancel_preconnect = async_call_later(
+            self.hass, delay, self._async_preconnect
+        )
+
+    async def _async_preconnect(self, _now: datetime) -> None:
+        """Reconnect ahead of the next poll."""
+        self._cancel_preconnect = None
+        if self._client.is_connected:
+            return
+        now = time.monotonic()
+        if self._advertising and self.breaker.allow(now, self.last_seen):
+            self._async_select_path(now)
+            await self._client.connect()
+
+    async def async_enable_climate(self, target_temperature: float) -> bool:
+        """Turn the heater on and hand the level to the local climate loop."""
+        if self.data is None:
+            return False
+        if not self.data.is_on:
+            if not await self._async_run_climate_plan(
+                CommandPlan("power", [power_stage(True)])
+            ):
+                return False
+        self.controller.enable(target_temperature, self.data.level if self.data else None)
+        return True
+
+    async def async_disable_climate(self) -> bool:
+        """Stop the local climate loop and turn the heater off."""
+        self.controller.disable()
+        if self.data is not None and self.data.is_on:
+            return await self._async_run_climate_plan(
+                CommandPlan("power", [power_stage(False)])
+            )
+        return True
+
+    async def async_probe_capabilities(self) -> Capabilities | None:
+        """Probe firmware features that are not known yet."""
+        if (capabilities := await probe_capabilities(self._client, self.capabilities)) is None:
+            return None
+        self.capabilities = capabilities
+        self._apply_capabilities()
+        return capabilities
+
+    def _apply_capabilities(self) -> None:
+        """Configure the client for the known firmware features.
+
+        Commands are only packed into shared writes if the option is on and
+        the firmware was probed to apply every command in a write.
+        """
+        self._client.write_with_response = bool(self.capabilities.write_with_response)
+        self._client.coalescer.enabled = self._coalesce_writes and bool(
+            self.capabilities.concatenated_writes
+        )
+
+    def _fresh_state(self) -> HeaterState | None:
+        """Return the last status if it is less than one poll old."""
+        if time.monotonic() - self._last_update < self.update_interval.total_seconds():
+            return self.data
+        return None
+
+    async def _async_run_plan(
+        self, plan: CommandPlan, timeout: float | None = None
+    ) -> bool:
+        """Run a command plan and return True if it succeeded."""
+        return (await self._async_execute_plan(plan, timeout)).success
+
+    async def _async_execute_plan(
+        self, plan: CommandPlan, timeout: float | None = None
+    ) -> PlanResult:
+        """Run a command plan and publish the state it ended with.
+
+        A plan still running after timeout seconds is rolled back. A status
+        less than one poll old stands in for the plan's first read.
+        """
+        if self.duty.enabled:
+            self.duty.activity.record(time.time())
+            self._activity_store.async_delay_save(
+                self.duty.activity.as_dict, METRICS_SAVE_DELAY
+            )
+            if not self._client.is_connected:
+                # Fast path: connect through the best path right away instead
+                # of waiting for the pre-connect or poll to pick one
+                self._async_select_path(time.monotonic())
+        result = await plan.execute(self._client, timeout, self._fresh_state())
+        if not result.success:
+            _LOGGER.warning(
+                "%s: %s failed at %s%s%s",
+                self.name,
+                plan.name,
+                result.failed_stage,
+                " after timeout" if result.timed_out else "",
+                ", rolled back" if result.rolled_back else "",
+            )
+        if result.state is not None:
+            self._async_process_state(result.state)
+            self.async_set_updated_data(result.state)
+        return result
+
+    async def _async_send(
+        self, name: str, command: bytes, timeout: float | None = None
+    ) -> bool:
+        """Send a single command and publish the resulting state."""
+        return await self._async_run_plan(
+            CommandPlan(name, [command_stage(name, command)]), timeout
+        )
 
     async def async_toggle_power(self) -> bool:
         """Toggle heater power."""
-        response = await self._client.send_command(CMD_TOGGLE_POWER)
-        if response is not None:
-            await self.async_request_refresh()
-            return True
-        return False
+        return await self._async_send("power", CMD_TOGGLE_POWER)
+
+    async def async_set_power(self, on: bool, timeout: float | None = None) -> bool:
+        """Turn the heater on or off."""
+        return await self._async_run_plan(
+            CommandPlan("power", [power_stage(on)]), timeout
+        )
 
-    async def async_set_fan_mode(self) -> bool:
+    async def async_power_on(
+        self,
+        level: int | None = None,
+        temperature: int | None = None,
+        plateau_mode: bool | None = None,
+    ) -> bool:
+        """Turn the heater on and apply level or temperature and plateau mode."""
+        return await self._async_run_plan(
+            start_plan(level, temperature, plateau_mode, self.capabilities)
+        )
+
+    async def async_set_fan_mode(self, timeout: float | None = None) -> bool:
         """Set fan-only mode."""
-        response = await self._client.send_command(CMD_SET_FAN_MODE)
-        if response is not None:
-            await self.async_request_refresh()
-            return True
-        return False
+        return await self._async_send("fan_mode", CMD_SET_FAN_MODE, timeout)
 
     async def async_toggle_plateau_mode(self) -> bool:
         """Toggle high altitude/plateau mode."""
-        response = await self._client.send_command(CMD_TOGGLE_PLATEAU_MODE)
-        if response is not None:
-            await self.async_request_refresh()
-            return True
-        return False
+        return await self._async_send("plateau_mode", CMD_TOGGLE_PLATEAU_MODE)
 
-    async def async_set_level_mode(self) -> bool:
+    async def async_set_level_mode(self, timeout: float | None = None) -> bool:
         """Set level control mode."""
-        if self.data and self.data.control_mode == ControlMode.LEVEL:
-            return True  # Already in level mode
-        response = await self._client.send_command(CMD_SET_LEVEL_MODE)
-        if response is not None:
-            await self.async_request_refresh()
-            return True
-        return False
-
-    async def async_set_temp_mode(self) -> bool:
+        return await self._async_run_plan(
+            CommandPlan("level_mode", [mode_stage(ControlMode.LEVEL)]), timeout
+        )
+
+    async def async_set_temp_mode(self, timeout: float | None = None) -> bool:
         """Set temperature control mode."""
-        if self.data and self.data.control_mode == ControlMode.TEMPERATURE:
-            return True  # Already in temp mode
-        response = await self._client.send_command(CMD_SET_TEMP_MODE)
-        if response is not None:
-            await self.async_request_refresh()
-            return True
-        return False
+        return await self._async_run_plan(
+            CommandPlan("temp_mode", [mode_stage(ControlMode.TEMPERATURE)]), timeout
+        )
 
     async def async_press_up(self) -> bool:
         """Press up button (increase level/temp)."""
-        response = await self._client.send_command(CMD_PRESS_UP)
-        if response is not None:
-            await self.async_request_refresh()
-            return True
-        return False
+        return await self._async_send("press_up", CMD_PRESS_UP)
 
     async def async_press_down(self) -> bool:
         """Press down button (decrease level/temp)."""
-        response = await self._client.send_command(CMD_PRESS_DOWN)
-        if response is not None:
-            await self.async_request_refresh()
-            return True
-        return False
-
-    async def async_set_level(self, target_level: int) -> bool:
-        """Set heater level (1-6)."""
-        if self.data is None:
-            return False
-
-        current = self.data.level
-        if current is None:
-            # Not in level mode, switch first
-            if not await self.async_set_level_mode():
-                return False
-            await self.async_request_refresh()
-            if self.data is None or self.data.level is None:
-                return False
-            current = self.data.level
-
-        delta = target_level - current
-        if delta == 0:
-            return True
-
-        # Send up/down presses to reach target
-        command = CMD_PRESS_UP if delta > 0 else CMD_PRESS_DOWN
-        for _ in range(abs(delta)):
-            response = await self._client.send_command(command)
-            if response is None:
-                return False
-
-        await self.async_request_refresh()
-        return True
-
-    async def async_set_temperature(self, target_temp: int) -> bool:
-        """Set target temperature."""
-        if self.data is None:
-            return False
-
-        current = self.data.target_temperature
-        if current is None:
-            # Not in temp mode, switch first
-            if not await self.async_set_temp_mode():
-                return False
-            await self.async_request_refresh()
-            if self.data is None or self.data.target_temperature is None:
-                return False
-            current = self.data.target_temperature
-
-        delta = target_temp - current
-        if delta == 0:
-            return True
-
-        # Send up/down presses to reach target
-        command = CMD_PRESS_UP if delta > 0 else CMD_PRESS_DOWN
-        for _ in range(abs(delta)):
-            response = await self._client.send_command(command)
-            if response is None:
-                return False
+        return await self._async_send("press_down", CMD_PRESS_DOWN)
+
+    async def async_set_level(
+        self, target_level: int, timeout: float | None = None
+    ) -> bool:
+        """Set heater level (1-6), switching to level mode first if needed."""
+        return await self._async_run_plan(
+            level_plan(target_level, self.capabilities), timeout
+        )
 
-        await self.async_request_refresh()
-        return True
+    async def async_set_temperature(
+        self, target_temp: int, timeout: float | None = None
+    ) -> bool:
+        """Set target temperature, switching to temperature mode first if needed."""
+        return await self._async_run_plan(
+            temperature_plan(target_temp, self.capabilities), timeout
+        )
 
     async def async_shutdown(self) -> None:
         """Disconnect from device."""
+        await self._metrics_store.async_save(self.metrics.as_dict())
+        await self._history_store.async_save(self.history.as_dict())
+        if self.duty.enabled:
+            await self._activity_store.async_save(self.duty.activity.as_dict())
+        # The scheduled pre-heat stays persisted and is re-armed on load
+        await self._thermal_store.async_save(self._thermal_data())
+        if self._cancel_start is not None:
+            self._cancel_start()
+            self._cancel_start = None
+        if self.batcher is not None:
+            self.batcher.async_discard(self)
+        for cancel in (self._cancel_idle, self._cancel_preconnect):
+            if cancel is not None:
+                cancel()
         await self._client.disconnect()
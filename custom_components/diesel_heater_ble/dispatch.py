@@ -0,0 +1,110 @@
+"""Batched delivery of coordinator updates for Diesel Heater BLE."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from .const import BATCH_MAX_SIZE, BATCH_SIZE_BUCKETS, BATCH_WINDOW
+
+if TYPE_CHECKING:
+    from .coordinator import DieselHeaterCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class UpdateBatcher:
+    """Deliver updates from many heaters to their entities in one pass.
+
+    The first update schedules a flush BATCH_WINDOW later; updates that
+    arrive until then join the batch, and repeated updates of one heater
+    collapse into a single listener pass with its latest data. The flush
+    deadline is never pushed back, so no update waits longer than the
+    window, and a batch that reaches BATCH_MAX_SIZE is flushed at once.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        window: float = BATCH_WINDOW,
+        max_size: int = BATCH_MAX_SIZE,
+    ) -> None:
+        """Initialize the batcher."""
+        self._loop = loop
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[DieselHeaterCoordinator, None] = {}
+        self._opened: float | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self.batches = 0
+        self.updates = 0
+        self.coalesced = 0
+        self.largest = 0
+        self.max_latency = 0.0
+        self.sizes = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def async_add(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Queue a listener pass for a coordinator."""
+        self.updates += 1
+        if coordinator in self._pending:
+            self.coalesced += 1
+            return
+        self._pending[coordinator] = None
+        if self._timer is None:
+            self._opened = time.monotonic()
+            self._timer = self._loop.call_later(self.window, self.async_flush)
+        elif len(self._pending) >= self.max_size:
+            self.async_flush()
+
+    def async_discard(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Drop a pending update of a coordinator that is shutting down."""
+        self._pending.pop(coordinator, None)
+
+    def async_flush(self) -> None:
+        """Run the listeners of every pending coordinator."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        if self._opened is not None:
+            self.max_latency = max(self.max_latency, time.monotonic() - self._opened)
+        size = len(pending)
+        self.batches += 1
+        self.largest = max(self.largest, size)
+        bucket = next(
+            (
+                index
+                for index, limit in enumerate(BATCH_SIZE_BUCKETS)
+                if size <= limit
+            ),
+            len(BATCH_SIZE_BUCKETS),
+        )
+        self.sizes[bucket] += 1
+        for coordinator in pending:
+            # One heater's failing listener must not starve the rest of the batch
+            try:
+                coordinator.async_flush_listeners()
+            except Exception:
+                _LOGGER.exception("Error updating listeners of %s", coordinator.name)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the batch metrics."""
+        labels = [
+            *(f"<={limit}" for limit in BATCH_SIZE_BUCKETS),
+            f">{BATCH_SIZE_BUCKETS[-1]}",
+        ]
+        return {
+            "window_ms": self.window * 1000,
+            "batches": self.batches,
+            "updates": self.updates,
+            "coalesced": self.coalesced,
+            "mean_batch_size": (
+                (self.updates - self.coalesced) / self.batches if self.batches else 0.0
+            ),
+            "largest_batch": self.largest,
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "batch_sizes": dict(zip(labels, self.sizes)),
+        }
@@ -0,0 +1,111 @@
+"""Connect-on-demand scheduling for Diesel Heater BLE."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+from .const import (
+    ACTIVITY_HALF_LIFE,
+    ACTIVITY_SLOT,
+    ACTIVITY_THRESHOLD,
+    DEFAULT_CONNECT_LATENCY,
+    DEFAULT_SCAN_INTERVAL,
+    MIN_DISCONNECTED_TIME,
+    PRECONNECT_MARGIN,
+)
+from .models import HeaterState
+
+WEEK = 7 * 86400
+SLOTS = WEEK // ACTIVITY_SLOT
+
+
+class ActivityProfile:
+    """When during the week the heater is usually commanded.
+
+    Each command adds one to its slot of the week; all slots decay with
+    ACTIVITY_HALF_LIFE, so a slot only stays above ACTIVITY_THRESHOLD
+    while the habit keeps recurring. Slots are in UTC.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty profile."""
+        self.weights = [0.0] * SLOTS
+        self._decayed: float | None = None  # Unix time weights were decayed to
+
+    def record(self, when: float) -> None:
+        """Record a command at Unix time when."""
+        if self._decayed is not None and when > self._decayed:
+            factor = 0.5 ** ((when - self._decayed) / ACTIVITY_HALF_LIFE)
+            self.weights = [weight * factor for weight in self.weights]
+        self._decayed = when
+        self.weights[int(when % WEEK // ACTIVITY_SLOT)] += 1
+
+    def expected(self, when: float, horizon: float) -> bool:
+        """Return True if a command is likely between when and when + horizon."""
+        first = int(when % WEEK // ACTIVITY_SLOT)
+        last = int((when + horizon) % WEEK // ACTIVITY_SLOT)
+        slot = first
+        while True:
+            if self.weights[slot] >= ACTIVITY_THRESHOLD:
+                return True
+            if slot == last:
+                return False
+            slot = (slot + 1) % SLOTS
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the persisted profile."""
+        return {
+            "weights": [round(weight, 3) for weight in self.weights],
+            "decayed": self._decayed,
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore a persisted profile."""
+        weights = data.get("weights", [])
+        if len(weights) == SLOTS:
+            self.weights = [float(weight) for weight in weights]
+            self._decayed = data.get("decayed")
+
+
+class DutyCycle:
+    """Decide when an idle connection may be dropped and when to reopen it.
+
+    While the heater is off it is polled every idle_interval instead of
+    every DEFAULT_SCAN_INTERVAL, and the connection is closed idle_timeout
+    after the last exchange. It is reopened ahead of the next poll by a
+    margin of the measured connect latency, so the poll itself does not
+    wait for the connect. A gap shorter than MIN_DISCONNECTED_TIME is not
+    worth the reconnect and the connection is kept.
+    """
+
+    def __init__(self, idle_timeout: float, idle_interval: float) -> None:
+        """Initialize the duty cycle; an idle_timeout of 0 disables it."""
+        self.idle_timeout = idle_timeout
+        self.idle_interval = idle_interval
+        self.activity = ActivityProfile()
+        self.disconnects = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if idle connections are dropped."""
+        return self.idle_timeout > 0
+
+    def poll_interval(self, state: HeaterState | None) -> float:
+        """Return the seconds until the next poll."""
+        if self.enabled and state is not None and not state.is_on:
+            return self.idle_interval
+        return DEFAULT_SCAN_INTERVAL
+
+    def idle_remaining(self, last_activity: float | None, now: float) -> float:
+        """Return the seconds until the connection counts as idle."""
+        if last_activity is None:
+            return 0.0
+        return last_activity + self.idle_timeout - now
+
+    def preconnect_delay(
+        self, next_poll: float, now: float, connect_latency: float | None
+    ) -> float | None:
+        """Return when to reconnect for the next poll, or None to stay connected."""
+        latency = DEFAULT_CONNECT_LATENCY if connect_latency is None else connect_latency
+        delay = next_poll - now - latency * PRECONNECT_MARGIN
+        return delay if delay >= MIN_DISCONNECTED_TIME else None
@@ -0,0 +1,135 @@
+"""State publication filters for Diesel Heater BLE sensors."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from .const import (
+    CONF_ABS_DEADBAND,
+    CONF_AGGREGATE_STATISTICS,
+    CONF_DEADBAND,
+    CONF_FILTERS,
+    CONF_HEARTBEAT,
+    CONF_HYSTERESIS,
+    CONF_MIN_INTERVAL,
+    CONF_REL_DEADBAND,
+    DEFAULT_DEADBAND,
+    DEFAULT_HEARTBEAT,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class FilterConfig:
+    """Publication filter settings for a single sensor."""
+
+    abs_deadband: float = 0.0  # Minimum absolute change
+    rel_deadband: float = 0.0  # Minimum change in percent of last published value
+    hysteresis: float = 0.0  # Extra change required when direction reverses
+    min_interval: float = 0.0  # Seconds between writes
+    heartbeat: float = 0.0  # Seconds after which an unchanged value is rewritten
+
+    @property
+    def passthrough(self) -> bool:
+        """Return True if the filter publishes every update."""
+        return not (
+            self.abs_deadband
+            or self.rel_deadband
+            or self.hysteresis
+            or self.min_interval
+        )
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> FilterConfig:
+        """Create from options data."""
+        return cls(
+            abs_deadband=float(data.get(CONF_ABS_DEADBAND, 0.0)),
+            rel_deadband=float(data.get(CONF_REL_DEADBAND, 0.0)),
+            hysteresis=float(data.get(CONF_HYSTERESIS, 0.0)),
+            min_interval=float(data.get(CONF_MIN_INTERVAL, 0.0)),
+            heartbeat=float(data.get(CONF_HEARTBEAT, 0.0)),
+        )
+
+    def as_dict(self) -> dict[str, float]:
+        """Return options data."""
+        return asdict(self)
+
+
+def get_filter_config(options: Mapping[str, Any], sensor: str) -> FilterConfig:
+    """Return the filter settings for a sensor from config entry options.
+
+    Sensors without explicit settings fall back to the aggregation mode
+    deadband and heartbeat, or publish every update if aggregation is off.
+    """
+    if (data := options.get(CONF_FILTERS, {}).get(sensor)) is not None:
+        return FilterConfig.from_dict(data)
+    if options.get(CONF_AGGREGATE_STATISTICS, False):
+        return FilterConfig(
+            abs_deadband=options.get(CONF_DEADBAND, DEFAULT_DEADBAND),
+            heartbeat=options.get(CONF_HEARTBEAT, DEFAULT_HEARTBEAT),
+        )
+    return FilterConfig()
+
+
+class PublishFilter:
+    """Decide whether a new sensor value should be written to the state machine.
+
+    Availability changes and transitions to or from None always publish.
+    Numeric values publish when they leave the deadband around the last
+    published value; a change against the direction of the previous one
+    must also clear the hysteresis, which stops one-unit jitter from
+    toggling the state back and forth.
+    """
+
+    def __init__(self, config: FilterConfig) -> None:
+        """Initialize the filter."""
+        self.config = config
+        self._value: float | None = None
+        self._available = False
+        self._published_at: float | None = None
+        self._direction = 0
+
+    def reset(self, value: float | None, available: bool, now: float) -> None:
+        """Record an externally published value."""
+        self._value = value
+        self._available = available
+        self._published_at = now
+        self._direction = 0
+
+    def _threshold(self, delta: float) -> float:
+        """Return the change required to publish."""
+        config = self.config
+        threshold = config.abs_deadband
+        if config.rel_deadband and self._value:
+            threshold = max(threshold, abs(self._value) * config.rel_deadband / 100)
+        if config.hysteresis and self._direction and (delta > 0) != (self._direction > 0):
+            threshold += config.hysteresis
+        return threshold
+
+    def update(self, value: float | None, available: bool, now: float) -> bool:
+        """Return True and record the value if it should be published."""
+        if self._published_at is None or available != self._available:
+            self.reset(value, available, now)
+            return True
+
+        config = self.config
+        elapsed = now - self._published_at
+        if value is None or self._value is None:
+            publish = value != self._value
+        elif config.heartbeat and elapsed >= config.heartbeat:
+            publish = True
+        elif config.min_interval and elapsed < config.min_interval:
+            publish = False
+        else:
+            delta = value - self._value
+            publish = delta != 0 and abs(delta) >= self._threshold(delta)
+
+        if not publish:
+            return False
+
+        if value is not None and self._value is not None and value != self._value:
+            self._direction = 1 if value > self._value else -1
+        self._value = value
+        self._available = available
+        self._published_at = now
+        return True
@@ -0,0 +1,207 @@
+"""Multi-resolution telemetry history for Diesel Heater BLE."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from .const import (
+    DEFAULT_SCAN_INTERVAL,
+    HISTORY_SCAN_FACTOR,
+    HISTORY_SERIES,
+    HISTORY_TIERS,
+)
+from .models import HeaterState
+
+
+def lttb(
+    times: Sequence[float], values: Sequence[float], threshold: int
+) -> list[tuple[float, float]]:
+    """Downsample a series with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket. Peaks and
+    dips survive far better than with plain averaging.
+    """
+    count = len(times)
+    if threshold >= count or threshold < 3:
+        return list(zip(times, values))
+
+    sampled = [(times[0], values[0])]
+    every = (count - 2) / (threshold - 2)
+    kept = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        span = next_end - end
+        average_time = sum(times[end:next_end]) / span
+        average_value = sum(values[end:next_end]) / span
+
+        kept_time, kept_value = times[kept], values[kept]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            area = abs(
+                (kept_time - average_time) * (values[index] - kept_value)
+                - (kept_time - times[index]) * (average_value - kept_value)
+            )
+            if area > best_area:
+                best, best_area = index, area
+        sampled.append((times[best], values[best]))
+        kept = best
+    sampled.append((times[-1], values[-1]))
+    return sampled
+
+
+class HistoryTier:
+    """One resolution of the history.
+
+    Timestamps and values are kept in parallel arrays, sorted by time, so a
+    range is found by bisection. A step of 0 stores every frame; otherwise
+    frames are averaged into buckets of step seconds, and a bucket is
+    stored when the first frame of the next one arrives.
+    """
+
+    def __init__(self, step: int, retention: int) -> None:
+        """Initialize an empty tier."""
+        self.step = step
+        self.retention = retention
+        self.times = array("d")
+        self.values = {key: array("d") for key in HISTORY_SERIES}
+        self._bucket: float | None = None
+        self._count = 0
+        self._sums = dict.fromkeys(HISTORY_SERIES, 0.0)
+
+    @property
+    def resolution(self) -> float:
+        """Return the seconds between stored points."""
+        return self.step or DEFAULT_SCAN_INTERVAL
+
+    def add(self, sample: Mapping[str, float], now: float) -> bool:
+        """Add a frame worth of values, return True if a point was stored."""
+        if not self.step:
+            return self._append(now, sample)
+        stored = False
+        bucket = now - now % self.step
+        if self._bucket is not None and bucket != self._bucket:
+            if bucket < self._bucket:
+                return False  # Clock went backwards, drop until it catches up
+            means = {key: total / self._count for key, total in self._sums.items()}
+            stored = self._append(self._bucket, means)
+            self._count = 0
+            self._sums = dict.fromkeys(HISTORY_SERIES, 0.0)
+        self._bucket = bucket
+        self._count += 1
+        for key in HISTORY_SERIES:
+            self._sums[key] += sample[key]
+        return stored
+
+    def _append(self, when: float, sample: Mapping[str, float]) -> bool:
+        """Store a point and drop the ones past retention."""
+        if self.times and when <= self.times[-1]:
+            return False
+        self.times.append(when)
+        for key, values in self.values.items():
+            values.append(sample[key])
+        # Trim in batches so the copy is amortized over many appends
+        if self.times[0] < when - self.retention * 1.1:
+            cut = bisect_left(self.times, when - self.retention)
+            del self.times[:cut]
+            for values in self.values.values():
+                del values[:cut]
+        return True
+
+    def span(self, start: float, end: float) -> tuple[int, int]:
+        """Return the index range of the points between start and end."""
+        return bisect_left(self.times, start), bisect_right(self.times, end)
+
+    def covers(self, start: float) -> bool:
+        """Return True if the tier has data from start on."""
+        return bool(self.times) and self.times[0] <= start + self.resolution
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the persisted points."""
+        data: dict[str, Any] = {"times": [int(when) for when in self.times]}
+        for key, values in self.values.items():
+            data[key] = [round(value, 2) for value in values]
+        return data
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore persisted points."""
+        times = data.get("times", [])
+        if any(len(data.get(key, ())) != len(times) for key in HISTORY_SERIES):
+            return
+        self.times = array("d", times)
+        self.values = {key: array("d", data[key]) for key in HISTORY_SERIES}
+
+
+class TelemetryHistory:
+    """Telemetry at several resolutions for fast long-range queries.
+
+    Every frame is kept for a short while, and rolled up into coarser
+    bucket means that are kept longer. A query picks the finest tier that
+    reaches back to its start with no more than HISTORY_SCAN_FACTOR points
+    per point requested, then downsamples with LTTB, so its cost depends
+    on the point budget rather than on the length of the range.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the history."""
+        self.tiers = [HistoryTier(step, retention) for step, retention in HISTORY_TIERS]
+
+    def add(self, state: HeaterState, now: float) -> bool:
+        """Add a frame; now is a Unix timestamp.
+
+        Returns True when the coarsest tier stored a point, which is when
+        the persisted rollups are worth saving.
+        """
+        sample = {key: float(getattr(state, key)) for key in HISTORY_SERIES}
+        stored = False
+        for tier in self.tiers:
+            stored = tier.add(sample, now)
+        return stored
+
+    def _select(self, start: float, end: float, points: int) -> HistoryTier | None:
+        """Return the tier to answer a query from."""
+        limit = points * HISTORY_SCAN_FACTOR
+        for require_cover in (True, False):
+            for tier in self.tiers:
+                if require_cover and not tier.covers(start):
+                    continue
+                first, last = tier.span(start, end)
+                if 0 < last - first <= limit:
+                    return tier
+        # Even the coarsest tier has too many points; LTTB copes
+        for tier in reversed(self.tiers):
+            first, last = tier.span(start, end)
+            if last > first:
+                return tier
+        return None
+
+    def query(
+        self,
+        series: Sequence[str],
+        start: float,
+        end: float,
+        points: int,
+    ) -> tuple[float | None, dict[str, list[tuple[float, float]]]]:
+        """Return the resolution used and each series downsampled to points."""
+        if (tier := self._select(start, end, points)) is None:
+            return None, {key: [] for key in series}
+        first, last = tier.span(start, end)
+        times = tier.times[first:last]
+        return tier.resolution, {
+            key: lttb(times, tier.values[key][first:last], points) for key in series
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the persisted rollups; per-frame points are not saved."""
+        return {str(tier.step): tier.as_dict() for tier in self.tiers if tier.step}
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore persisted rollups."""
+        for tier in self.tiers:
+            if tier.step and (tier_data := data.get(str(tier.step))) is not None:
+                tier.restore(tier_data)
@@ -0,0 +1,102 @@
+"""Heater lifecycle edge detection for Diesel Heater BLE."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .const import (
+    LIFECYCLE_COOLDOWN_FINISHED,
+    LIFECYCLE_COOLDOWN_STARTED,
+    LIFECYCLE_DEBOUNCE,
+    LIFECYCLE_ERROR_CLEARED,
+    LIFECYCLE_ERROR_RAISED,
+    LIFECYCLE_HEATING_REACHED,
+    LIFECYCLE_IGNITION_STARTED,
+    RunningState,
+)
+from .models import HeaterState
+
+PHASE_OFF = "off"
+PHASE_IGNITING = "igniting"
+PHASE_HEATING = "heating"
+PHASE_COOLING = "cooling"
+PHASE_ERROR = "error"
+
+_PHASES = {
+    RunningState.IDLE: PHASE_OFF,
+    RunningState.PREHEATING: PHASE_IGNITING,
+    RunningState.GLOWPLUG: PHASE_IGNITING,
+    RunningState.HEATING: PHASE_HEATING,
+    RunningState.COOLING: PHASE_COOLING,
+}
+
+# Edge raised on entering a phase
+_ENTERED = {
+    PHASE_IGNITING: LIFECYCLE_IGNITION_STARTED,
+    PHASE_HEATING: LIFECYCLE_HEATING_REACHED,
+    PHASE_COOLING: LIFECYCLE_COOLDOWN_STARTED,
+    PHASE_ERROR: LIFECYCLE_ERROR_RAISED,
+}
+
+
+def phase_of(state: HeaterState) -> tuple[str, int | None]:
+    """Return the lifecycle phase of a frame and its error code."""
+    if state.is_error:
+        return PHASE_ERROR, state.error_code
+    return _PHASES.get(state.running_state, PHASE_OFF), None
+
+
+@dataclass(frozen=True, slots=True)
+class LifecycleEdge:
+    """A confirmed change of lifecycle phase."""
+
+    type: str
+    previous: str
+    phase: str
+    error_code: int | None = None
+
+
+class LifecycleDetector:
+    """Turn successive HeaterState frames into lifecycle edges.
+
+    Frames are reduced to a phase: off, igniting (preheating and glow
+    plug), heating, cooling or error. A new phase only counts once frames
+    have shown it for LIFECYCLE_DEBOUNCE seconds, so a state that flaps
+    for a frame or two raises nothing. The first phase seen is taken as
+    the starting point without an edge, so restarts stay quiet. A change
+    of error code while in error is an edge of its own.
+    """
+
+    def __init__(self, debounce: float = LIFECYCLE_DEBOUNCE) -> None:
+        """Initialize the detector."""
+        self.debounce = debounce
+        self.phase: str | None = None
+        self.error_code: int | None = None
+        self._candidate: tuple[str, int | None] | None = None
+        self._candidate_since = 0.0
+
+    def update(self, state: HeaterState, now: float) -> list[LifecycleEdge]:
+        """Add a frame and return the edges it confirmed."""
+        observed = phase_of(state)
+        if self.phase is None:
+            self.phase, self.error_code = observed
+            return []
+        if observed == (self.phase, self.error_code):
+            self._candidate = None
+            return []
+        if observed != self._candidate:
+            self._candidate = observed
+            self._candidate_since = now
+        if now - self._candidate_since < self.debounce:
+            return []
+
+        previous = self.phase
+        self.phase, self.error_code = observed
+        self._candidate = None
+        edges = []
+        if previous == PHASE_ERROR and self.phase != PHASE_ERROR:
+            edges.append(LifecycleEdge(LIFECYCLE_ERROR_CLEARED, previous, self.phase))
+        if (edge_type := _ENTERED.get(self.phase)) is not None:
+            edges.append(LifecycleEdge(edge_type, previous, self.phase, self.error_code))
+        elif previous == PHASE_COOLING:
+            edges.append(LifecycleEdge(LIFECYCLE_COOLDOWN_FINISHED, previous, self.phase))
+        return edges
@@ -0,0 +1,74 @@
+"""Preloaded translation tables for Diesel Heater BLE."""
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+_LOGGER = logging.getLogger(__name__)
+
+TRANSLATIONS_DIR = Path(__file__).parent / "translations"
+DEFAULT_LANGUAGE = "en"
+
+
+@dataclass(slots=True)
+class LanguageTable:
+    """Translated error descriptions for one language, indexed by code."""
+
+    errors: dict[int, str] = field(default_factory=dict)
+    unknown_error: str = "Unknown error"
+
+
+def _load_table(path: Path) -> LanguageTable:
+    """Parse one translation file."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    descriptions: dict[str, str] = data.get("error_descriptions", {})
+    table = LanguageTable(
+        errors={int(code): text for code, text in descriptions.items() if code.isdigit()}
+    )
+    if "unknown" in descriptions:
+        table.unknown_error = descriptions["unknown"]
+    return table
+
+
+class LocalizationIndex:
+    """Error descriptions for every shipped language.
+
+    Built once in an executor at setup; lookups are plain dict accesses
+    so rendering attributes never touches the disk. State text is left to
+    Home Assistant's entity translations. Languages fall back from
+    a regional variant to its base language and then to English.
+    """
+
+    def __init__(self, tables: dict[str, LanguageTable]) -> None:
+        """Initialize the index."""
+        self._tables = tables
+        self._default = tables.get(DEFAULT_LANGUAGE, LanguageTable())
+        self._resolved: dict[str, LanguageTable] = {}
+
+    @classmethod
+    def load(cls, directory: Path = TRANSLATIONS_DIR) -> LocalizationIndex:
+        """Parse all translation files, this does blocking I/O."""
+        tables: dict[str, LanguageTable] = {}
+        for path in sorted(directory.glob("*.json")):
+            try:
+                tables[path.stem] = _load_table(path)
+            except (OSError, ValueError) as err:
+                _LOGGER.warning("Failed to load translations from %s: %s", path.name, err)
+        return cls(tables)
+
+    def table(self, language: str) -> LanguageTable:
+        """Return the table for a language."""
+        if (table := self._resolved.get(language)) is None:
+            table = self._tables.get(
+                language,
+                self._tables.get(language.split("-")[0].lower(), self._default),
+            )
+            self._resolved[language] = table
+        return table
+
+    def error_description(self, language: str, error_code: int) -> str:
+        """Return the description of a heater error code."""
+        table = self.table(language)
+        return table.errors.get(error_code, table.unknown_error)
@@ -0,0 +1,212 @@
+"""Incremental long-term statistics for Diesel Heater BLE."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfElectricPotential, UnitOfTemperature
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .const import DOMAIN, STATISTICS_BUCKET, STATISTICS_PERIOD, STORAGE_VERSION
+from .coordinator import DieselHeaterCoordinator
+from .models import HeaterState
+
+_LOGGER = logging.getLogger(__name__)
+
+# HeaterState attribute -> (statistic name suffix, unit)
+AGGREGATED_VALUES: dict[str, tuple[str, str]] = {
+    "supply_voltage": ("Supply Voltage", UnitOfElectricPotential.VOLT),
+    "environment_temp": ("Environment Temperature", UnitOfTemperature.CELSIUS),
+    "combustion_temp": ("Combustion Temperature", UnitOfTemperature.CELSIUS),
+}
+
+
+@dataclass(slots=True)
+class RunningStats:
+    """Running mean/min/max over a fixed time bucket."""
+
+    start: datetime
+    count: int = 0
+    total: float = 0.0
+    minimum: float = 0.0
+    maximum: float = 0.0
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        if self.count == 0:
+            self.minimum = self.maximum = value
+        elif value < self.minimum:
+            self.minimum = value
+        elif value > self.maximum:
+            self.maximum = value
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: RunningStats) -> None:
+        """Fold another (finished) bucket into this one."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.minimum, self.maximum = other.minimum, other.maximum
+        else:
+            self.minimum = min(self.minimum, other.minimum)
+            self.maximum = max(self.maximum, other.maximum)
+        self.count += other.count
+        self.total += other.total
+
+    @property
+    def mean(self) -> float:
+        """Return the bucket mean."""
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the persisted bucket."""
+        return {
+            "start": self.start.isoformat(),
+            "count": self.count,
+            "total": self.total,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> RunningStats | None:
+        """Restore a persisted bucket, None if it cannot be read."""
+        if (start := dt_util.parse_datetime(str(data.get("start")))) is None:
+            return None
+        return cls(
+            start=start,
+            count=int(data.get("count", 0)),
+            total=float(data.get("total", 0.0)),
+            minimum=float(data.get("minimum", 0.0)),
+            maximum=float(data.get("maximum", 0.0)),
+        )
+
+
+def _floor(when: datetime, seconds: int) -> datetime:
+    """Floor a UTC datetime to a multiple of seconds."""
+    ts = int(when.timestamp())
+    return dt_util.utc_from_timestamp(ts - ts % seconds)
+
+
+class StatisticsAggregator:
+    """Aggregate heater measurements and import them as external statistics.
+
+    Samples are folded into 5-minute buckets as they arrive; each finished
+    bucket is merged into the hour it belongs to, and the hour is imported
+    once it closes. Recorder external statistics only accept rows starting
+    at the top of the hour, so the 5-minute buckets are kept in memory.
+
+    Importing a row again for the same hour replaces it, so the open
+    bucket and hour are saved on unload and restored on setup rather than
+    imported: a reload or restart carries on with the same hour, which is
+    imported exactly once when a sample of a later hour closes it.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the aggregator."""
+        self.hass = hass
+        self.coordinator = coordinator
+        object_id = slugify(coordinator.address)
+        self._metadata: dict[str, StatisticMetaData] = {
+            key: StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=f"{coordinator.name} {name}",
+                source=DOMAIN,
+                statistic_id=f"{DOMAIN}:{object_id}_{key}",
+                unit_of_measurement=unit,
+            )
+            for key, (name, unit) in AGGREGATED_VALUES.items()
+        }
+        self._buckets: dict[str, RunningStats] = {}
+        self._periods: dict[str, RunningStats] = {}
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{object_id}.statistics"
+        )
+
+    async def async_load(self) -> None:
+        """Restore the open bucket and hour saved on the last unload."""
+        if (data := await self._store.async_load()) is None:
+            return
+        for target, key in ((self._buckets, "buckets"), (self._periods, "periods")):
+            for name, stats_data in data.get(key, {}).items():
+                if name in AGGREGATED_VALUES and (
+                    stats := RunningStats.from_dict(stats_data)
+                ):
+                    target[name] = stats
+
+    @callback
+    def async_update(self) -> None:
+        """Handle a coordinator update."""
+        if not self.coordinator.last_update_success or self.coordinator.data is None:
+            return
+        self.async_add_state(self.coordinator.data, dt_util.utcnow())
+
+    @callback
+    def async_add_state(self, state: HeaterState, now: datetime) -> None:
+        """Add one frame worth of samples."""
+        bucket_start = _floor(now, STATISTICS_BUCKET)
+        for key in AGGREGATED_VALUES:
+            bucket = self._buckets.get(key)
+            if bucket is not None and bucket.start != bucket_start:
+                self._close_bucket(key, bucket)
+                bucket = None
+            if bucket is None:
+                bucket = self._buckets[key] = RunningStats(bucket_start)
+            bucket.add(getattr(state, key))
+
+    def _close_bucket(self, key: str, bucket: RunningStats) -> None:
+        """Fold a finished 5-minute bucket into its hour."""
+        period_start = _floor(bucket.start, STATISTICS_PERIOD)
+        period = self._periods.get(key)
+        if period is not None and period.start != period_start:
+            self._import(key, period)
+            period = None
+        if period is None:
+            period = self._periods[key] = RunningStats(period_start)
+        period.merge(bucket)
+
+    def _import(self, key: str, period: RunningStats) -> None:
+        """Import a finished hour into the recorder."""
+        if period.count == 0:
+            return
+        _LOGGER.debug(
+            "Importing %s statistics for %s (%d samples)",
+            key,
+            period.start,
+            period.count,
+        )
+        async_add_external_statistics(
+            self.hass,
+            self._metadata[key],
+            [
+                StatisticData(
+                    start=period.start,
+                    mean=period.mean,
+                    min=period.minimum,
+                    max=period.maximum,
+                )
+            ],
+        )
+
+    async def async_save(self) -> None:
+        """Save the open bucket and hour for the next setup to continue."""
+        await self._store.async_save(
+            {
+                "buckets": {
+                    key: bucket.as_dict() for key, bucket in self._buckets.items()
+                },
+                "periods": {
+                    key: period.as_dict() for key, period in self._periods.items()
+                },
+            }
+        )
@@ -0,0 +1,92 @@
+"""Cumulative derived metrics for Diesel Heater BLE."""
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from .const import (
+    CONF_FUEL_RATES,
+    DEFAULT_FUEL_RATES,
+    MAX_INTEGRATION_GAP,
+    MAX_LEVEL,
+    MIN_LEVEL,
+    RunningState,
+)
+from .models import HeaterState
+
+# Running states that are part of a start sequence
+_IGNITION_STATES = frozenset({RunningState.PREHEATING, RunningState.GLOWPLUG})
+
+
+def get_fuel_rates(options: Mapping[str, Any]) -> tuple[float, ...]:
+    """Return the per-level fuel rate table (litres per hour) from options."""
+    rates = options.get(CONF_FUEL_RATES)
+    if rates is None or len(rates) != MAX_LEVEL - MIN_LEVEL + 1:
+        return DEFAULT_FUEL_RATES
+    return tuple(float(rate) for rate in rates)
+
+
+class DerivedMetrics:
+    """Integrate fuel use, heating runtime and start cycles frame by frame.
+
+    Each update costs O(1): the fuel rate and heating flag of the previous
+    frame are held constant until the next one arrives. Gaps longer than
+    MAX_INTEGRATION_GAP (missed polls, restarts) are not integrated.
+
+    In temperature mode the heater picks its own output level, so the last
+    level seen in level mode is used for the fuel rate.
+    """
+
+    def __init__(self, fuel_rates: Sequence[float] = DEFAULT_FUEL_RATES) -> None:
+        """Initialize the metrics."""
+        self._fuel_rates = tuple(rate / 3600 for rate in fuel_rates)  # L/s
+        self.fuel_consumed = 0.0  # Litres
+        self.heating_time = 0.0  # Seconds
+        self.glowplug_cycles = 0
+        self.ignition_attempts = 0
+        self._last_time: float | None = None
+        self._last_running_state: RunningState | None = None
+        self._last_level = MIN_LEVEL
+        self._heating = False
+        self._rate = 0.0
+
+    def update(self, state: HeaterState, now: float) -> None:
+        """Add a frame."""
+        if self._last_time is not None:
+            elapsed = now - self._last_time
+            if 0 < elapsed <= MAX_INTEGRATION_GAP and self._heating:
+                self.fuel_consumed += self._rate * elapsed
+                self.heating_time += elapsed
+
+        running_state = state.running_state
+        previous = self._last_running_state
+        if previous is not None and running_state != previous:
+            if running_state == RunningState.GLOWPLUG:
+                self.glowplug_cycles += 1
+            if running_state in _IGNITION_STATES and previous not in _IGNITION_STATES:
+                self.ignition_attempts += 1
+
+        if (level := state.level) is not None and MIN_LEVEL <= level <= MAX_LEVEL:
+            self._last_level = level
+        self._heating = running_state == RunningState.HEATING
+        self._rate = self._fuel_rates[self._last_level - MIN_LEVEL]
+        self._last_time = now
+        self._last_running_state = running_state
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the persisted totals."""
+        return {
+            "fuel_consumed": self.fuel_consumed,
+            "heating_time": self.heating_time,
+            "glowplug_cycles": self.glowplug_cycles,
+            "ignition_attempts": self.ignition_attempts,
+            "last_level": self._last_level,
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore persisted totals."""
+        self.fuel_consumed = float(data.get("fuel_consumed", 0.0))
+        self.heating_time = float(data.get("heating_time", 0.0))
+        self.glowplug_cycles = int(data.get("glowplug_cycles", 0))
+        self.ignition_attempts = int(data.get("ignition_attempts", 0))
+        self._last_level = int(data.get("last_level", MIN_LEVEL))
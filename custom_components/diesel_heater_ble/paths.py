@@ -0,0 +1,110 @@
+"""Adapter/proxy path selection for Diesel Heater BLE."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .const import (
+    PATH_FAILURE_PENALTY,
+    PATH_LOAD_PENALTY,
+    PATH_MAX_FAILURES,
+    PATH_RTT_ALPHA,
+    PATH_RTT_WEIGHT,
+    PATH_STALE,
+    PATH_SWITCH_MARGIN,
+)
+
+if TYPE_CHECKING:
+    from bleak.backends.device import BLEDevice
+
+
+@dataclass(slots=True)
+class PathStats:
+    """What is known about reaching the heater through one adapter or proxy."""
+
+    source: str
+    ble_device: BLEDevice
+    rssi: int
+    last_seen: float
+    rtt: float | None = None  # Seconds, EWMA of command round trips
+    failures: int = 0  # Consecutive failed commands
+
+    @property
+    def degraded(self) -> bool:
+        """Return True if the path keeps failing."""
+        return self.failures >= PATH_MAX_FAILURES
+
+    def score(self, load: int) -> float:
+        """Return a comparable path score, higher is better."""
+        score = float(self.rssi)
+        if self.rtt is not None:
+            score -= self.rtt * 1000 * PATH_RTT_WEIGHT
+        return score - self.failures * PATH_FAILURE_PENALTY - load * PATH_LOAD_PENALTY
+
+
+class PathSelector:
+    """Track RSSI and round-trip time per source and pick the best path.
+
+    Scores combine RSSI, measured RTT, consecutive failures and how many
+    other heaters are already connected through the same source, so
+    connections spread over adapters. The current path is kept unless
+    another one scores PATH_SWITCH_MARGIN better or it has degraded.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the selector."""
+        self.paths: dict[str, PathStats] = {}
+
+    def update_advertisement(
+        self, source: str, ble_device: BLEDevice, rssi: int, now: float
+    ) -> None:
+        """Record an advertisement heard through a source."""
+        if (path := self.paths.get(source)) is None:
+            self.paths[source] = PathStats(source, ble_device, rssi, now)
+            return
+        path.ble_device = ble_device
+        path.rssi = rssi
+        path.last_seen = now
+
+    def record_success(self, source: str, rtt: float | None) -> None:
+        """Record a completed command round trip."""
+        if (path := self.paths.get(source)) is None:
+            return
+        path.failures = 0
+        if rtt is not None:
+            path.rtt = rtt if path.rtt is None else path.rtt + PATH_RTT_ALPHA * (rtt - path.rtt)
+
+    def record_failure(self, source: str) -> bool:
+        """Record a failed command, return True if the path has degraded."""
+        if (path := self.paths.get(source)) is None:
+            return False
+        path.failures += 1
+        return path.degraded
+
+    def best(
+        self,
+        now: float,
+        current: str | None = None,
+        load: Mapping[str, int] | None = None,
+    ) -> PathStats | None:
+        """Return the path to use."""
+        load = load or {}
+        candidates = [
+            path
+            for path in self.paths.values()
+            if now - path.last_seen < PATH_STALE or path.source == current
+        ]
+        if not candidates:
+            return None
+        best = max(candidates, key=lambda path: path.score(load.get(path.source, 0)))
+        if (
+            current is not None
+            and best.source != current
+            and (active := self.paths.get(current)) is not None
+            and not active.degraded
+            and best.score(load.get(best.source, 0))
+            < active.score(load.get(current, 0)) + PATH_SWITCH_MARGIN
+        ):
+            return active
+        return best
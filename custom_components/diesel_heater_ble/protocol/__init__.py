@@ -0,0 +1,91 @@
+"""Standalone diesel heater BLE protocol library.
+
+Everything in this package is independent of Home Assistant; only the
+BLE client needs bleak, and it is imported on first use so the codec,
+reassembler and simulator import in milliseconds.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from .archive import (
+    ArchiveError,
+    ArchiveReader,
+    ArchiveWriter,
+    archive_sink,
+    read_archive,
+    write_archive,
+)
+from .capabilities import Capabilities, probe_capabilities
+from .coalescer import WriteCoalescer
+from .codec import (
+    build_command,
+    build_set_level,
+    build_set_temperature,
+    calculate_checksum,
+    encode_state,
+    parse_response,
+)
+from .frames import (
+    AckFrame,
+    ErrorFrame,
+    Frame,
+    FrameRegistry,
+    StatusFrame,
+    TelemetryFrame,
+    UnknownFrame,
+    decode_frame,
+)
+from .models import HeaterState
+from .multiplexer import HeaterMultiplexer, MultiplexedClient
+from .plan import CommandPlan, PlanResult, PlanStage
+from .reassembler import FrameReassembler
+from .simulator import SimulatedClient, SimulatedHeater
+
+if TYPE_CHECKING:
+    from .client import DieselHeaterBLEClient
+
+__all__ = [
+    "AckFrame",
+    "ArchiveError",
+    "ArchiveReader",
+    "ArchiveWriter",
+    "Capabilities",
+    "CommandPlan",
+    "DieselHeaterBLEClient",
+    "ErrorFrame",
+    "Frame",
+    "FrameRegistry",
+    "FrameReassembler",
+    "HeaterMultiplexer",
+    "HeaterState",
+    "MultiplexedClient",
+    "PlanResult",
+    "PlanStage",
+    "SimulatedClient",
+    "SimulatedHeater",
+    "StatusFrame",
+    "TelemetryFrame",
+    "UnknownFrame",
+    "WriteCoalescer",
+    "archive_sink",
+    "build_command",
+    "build_set_level",
+    "build_set_temperature",
+    "calculate_checksum",
+    "decode_frame",
+    "encode_state",
+    "parse_response",
+    "probe_capabilities",
+    "read_archive",
+    "write_archive",
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the bleak-backed client lazily."""
+    if name == "DieselHeaterBLEClient":
+        from .client import DieselHeaterBLEClient
+
+        return DieselHeaterBLEClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
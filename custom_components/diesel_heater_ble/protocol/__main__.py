@@ -0,0 +1,6 @@
+"""Run the diesel heater protocol CLI."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
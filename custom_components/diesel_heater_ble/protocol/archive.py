@@ -0,0 +1,468 @@
+"""Compact, seekable archive of raw heater frames.
+
+Consecutive status frames rarely differ in more than a byte or two, so
+an archive stores each frame as the XOR with the one before it, run-length
+coded, and a frame identical to its predecessor that arrives after the
+same interval as the previous one costs nothing but a repeat count.
+Timestamps are counted in ticks of the archive's resolution, 100 ms by
+default so that the jitter of a poll does not cost space, and stored as
+the change of the interval, which is zero while polling is regular.
+Frames are grouped in blocks that start with a full keyframe and are
+zlib-compressed on their own, so any block decodes without the ones
+before it.
+
+File layout, integers big-endian:
+
+    header   "DHAR", version u8, frame length u8, tick ms u16
+    block    "BK", first tick u64, last tick u64, frames u32, size u32, data
+    index    "IX", blocks u32, (first tick u64, last tick u64, offset u64) each
+    trailer  index offset u64, "DHAX"
+
+The index is written on close and lets a reader find the block holding a
+timestamp by bisection. An archive that was not closed, such as after a
+crash, has no index; it is rebuilt by walking the block headers, and a
+writer reopening the file drops a torn last block and appends after the
+last complete one.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from bisect import bisect_left
+from collections.abc import Generator, Iterable, Iterator
+from typing import BinaryIO
+
+from .codec import parse_response
+from .const import (
+    ARCHIVE_BLOCK_FRAMES,
+    ARCHIVE_COMPRESSION,
+    ARCHIVE_MAGIC,
+    ARCHIVE_TICK,
+    ARCHIVE_VERSION,
+    RESPONSE_LENGTH,
+)
+from .models import HeaterState
+
+_HEADER = struct.Struct(">4sBBH")
+_BLOCK = struct.Struct(">2sQQII")
+_INDEX = struct.Struct(">2sI")
+_ENTRY = struct.Struct(">QQQ")
+_TRAILER = struct.Struct(">Q4s")
+_BLOCK_MAGIC = b"BK"
+_INDEX_MAGIC = b"IX"
+_TRAILER_MAGIC = b"DHAX"
+
+# Record tags inside a block
+_KEY = 0  # Full frame, only first in a block
+_DELTA = 1  # Interval change, then the XOR with the previous frame
+_REPEAT = 2  # Count of frames equal to the previous one, at the same interval
+
+_MAX_RUN = 15  # Zero bytes or literals per RLE control byte, one nibble each
+
+
+class ArchiveError(ValueError):
+    """Raised for a file that is not a readable frame archive."""
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    """Append an unsigned LEB128 integer."""
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data: bytes, pos: int) -> tuple[int, int]:
+    """Read an unsigned LEB128 integer, return it and the next position."""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _zigzag(value: int) -> int:
+    """Map a signed integer to an unsigned one, small magnitudes first."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    """Invert _zigzag."""
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _put_xor(out: bytearray, previous: bytes, frame: bytes) -> None:
+    """Append the XOR of two frames as runs of zero bytes and literals.
+
+    Each control byte holds a count of zero bytes in the high nibble and a
+    count of literal bytes following it in the low nibble.
+    """
+    diff = bytes(a ^ b for a, b in zip(previous, frame))
+    pos, length = 0, len(diff)
+    while pos < length:
+        zeros = 0
+        while pos < length and zeros < _MAX_RUN and not diff[pos]:
+            zeros += 1
+            pos += 1
+        start = pos
+        while pos < length and pos - start < _MAX_RUN and diff[pos]:
+            pos += 1
+        out.append(zeros << 4 | pos - start)
+        out += diff[start:pos]
+
+
+def _get_xor(data: bytes, pos: int, previous: bytes) -> tuple[bytes, int]:
+    """Apply a run-length coded XOR to previous, return the frame and position."""
+    frame = bytearray(previous)
+    index, length = 0, len(previous)
+    while index < length:
+        control = data[pos]
+        pos += 1
+        index += control >> 4
+        for _ in range(control & 0x0F):
+            frame[index] ^= data[pos]
+            index += 1
+            pos += 1
+    return bytes(frame), pos
+
+
+class ArchiveWriter:
+    """Append timestamped frames to an archive.
+
+    Frames must come in non-decreasing time order and have the archive's
+    frame length. A block is written to the file once it holds
+    block_frames frames; close writes the open block and the index.
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        frame_length: int = RESPONSE_LENGTH,
+        block_frames: int = ARCHIVE_BLOCK_FRAMES,
+        tick: int = ARCHIVE_TICK,
+    ) -> None:
+        """Initialize a writer on a file opened for reading and writing.
+
+        An empty file gets a new header with frame_length and tick, in
+        milliseconds; otherwise the archive is reopened for appending and
+        its own frame length and tick are used.
+        """
+        self._file = file
+        self.block_frames = block_frames
+        self._index: list[tuple[int, int, int]] = []
+        file.seek(0, os.SEEK_END)
+        if file.tell() == 0:
+            self.frame_length, self.tick = frame_length, tick
+            file.write(
+                _HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, frame_length, tick)
+            )
+        else:
+            self.frame_length, self.tick, self._index, end = _read_layout(file)
+            file.seek(end)
+            file.truncate()
+        self.frames = 0
+        self._block = bytearray()
+        self._count = 0
+        self._first = 0
+        self._last = self._index[-1][1] if self._index else 0
+        self._interval = 0
+        self._previous = b""
+        self._repeats = 0
+
+    @classmethod
+    def open(cls, path: str | os.PathLike[str], **kwargs: int) -> ArchiveWriter:
+        """Open path for appending, creating the archive if needed."""
+        file = open(path, "r+b" if os.path.exists(path) else "w+b")  # noqa: SIM115
+        try:
+            return cls(file, **kwargs)
+        except Exception:
+            file.close()
+            raise
+
+    def write(self, timestamp: float, frame: bytes) -> None:
+        """Add a frame received at Unix time timestamp."""
+        if len(frame) != self.frame_length:
+            raise ValueError(
+                f"Frame is {len(frame)} bytes, archive holds {self.frame_length}"
+            )
+        when = round(timestamp * 1000 / self.tick)
+        if when < self._last:
+            raise ValueError("Frames must be written in time order")
+
+        if not self._count:
+            self._block.append(_KEY)
+            self._block += frame
+            self._first = when
+            self._interval = 0
+        else:
+            interval = when - self._last
+            if frame == self._previous and interval == self._interval:
+                self._repeats += 1
+            else:
+                self._flush_repeats()
+                self._block.append(_DELTA)
+                _put_varint(self._block, _zigzag(interval - self._interval))
+                _put_xor(self._block, self._previous, frame)
+                self._interval = interval
+        self._last = when
+        self._previous = bytes(frame)
+        self._count += 1
+        self.frames += 1
+        if self._count >= self.block_frames:
+            self._write_block()
+
+    def _flush_repeats(self) -> None:
+        """Record the pending run of repeated frames."""
+        if self._repeats:
+            self._block.append(_REPEAT)
+            _put_varint(self._block, self._repeats)
+            self._repeats = 0
+
+    def _write_block(self) -> None:
+        """Compress the open block and write it to the file."""
+        if not self._count:
+            return
+        self._flush_repeats()
+        data = zlib.compress(bytes(self._block), ARCHIVE_COMPRESSION)
+        offset = self._file.tell()
+        self._file.write(
+            _BLOCK.pack(_BLOCK_MAGIC, self._first, self._last, self._count, len(data))
+        )
+        self._file.write(data)
+        self._index.append((self._first, self._last, offset))
+        self._block.clear()
+        self._count = 0
+
+    def flush(self) -> None:
+        """Write the open block so a crash cannot lose it.
+
+        The next frame starts a new block, so flushing often costs space.
+        """
+        self._write_block()
+        self._file.flush()
+
+    def close(self) -> None:
+        """Write the open block and the index, then close the file."""
+        if self._file.closed:
+            return
+        self._write_block()
+        offset = self._file.tell()
+        self._file.write(_INDEX.pack(_INDEX_MAGIC, len(self._index)))
+        self._file.write(b"".join(_ENTRY.pack(*entry) for entry in self._index))
+        self._file.write(_TRAILER.pack(offset, _TRAILER_MAGIC))
+        self._file.close()
+
+    def __enter__(self) -> ArchiveWriter:
+        """Return the writer."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the writer."""
+        self.close()
+
+
+def _read_layout(
+    file: BinaryIO,
+) -> tuple[int, int, list[tuple[int, int, int]], int]:
+    """Return the frame length, the tick, the block index and the end of blocks.
+
+    The index comes from the trailer when there is one; otherwise the
+    block headers are walked up to the first incomplete block.
+    """
+    file.seek(0)
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ArchiveError("File too short for an archive header")
+    magic, version, frame_length, tick = _HEADER.unpack(header)
+    if magic != ARCHIVE_MAGIC:
+        raise ArchiveError("Not a frame archive")
+    if version != ARCHIVE_VERSION:
+        raise ArchiveError(f"Unsupported archive version {version}")
+
+    size = file.seek(0, os.SEEK_END)
+    if size >= _HEADER.size + _INDEX.size + _TRAILER.size:
+        file.seek(size - _TRAILER.size)
+        offset, magic = _TRAILER.unpack(file.read(_TRAILER.size))
+        if magic == _TRAILER_MAGIC and _HEADER.size <= offset < size:
+            file.seek(offset)
+            tag, count = _INDEX.unpack(file.read(_INDEX.size))
+            if tag == _INDEX_MAGIC:
+                data = file.read(count * _ENTRY.size)
+                return frame_length, tick, list(_ENTRY.iter_unpack(data)), offset
+
+    index = []
+    offset = _HEADER.size
+    while offset + _BLOCK.size <= size:
+        file.seek(offset)
+        tag, first, last, _count, length = _BLOCK.unpack(file.read(_BLOCK.size))
+        end = offset + _BLOCK.size + length
+        if tag != _BLOCK_MAGIC or end > size:
+            break
+        index.append((first, last, offset))
+        offset = end
+    return frame_length, tick, index, offset
+
+
+class ArchiveReader:
+    """Read frames from an archive.
+
+    Finding the first block that can hold a timestamp is a bisection over
+    the last tick of each block, since frames in one tick may span several
+    blocks; only that block and the ones after it are decompressed.
+    """
+
+    def __init__(self, file: BinaryIO) -> None:
+        """Initialize a reader on a file opened for binary reading."""
+        self._file = file
+        self.frame_length, self.tick, self._index, _ = _read_layout(file)
+        self._lasts = [last for _, last, _ in self._index]
+
+    @classmethod
+    def open(cls, path: str | os.PathLike[str]) -> ArchiveReader:
+        """Open the archive at path."""
+        file = open(path, "rb")  # noqa: SIM115
+        try:
+            return cls(file)
+        except Exception:
+            file.close()
+            raise
+
+    @property
+    def blocks(self) -> int:
+        """Return the number of blocks."""
+        return len(self._index)
+
+    @property
+    def start(self) -> float | None:
+        """Return the Unix time of the first frame."""
+        return self._index[0][0] * self.tick / 1000 if self._index else None
+
+    @property
+    def end(self) -> float | None:
+        """Return the Unix time of the last frame."""
+        return self._index[-1][1] * self.tick / 1000 if self._index else None
+
+    def _block(self, offset: int) -> Iterator[tuple[int, bytes]]:
+        """Yield the timestamps in ticks and the frames of one block."""
+        self._file.seek(offset)
+        _tag, when, _last, count, length = _BLOCK.unpack(
+            self._file.read(_BLOCK.size)
+        )
+        try:
+            data = zlib.decompress(self._file.read(length))
+        except zlib.error as err:
+            raise ArchiveError(f"Corrupt block at offset {offset}") from err
+        if data[0] != _KEY:
+            raise ArchiveError(f"Block at offset {offset} has no keyframe")
+        pos = 1 + self.frame_length
+        frame = data[1:pos]
+        interval = 0
+        yield when, frame
+        emitted = 1
+        while emitted < count:
+            tag = data[pos]
+            if tag == _REPEAT:
+                repeats, pos = _get_varint(data, pos + 1)
+                for _ in range(repeats):
+                    when += interval
+                    yield when, frame
+                emitted += repeats
+                continue
+            if tag != _DELTA:
+                raise ArchiveError(f"Unknown record {tag} at offset {offset}")
+            change, pos = _get_varint(data, pos + 1)
+            interval += _unzigzag(change)
+            frame, pos = _get_xor(data, pos, frame)
+            when += interval
+            yield when, frame
+            emitted += 1
+
+    def frames(
+        self, start: float | None = None, end: float | None = None
+    ) -> Iterator[tuple[float, bytes]]:
+        """Yield (Unix time, frame) from start to end inclusive, in order."""
+        first = 0
+        if start is not None:
+            start_tick = round(start * 1000 / self.tick)
+            first = bisect_left(self._lasts, start_tick)
+        else:
+            start_tick = None
+        end_tick = None if end is None else round(end * 1000 / self.tick)
+        for block_start, _, offset in self._index[first:]:
+            if end_tick is not None and block_start > end_tick:
+                return
+            for when, frame in self._block(offset):
+                if start_tick is not None and when < start_tick:
+                    continue
+                if end_tick is not None and when > end_tick:
+                    return
+                yield when * self.tick / 1000, frame
+
+    def states(
+        self, start: float | None = None, end: float | None = None
+    ) -> Iterator[tuple[float, HeaterState]]:
+        """Yield (Unix time, state) for the status frames from start to end."""
+        for when, frame in self.frames(start, end):
+            if (state := parse_response(frame)) is not None:
+                yield when, state
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+    def __enter__(self) -> ArchiveReader:
+        """Return the reader."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the reader."""
+        self.close()
+
+
+def write_archive(
+    path: str | os.PathLike[str],
+    frames: Iterable[tuple[float, bytes]],
+    **kwargs: int,
+) -> int:
+    """Append (Unix time, frame) pairs from any iterable, return the count.
+
+    Frames are consumed one at a time, so a generator of any length is
+    archived in constant memory.
+    """
+    with ArchiveWriter.open(path, **kwargs) as writer:
+        for timestamp, frame in frames:
+            writer.write(timestamp, frame)
+        return writer.frames
+
+
+def archive_sink(
+    path: str | os.PathLike[str], **kwargs: int
+) -> Generator[None, tuple[float, bytes], None]:
+    """Return a primed generator that archives each (time, frame) sent to it.
+
+    Closing the generator closes the archive.
+    """
+
+    def sink() -> Generator[None, tuple[float, bytes], None]:
+        with ArchiveWriter.open(path, **kwargs) as writer:
+            while True:
+                timestamp, frame = yield
+                writer.write(timestamp, frame)
+
+    generator = sink()
+    next(generator)
+    return generator
+
+
+def read_archive(
+    path: str | os.PathLike[str],
+    start: float | None = None,
+    end: float | None = None,
+) -> Iterator[tuple[float, bytes]]:
+    """Yield (Unix time, frame) from the archive at path between start and end."""
+    with ArchiveReader.open(path) as reader:
+        yield from reader.frames(start, end)
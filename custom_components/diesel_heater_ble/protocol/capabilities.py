@@ -0,0 +1,189 @@
+"""Firmware capability probing for diesel heaters."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, replace
+from typing import Any, Protocol
+
+from . import codec
+from .const import (
+    CMD_GET_STATUS,
+    CMD_SET_LEVEL_MODE,
+    CMD_SET_TEMP_MODE,
+    MAX_LEVEL,
+    MAX_TEMP_C,
+    PROBE_TIMEOUT,
+)
+from .models import HeaterState
+from .plan import PlanClient, Sender
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Capabilities:
+    """What the heater firmware supports beyond the basic button protocol.
+
+    None means not probed yet. The absolute level is only probed in level
+    mode, so it may stay unknown until a later probe; the absolute
+    temperature is probed from either mode. probed records that a probe
+    ran at all, so an inconclusive one is not repeated on its own.
+    """
+
+    absolute_level: bool | None = None
+    absolute_temperature: bool | None = None
+    write_with_response: bool | None = None
+    concatenated_writes: bool | None = None  # Every command in a write is applied
+    frame_types: tuple[int, ...] = ()  # Reply type bytes seen while probing
+    probed: bool = False  # A probe ran, even if some results stayed unknown
+
+    @property
+    def complete(self) -> bool:
+        """Return True if every capability is known."""
+        return None not in (
+            self.absolute_level,
+            self.absolute_temperature,
+            self.write_with_response,
+            self.concatenated_writes,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Capabilities:
+        """Create from config entry data."""
+        return cls(
+            absolute_level=data.get("absolute_level"),
+            absolute_temperature=data.get("absolute_temperature"),
+            write_with_response=data.get("write_with_response"),
+            concatenated_writes=data.get("concatenated_writes"),
+            frame_types=tuple(data.get("frame_types", ())),
+            # Data stored before this flag existed came from a probe
+            probed=data.get("probed", bool(data)),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return config entry data."""
+        return {
+            "absolute_level": self.absolute_level,
+            "absolute_temperature": self.absolute_temperature,
+            "write_with_response": self.write_with_response,
+            "concatenated_writes": self.concatenated_writes,
+            "frame_types": list(self.frame_types),
+            "probed": self.probed,
+        }
+
+
+class ProbeClient(PlanClient, Protocol):
+    """A client that records the reply frame types it has seen."""
+
+    frame_types: set[int]
+
+
+async def _probe_setpoint(
+    send: Sender,
+    current: int,
+    maximum: int,
+    build: Callable[[int], bytes],
+    read: Callable[[HeaterState], int | None],
+) -> bool | None:
+    """Move a setpoint by one with an absolute command and put it back.
+
+    The setpoint is restored whatever the outcome. Returns None if the
+    heater does not answer or the restore does not show in its status.
+    """
+    target = current + 1 if current < maximum else current - 1
+    moved = None
+    if await send(build(target)) is not None:
+        if (state := codec.parse_response(await send(CMD_GET_STATUS))) is not None:
+            moved = read(state) == target
+    await send(build(current))
+    state = codec.parse_response(await send(CMD_GET_STATUS))
+    if state is None or read(state) != current:
+        _LOGGER.warning("Setpoint %s was not restored after probing", current)
+        return None
+    return moved
+
+
+async def _probe_temperature(send: Sender, state: HeaterState) -> bool | None:
+    """Probe absolute target temperatures from the heater's control mode.
+
+    A heater in level mode is switched to temperature mode for the probe
+    and back again, otherwise one kept in level mode would never be probed.
+    """
+    if (target := state.target_temperature) is not None:
+        return await _probe_setpoint(
+            send,
+            target,
+            MAX_TEMP_C,
+            codec.build_set_temperature,
+            lambda state: state.target_temperature,
+        )
+    if (level := state.level) is None:
+        return None
+
+    supported = None
+    if await send(CMD_SET_TEMP_MODE) is not None:
+        state = codec.parse_response(await send(CMD_GET_STATUS))
+        if state is not None and state.target_temperature is not None:
+            supported = await _probe_temperature(send, state)
+    await send(CMD_SET_LEVEL_MODE)
+    state = codec.parse_response(await send(CMD_GET_STATUS))
+    if state is None or state.level != level:
+        _LOGGER.warning("Level %s was not restored after probing", level)
+        return None
+    return supported
+
+
+async def probe_capabilities(
+    client: ProbeClient, known: Capabilities | None = None
+) -> Capabilities | None:
+    """Probe the capabilities that are not known yet.
+
+    The link is held for the whole probe. A setpoint is moved by one step
+    and restored, and a heater in level mode visits temperature mode for
+    the temperature probe, so the heater ends in the state it started in.
+    A capability whose restore could not be confirmed stays unknown.
+    Concatenated writes are probed with two status requests in one write,
+    which only firmware that parses the whole write answers twice. Returns
+    None if the heater does not answer.
+    """
+    known = known or Capabilities()
+    async with client.session() as send:
+        if (state := codec.parse_response(await send(CMD_GET_STATUS))) is None:
+            return None
+
+        write_with_response = known.write_with_response
+        if write_with_response is None:
+            write_with_response = await send(CMD_GET_STATUS, response=True) is not None
+
+        concatenated_writes = known.concatenated_writes
+        if concatenated_writes is None:
+            concatenated_writes = (
+                await send(CMD_GET_STATUS * 2, timeout=PROBE_TIMEOUT) is not None
+            )
+
+        absolute_level = known.absolute_level
+        if absolute_level is None and (level := state.level) is not None:
+            absolute_level = await _probe_setpoint(
+                send,
+                level,
+                MAX_LEVEL,
+                codec.build_set_level,
+                lambda state: state.level,
+            )
+
+        absolute_temperature = known.absolute_temperature
+        if absolute_temperature is None:
+            absolute_temperature = await _probe_temperature(send, state)
+
+    capabilities = replace(
+        known,
+        absolute_level=absolute_level,
+        absolute_temperature=absolute_temperature,
+        write_with_response=write_with_response,
+        concatenated_writes=concatenated_writes,
+        frame_types=tuple(sorted(set(known.frame_types) | client.frame_types)),
+        probed=True,
+    )
+    _LOGGER.debug("Probed capabilities: %s", capabilities)
+    return capabilities
@@ -0,0 +1,482 @@
+"""Command line tool for bench and fleet testing of diesel heaters.
+
+Run it without Home Assistant through the launcher in the repository:
+
+    python scripts/heater_cli.py scan
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Protocol
+
+from . import codec
+from .archive import ArchiveError, ArchiveReader, ArchiveWriter
+from .capabilities import probe_capabilities
+from .const import (
+    CMD_GET_STATUS,
+    CMD_PRESS_DOWN,
+    CMD_PRESS_UP,
+    CMD_SET_CELSIUS,
+    CMD_SET_FAHRENHEIT,
+    CMD_SET_FAN_MODE,
+    CMD_SET_LEVEL_MODE,
+    CMD_SET_TEMP_MODE,
+    CMD_TOGGLE_PLATEAU_MODE,
+    CMD_TOGGLE_POWER,
+    SERVICE_UUID,
+)
+from .multiplexer import HeaterMultiplexer, MultiplexedClient
+from .plan import temperature_plan
+from .simulator import SimulatedClient, SimulatedHeater
+
+COMMANDS = {
+    "status": CMD_GET_STATUS,
+    "power": CMD_TOGGLE_POWER,
+    "up": CMD_PRESS_UP,
+    "down": CMD_PRESS_DOWN,
+    "fan": CMD_SET_FAN_MODE,
+    "plateau": CMD_TOGGLE_PLATEAU_MODE,
+    "celsius": CMD_SET_CELSIUS,
+    "fahrenheit": CMD_SET_FAHRENHEIT,
+    "level-mode": CMD_SET_LEVEL_MODE,
+    "temp-mode": CMD_SET_TEMP_MODE,
+}
+
+
+class _Client(Protocol):
+    """What the CLI needs from a client."""
+
+    address: str
+    last_rtt: float | None
+
+    async def connect(self) -> bool: ...
+
+    async def send_command(
+        self, command: bytes, wait_response: bool = True, timeout: float = 5.0
+    ) -> bytes | None: ...
+
+    async def disconnect(self) -> None: ...
+
+
+async def _open_client(address: str, timeout: float) -> _Client:
+    """Find a heater by address and return a client for it."""
+    from bleak import BleakScanner
+
+    from .client import DieselHeaterBLEClient
+
+    device = await BleakScanner.find_device_by_address(address, timeout=timeout)
+    if device is None:
+        raise SystemExit(f"Heater {address} not found")
+    return DieselHeaterBLEClient(device)
+
+
+async def _open_clients(args: argparse.Namespace) -> list[_Client]:
+    """Return clients for the addresses or simulated heaters requested."""
+    clients: list[_Client] = [
+        SimulatedClient(
+            SimulatedHeater(
+                f"SIM:{index:04d}",
+                speed=args.speed,
+                absolute_setpoints=args.absolute,
+                concatenated_writes=args.concatenated,
+            ),
+            latency=args.latency,
+        )
+        for index in range(args.simulate)
+    ]
+    clients += [MultiplexedClient(target) for target in args.socket]
+    clients += await asyncio.gather(
+        *(_open_client(address, args.timeout) for address in args.address)
+    )
+    if not clients:
+        raise SystemExit("Give at least one address, --socket or --simulate N")
+    return clients
+
+
+def _print_state(address: str, response: bytes | None) -> None:
+    """Print a decoded status frame."""
+    if (state := codec.parse_response(response)) is None:
+        print(f"{address}: no valid response")
+        return
+    print(
+        f"{address}: {state.operating_mode_text}, {state.running_state_text}, "
+        f"level/target {state.level_or_target}, {state.supply_voltage} V, "
+        f"env {state.environment_temp} °C, combustion {state.combustion_temp} °C"
+    )
+
+
+async def _scan(args: argparse.Namespace) -> int:
+    """List heaters advertising the heater service."""
+    from bleak import BleakScanner
+
+    found = await BleakScanner.discover(
+        timeout=args.timeout, service_uuids=[SERVICE_UUID], return_adv=True
+    )
+    for device, advertisement in found.values():
+        print(f"{device.address}  {advertisement.rssi:4d} dBm  {device.name or ''}")
+    return 0
+
+
+async def _poll(args: argparse.Namespace) -> int:
+    """Poll heaters at a fixed interval and print their state."""
+    clients = await _open_clients(args)
+    try:
+        for _ in range(args.count):
+            started = time.monotonic()
+            responses = await asyncio.gather(
+                *(client.send_command(CMD_GET_STATUS) for client in clients)
+            )
+            for client, response in zip(clients, responses):
+                _print_state(client.address, response)
+            await asyncio.sleep(max(args.interval - (time.monotonic() - started), 0))
+    finally:
+        await asyncio.gather(*(client.disconnect() for client in clients))
+    return 0
+
+
+async def _send(args: argparse.Namespace) -> int:
+    """Send one command to each heater."""
+    clients = await _open_clients(args)
+    try:
+        responses = await asyncio.gather(
+            *(client.send_command(COMMANDS[args.command]) for client in clients)
+        )
+        for client, response in zip(clients, responses):
+            _print_state(client.address, response)
+    finally:
+        await asyncio.gather(*(client.disconnect() for client in clients))
+    return 0
+
+
+async def _probe(args: argparse.Namespace) -> int:
+    """Probe and print firmware capabilities."""
+    clients = await _open_clients(args)
+    try:
+        results = await asyncio.gather(
+            *(probe_capabilities(client) for client in clients)
+        )
+    finally:
+        await asyncio.gather(*(client.disconnect() for client in clients))
+
+    report = {
+        client.address: None if capabilities is None else capabilities.as_dict()
+        for client, capabilities in zip(clients, results)
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    for address, capabilities in report.items():
+        if capabilities is None:
+            print(f"{address}: no valid response")
+            continue
+        print(
+            f"{address}: absolute level {capabilities['absolute_level']}, "
+            f"absolute temperature {capabilities['absolute_temperature']}, "
+            f"write with response {capabilities['write_with_response']}, "
+            f"concatenated writes {capabilities['concatenated_writes']}"
+        )
+    return 0
+
+
+async def _serve(args: argparse.Namespace) -> int:
+    """Share one heater connection on a local socket until interrupted."""
+    clients = await _open_clients(args)
+    if len(clients) != 1:
+        raise SystemExit("serve shares exactly one heater")
+    if not args.path and not args.port:
+        raise SystemExit("Give --path and/or --port to listen on")
+    client = clients[0]
+    multiplexer = HeaterMultiplexer(client, args.path, args.port, args.host)
+    await multiplexer.start()
+    print(f"Sharing {client.address}, Ctrl-C to stop")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await multiplexer.stop()
+        await client.disconnect()
+    return 0
+
+
+async def _ramp_one(client: _Client, target: int, coalesce: bool) -> dict[str, Any]:
+    """Press a heater to a target temperature and time it."""
+    if isinstance(client, MultiplexedClient):
+        raise SystemExit("ramp needs a direct connection to the heater")
+    await client.connect()
+    if coalesce:
+        capabilities = await probe_capabilities(client)
+        client.coalescer.enabled = bool(
+            capabilities is not None and capabilities.concatenated_writes
+        )
+    started = time.monotonic()
+    result = await temperature_plan(target).execute(client)
+    return {
+        "address": client.address,
+        "success": result.success,
+        "elapsed_s": time.monotonic() - started,
+        "commands": result.sent,
+        "writes": result.writes,
+        "coalesced": client.coalescer.active,
+    }
+
+
+async def _ramp(args: argparse.Namespace) -> int:
+    """Set a target temperature by pressing up or down, optionally packed."""
+    clients = await _open_clients(args)
+    try:
+        results = await asyncio.gather(
+            *(_ramp_one(client, args.temperature, args.coalesce) for client in clients)
+        )
+    finally:
+        await asyncio.gather(*(client.disconnect() for client in clients))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for result in results:
+        print(
+            f"{result['address']}: {'done' if result['success'] else 'failed'} in "
+            f"{result['elapsed_s']:.2f} s, {result['commands']} commands in "
+            f"{result['writes']} writes"
+            + ("" if result["coalesced"] else ", not coalesced")
+        )
+    return 0
+
+
+async def _record(args: argparse.Namespace) -> int:
+    """Poll one heater and append every status frame to an archive."""
+    clients = await _open_clients(args)
+    if len(clients) != 1:
+        raise SystemExit("record archives exactly one heater")
+    client = clients[0]
+    writer = ArchiveWriter.open(args.archive)
+    try:
+        polls = 0
+        while not args.count or polls < args.count:
+            started = time.monotonic()
+            response = await client.send_command(CMD_GET_STATUS)
+            if codec.parse_response(response) is not None:
+                writer.write(time.time(), response)
+            polls += 1
+            await asyncio.sleep(max(args.interval - (time.monotonic() - started), 0))
+    finally:
+        writer.close()
+        await client.disconnect()
+    print(f"Archived {writer.frames} frames of {client.address} to {args.archive}")
+    return 0
+
+
+def _timestamp(value: str) -> float:
+    """Parse a Unix timestamp or an ISO 8601 date and time."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+async def _dump(args: argparse.Namespace) -> int:
+    """Print the frames of an archive between two times."""
+    try:
+        with ArchiveReader.open(args.archive) as reader:
+            for when, frame in reader.frames(args.start, args.end):
+                stamp = datetime.fromtimestamp(when).isoformat(timespec="milliseconds")
+                if args.raw:
+                    print(f"{stamp}  {frame.hex()}")
+                else:
+                    _print_state(stamp, frame)
+    except BrokenPipeError:
+        raise
+    except (OSError, ArchiveError) as err:
+        raise SystemExit(f"Cannot read {args.archive}: {err}") from err
+    return 0
+
+
+async def _bench_one(client: _Client, count: int) -> dict[str, Any]:
+    """Send count status requests back to back and collect round trips."""
+    rtts: list[float] = []
+    failures = 0
+    started = time.monotonic()
+    for _ in range(count):
+        response = await client.send_command(CMD_GET_STATUS)
+        if response is None or client.last_rtt is None:
+            failures += 1
+        else:
+            rtts.append(client.last_rtt)
+    elapsed = time.monotonic() - started
+    result: dict[str, Any] = {
+        "address": client.address,
+        "frames": len(rtts),
+        "failures": failures,
+        "frames_per_second": len(rtts) / elapsed if elapsed else 0.0,
+    }
+    if rtts:
+        rtts.sort()
+        result |= {
+            "rtt_p50_ms": statistics.median(rtts) * 1000,
+            "rtt_p95_ms": rtts[int(0.95 * (len(rtts) - 1))] * 1000,
+            "rtt_max_ms": rtts[-1] * 1000,
+        }
+    return result
+
+
+async def _bench(args: argparse.Namespace) -> int:
+    """Benchmark round-trip time and throughput against all heaters at once."""
+    clients = await _open_clients(args)
+    try:
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(_bench_one(client, args.count) for client in clients)
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        await asyncio.gather(*(client.disconnect() for client in clients))
+
+    report = {
+        "heaters": results,
+        "total_frames": sum(result["frames"] for result in results),
+        "total_frames_per_second": sum(result["frames"] for result in results) / elapsed,
+        "elapsed_s": elapsed,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    for result in results:
+        print(
+            f"{result['address']}: {result['frames']} frames, "
+            f"{result['failures']} failures, {result['frames_per_second']:.1f}/s, "
+            f"p50 {result.get('rtt_p50_ms', 0):.1f} ms, "
+            f"p95 {result.get('rtt_p95_ms', 0):.1f} ms"
+        )
+    print(
+        f"total: {report['total_frames']} frames in {elapsed:.2f} s "
+        f"({report['total_frames_per_second']:.1f}/s)"
+    )
+    return 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="heater_cli", description="Diesel heater BLE bench tool"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    scan = subparsers.add_parser("scan", help="list nearby heaters")
+    scan.add_argument("--timeout", type=float, default=5.0)
+    scan.set_defaults(handler=_scan)
+
+    targets = argparse.ArgumentParser(add_help=False)
+    targets.add_argument("address", nargs="*", help="heater BLE addresses")
+    targets.add_argument(
+        "--simulate", type=int, default=0, metavar="N", help="add N simulated heaters"
+    )
+    targets.add_argument(
+        "--latency", type=float, default=0.03, help="simulated round trip (s)"
+    )
+    targets.add_argument(
+        "--speed", type=float, default=1.0, help="simulated start-up speed factor"
+    )
+    targets.add_argument(
+        "--absolute",
+        action="store_true",
+        help="simulated heaters accept absolute setpoints",
+    )
+    targets.add_argument(
+        "--concatenated",
+        action="store_true",
+        help="simulated heaters accept several commands per write",
+    )
+    targets.add_argument(
+        "--socket",
+        action="append",
+        default=[],
+        metavar="TARGET",
+        help="heater shared by a multiplexer, a socket path or host:port",
+    )
+    targets.add_argument(
+        "--timeout",
+        type=float,
+        default=10.0,
+        help="seconds to search for each --address heater before giving up",
+    )
+
+    poll = subparsers.add_parser("poll", parents=[targets], help="poll status")
+    poll.add_argument("--interval", type=float, default=2.5)
+    poll.add_argument("--count", type=int, default=10)
+    poll.set_defaults(handler=_poll)
+
+    send = subparsers.add_parser("send", parents=[targets], help="send a command")
+    send.add_argument("--command", choices=sorted(COMMANDS), required=True)
+    send.set_defaults(handler=_send)
+
+    probe = subparsers.add_parser(
+        "probe", parents=[targets], help="probe firmware capabilities"
+    )
+    probe.add_argument("--json", action="store_true", help="machine-readable output")
+    probe.set_defaults(handler=_probe)
+
+    serve = subparsers.add_parser(
+        "serve", parents=[targets], help="share a heater connection on a local socket"
+    )
+    serve.add_argument("--path", help="UNIX socket path")
+    serve.add_argument("--port", type=int, help="TCP port")
+    serve.add_argument("--host", default="127.0.0.1", help="TCP address to bind")
+    serve.set_defaults(handler=_serve)
+
+    ramp = subparsers.add_parser(
+        "ramp", parents=[targets], help="press to a target temperature and time it"
+    )
+    ramp.add_argument("--temperature", type=int, required=True)
+    ramp.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="pack presses into few writes if the firmware accepts it",
+    )
+    ramp.add_argument("--json", action="store_true", help="machine-readable output")
+    ramp.set_defaults(handler=_ramp)
+
+    record = subparsers.add_parser(
+        "record", parents=[targets], help="archive status frames to a file"
+    )
+    record.add_argument("--archive", required=True, help="archive file to append to")
+    record.add_argument("--interval", type=float, default=2.5)
+    record.add_argument("--count", type=int, default=0, help="polls, 0 for no limit")
+    record.set_defaults(handler=_record)
+
+    dump = subparsers.add_parser("dump", help="print frames from an archive")
+    dump.add_argument("archive", help="archive file")
+    dump.add_argument("--start", type=_timestamp, help="Unix time or ISO 8601")
+    dump.add_argument("--end", type=_timestamp, help="Unix time or ISO 8601")
+    dump.add_argument("--raw", action="store_true", help="print frames as hex")
+    dump.set_defaults(handler=_dump)
+
+    bench = subparsers.add_parser(
+        "bench", parents=[targets], help="measure round trip time and throughput"
+    )
+    bench.add_argument("--count", type=int, default=100)
+    bench.add_argument("--json", action="store_true", help="machine-readable output")
+    bench.set_defaults(handler=_bench)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the CLI."""
+    args = _parser().parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    try:
+        return asyncio.run(args.handler(args))
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # Output piped into a command that quit early, such as head; point
+        # stdout at devnull so the interpreter does not fail flushing it
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
@@ -0,0 +1,292 @@
+"""BLE client for diesel heater communication."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+from bleak import BleakClient
+from bleak.exc import BleakError
+
+from . import codec
+from .coalescer import WriteCoalescer
+from .const import (
+    COMMAND_LENGTH,
+    CONNECT_LATENCY_ALPHA,
+    NOTIFY_CHARACTERISTIC_UUID,
+    WRITE_CHARACTERISTIC_UUID,
+)
+from .frames import (
+    AckFrame,
+    ErrorFrame,
+    Frame,
+    StatusFrame,
+    UnknownFrame,
+    decode_frame,
+)
+from .models import HeaterState
+from .plan import Sender
+from .reassembler import FrameReassembler
+
+if TYPE_CHECKING:
+    from bleak.backends.device import BLEDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DieselHeaterBLEClient:
+    """BLE client for communicating with diesel heater."""
+
+    def __init__(self, ble_device: BLEDevice) -> None:
+        """Initialize the BLE client."""
+        self._ble_device = ble_device
+        self._client: BleakClient | None = None
+        self._response_data: bytes | None = None
+        self._response_event = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._reassembler = FrameReassembler()
+        self._waiting = False
+        self._expected = 0  # Status replies still due for the current write
+        self._rejected = False  # An error frame ended the current wait
+        self._callbacks: list[Callable[[Frame], None]] = []
+        self._monitors: list[Callable[[Frame], None]] = []
+        self._connecting: asyncio.Task[bool] | None = None
+        self.last_rtt: float | None = None
+        self.connect_latency: float | None = None  # Moving average, seconds
+        self.last_activity: float | None = None  # Monotonic time of the last write
+        self.last_ack: AckFrame | None = None
+        self.last_error: ErrorFrame | None = None
+        self.frame_types: set[int] = set()  # Reply type bytes seen
+        self.write_with_response = False
+        self.coalescer = WriteCoalescer()
+
+    @property
+    def address(self) -> str:
+        """Return BLE device address."""
+        return self._ble_device.address
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if connected."""
+        return self._client is not None and self._client.is_connected
+
+    def set_ble_device(self, ble_device: BLEDevice) -> None:
+        """Update BLE device reference without disconnecting."""
+        self._ble_device = ble_device
+
+    async def connect(self) -> bool:
+        """Connect to the heater.
+
+        Concurrent calls share one attempt, so a pre-connect in progress and
+        a command arriving meanwhile do not open two connections.
+        """
+        if self.is_connected:
+            return True
+        if self._connecting is None:
+            self._connecting = asyncio.create_task(self._connect())
+            self._connecting.add_done_callback(self._connect_done)
+        return await asyncio.shield(self._connecting)
+
+    def _connect_done(self, task: asyncio.Task[bool]) -> None:
+        """Forget a finished connection attempt."""
+        if self._connecting is task:
+            self._connecting = None
+
+    async def _connect(self) -> bool:
+        """Open the connection and subscribe to notifications."""
+        started = time.monotonic()
+        try:
+            self._client = BleakClient(
+                self._ble_device,
+                disconnected_callback=self._on_disconnect,
+            )
+            await self._client.connect()
+
+            # Subscribe to notifications
+            await self._client.start_notify(
+                NOTIFY_CHARACTERISTIC_UUID,
+                self._notification_handler,
+            )
+
+            self.coalescer.connected(self._client.mtu_size)
+            elapsed = time.monotonic() - started
+            if self.connect_latency is None:
+                self.connect_latency = elapsed
+            else:
+                self.connect_latency += CONNECT_LATENCY_ALPHA * (
+                    elapsed - self.connect_latency
+                )
+            _LOGGER.debug("Connected to %s in %.2f s", self.address, elapsed)
+            return True
+        except BleakError as err:
+            _LOGGER.error("Failed to connect to %s: %s", self.address, err)
+            self._client = None
+            return False
+
+    async def disconnect(self) -> None:
+        """Disconnect from the heater, cancelling a connection attempt."""
+        if (connecting := self._connecting) is not None:
+            connecting.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await connecting
+        if self._client is not None:
+            try:
+                await self._client.disconnect()
+            except BleakError as err:
+                _LOGGER.debug("Error during disconnect: %s", err)
+            finally:
+                self._client = None
+
+    def _on_disconnect(self, client: BleakClient) -> None:
+        """Handle disconnection."""
+        _LOGGER.debug("Disconnected from %s", self.address)
+        self._client = None
+
+    def _notification_handler(
+        self, sender: int, data: bytearray  # noqa: ARG002
+    ) -> None:
+        """Handle notification data from heater."""
+        _LOGGER.debug("Received notification: %s", data.hex())
+        for raw in self._reassembler.feed(data):
+            self._dispatch(decode_frame(raw))
+
+    def _dispatch(self, frame: Frame) -> None:
+        """Route a decoded frame.
+
+        Status frames answer the waiting command, error frames fail it
+        without waiting for the timeout, and acks are recorded. Everything
+        else, including status frames nobody waits for, goes to the frame
+        callbacks.
+        """
+        if isinstance(frame, UnknownFrame):
+            _LOGGER.debug("Ignoring unknown frame: %s", frame.raw.hex())
+            return
+        self.frame_types.add(frame.raw[3])
+        for monitor in self._monitors:
+            monitor(frame)
+        if self._waiting:
+            if isinstance(frame, StatusFrame):
+                self._response_data = frame.raw
+                self._expected -= 1
+                if self._expected <= 0:
+                    self._response_event.set()
+                return
+            if isinstance(frame, ErrorFrame):
+                _LOGGER.warning("Command %02x rejected: %02x", frame.code, frame.reason)
+                self.last_error = frame
+                self._rejected = True
+                self._response_event.set()
+                return
+        if isinstance(frame, AckFrame):
+            self.last_ack = frame
+            return
+        for callback in self._callbacks:
+            callback(frame)
+
+    def register_callback(self, callback: Callable[[Frame], None]) -> Callable[[], None]:
+        """Register a callback for unsolicited frames, return a callback to remove it."""
+        self._callbacks.append(callback)
+        return lambda: self._callbacks.remove(callback)
+
+    def register_monitor(self, monitor: Callable[[Frame], None]) -> Callable[[], None]:
+        """Register a callback for every decoded frame, return a callback to remove it.
+
+        Unlike frame callbacks, monitors also see the replies to commands.
+        """
+        self._monitors.append(monitor)
+        return lambda: self._monitors.remove(monitor)
+
+    async def send_command(
+        self,
+        command: bytes,
+        wait_response: bool = True,
+        timeout: float = 5.0,
+        response: bool | None = None,
+    ) -> bytes | None:
+        """Send a command and optionally wait for response.
+
+        command may be several commands back to back in one write; the
+        reply to the last one is returned once every one is answered.
+        response selects a GATT write with response; None uses
+        write_with_response.
+        """
+        async with self._lock:
+            return await self._send(command, wait_response, timeout, response)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Sender]:
+        """Hold the link for a sequence of commands.
+
+        Yields a send function with the signature of send_command. No other
+        command can be interleaved until the block exits.
+        """
+        async with self._lock:
+            yield self._send
+
+    async def _send(
+        self,
+        command: bytes,
+        wait_response: bool = True,
+        timeout: float = 5.0,
+        response: bool | None = None,
+    ) -> bytes | None:
+        """Send a command with the lock held."""
+        if not self.is_connected:
+            if not await self.connect():
+                return None
+
+        self._response_event.clear()
+        self._response_data = None
+        self._reassembler.reset()
+        self._waiting = wait_response
+        self._expected = max(len(command) // COMMAND_LENGTH, 1)
+        self._rejected = False
+        self.last_activity = time.monotonic()
+
+        try:
+            _LOGGER.debug("Sending command: %s", command.hex())
+            await self._client.write_gatt_char(
+                WRITE_CHARACTERISTIC_UUID,
+                command,
+                response=self.write_with_response if response is None else response,
+            )
+
+            if wait_response:
+                sent = time.monotonic()
+                try:
+                    await asyncio.wait_for(
+                        self._response_event.wait(),
+                        timeout=timeout,
+                    )
+                    self.last_rtt = time.monotonic() - sent
+                    # A status reply to an earlier command of a packed write
+                    # does not answer a write that was rejected
+                    return None if self._rejected else self._response_data
+                except asyncio.TimeoutError:
+                    _LOGGER.warning("Timeout waiting for response")
+                    return None
+            return None
+        except BleakError as err:
+            _LOGGER.error("Failed to send command: %s", err)
+            return None
+        finally:
+            self._waiting = False
+
+    @staticmethod
+    def calculate_checksum(data: bytes) -> int:
+        """Calculate checksum for command/response."""
+        return codec.calculate_checksum(data)
+
+    @staticmethod
+    def build_command(cmd_type: int, cmd_code: int, param: int = 0) -> bytes:
+        """Build a command with proper header and checksum."""
+        return codec.build_command(cmd_type, cmd_code, param)
+
+    @staticmethod
+    def parse_response(data: bytes) -> HeaterState | None:
+        """Parse a 21-byte response into HeaterState."""
+        return codec.parse_response(data)
@@ -0,0 +1,83 @@
+"""Pack consecutive heater commands into fewer GATT writes."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Sequence
+from typing import Any
+
+from .const import ATT_HEADER_SIZE, COMMAND_LENGTH, DEFAULT_MTU
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WriteCoalescer:
+    """Decide how the commands of a plan stage are split into writes.
+
+    Some firmware parses every command in a write rather than only the
+    first, so a ramp of presses fits in a handful of writes, each costing
+    one connection interval instead of one per command. Writes are packed
+    up to the negotiated MTU. The coalescer is off unless enabled, which
+    should only be done for heaters whose probe showed they accept
+    concatenated commands, and it turns itself off for the rest of the
+    connection if a packed write goes unanswered.
+    """
+
+    def __init__(self, enabled: bool = False, mtu: int = DEFAULT_MTU) -> None:
+        """Initialize the coalescer."""
+        self.enabled = enabled
+        self.mtu = mtu
+        self.failed = False
+        self.commands = 0  # Commands from pack that were answered
+        self.writes = 0  # Writes they took
+
+    @property
+    def active(self) -> bool:
+        """Return True if commands are currently packed."""
+        return self.enabled and not self.failed and self.per_write > 1
+
+    @property
+    def per_write(self) -> int:
+        """Return how many commands fit in one write."""
+        return max((self.mtu - ATT_HEADER_SIZE) // COMMAND_LENGTH, 1)
+
+    @property
+    def writes_saved(self) -> int:
+        """Return how many writes packing has saved."""
+        return self.commands - self.writes
+
+    def pack(self, commands: Sequence[bytes]) -> list[list[bytes]]:
+        """Return the commands grouped into writes, in order."""
+        size = self.per_write if self.active else 1
+        return [
+            list(commands[index : index + size])
+            for index in range(0, len(commands), size)
+        ]
+
+    def answered(self, write: Sequence[bytes]) -> None:
+        """Count a write from pack that the heater answered."""
+        self.commands += len(write)
+        self.writes += 1
+
+    def connected(self, mtu: int) -> None:
+        """Start a new connection with its negotiated MTU."""
+        self.mtu = mtu
+        self.failed = False
+
+    def fail(self) -> None:
+        """Send one command per write until the next connection."""
+        if self.active:
+            _LOGGER.warning(
+                "Packed write went unanswered, sending one command per write"
+            )
+        self.failed = True
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the packing counters."""
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "mtu": self.mtu,
+            "commands": self.commands,
+            "writes": self.writes,
+            "writes_saved": self.writes_saved,
+        }
@@ -0,0 +1,156 @@
+"""Command encoding and status frame decoding for diesel heaters."""
+from __future__ import annotations
+
+import logging
+
+from .const import (
+    CMD_LENGTH,
+    CMD_LEVEL_MODE,
+    CMD_TEMP_MODE,
+    CMD_TYPE_CONTROL,
+    RESPONSE_HEADER,
+    RESPONSE_LENGTH,
+    AltitudeUnit,
+    ControlMode,
+    OperatingMode,
+    RunningState,
+    TemperatureUnit,
+)
+from .models import HeaterState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def calculate_checksum(data: bytes) -> int:
+    """Calculate checksum for command/response."""
+    return sum(data) % 256
+
+
+def build_command(cmd_type: int, cmd_code: int, param: int = 0) -> bytes:
+    """Build a command with proper header and checksum."""
+    cmd = bytes([
+        0xBA,
+        0xAB,
+        CMD_LENGTH,
+        cmd_type,
+        cmd_code,
+        (param >> 8) & 0xFF,
+        param & 0xFF,
+    ])
+    return cmd + bytes([calculate_checksum(cmd)])
+
+
+def build_set_level(level: int) -> bytes:
+    """Build an absolute level command.
+
+    Firmware that supports it takes the level from the param field of the
+    level mode command; older firmware ignores the param and only switches
+    mode.
+    """
+    return build_command(CMD_TYPE_CONTROL, CMD_LEVEL_MODE, level)
+
+
+def build_set_temperature(temperature: int) -> bytes:
+    """Build an absolute target temperature command, see build_set_level."""
+    return build_command(CMD_TYPE_CONTROL, CMD_TEMP_MODE, temperature)
+
+
+def parse_response(data: bytes | None) -> HeaterState | None:
+    """Parse a 21-byte response into HeaterState."""
+    if data is None or len(data) < RESPONSE_LENGTH:
+        _LOGGER.warning("Invalid response length: %s", len(data) if data else 0)
+        return None
+
+    # Verify header
+    if data[:4] != RESPONSE_HEADER:
+        _LOGGER.warning("Invalid response header: %s", data[:4].hex())
+        return None
+
+    # Verify checksum
+    expected_checksum = calculate_checksum(data[:20])
+    if data[20] != expected_checksum:
+        _LOGGER.warning(
+            "Checksum mismatch: got %02x, expected %02x",
+            data[20],
+            expected_checksum,
+        )
+        # Continue anyway - some devices may have checksum issues
+
+    # Parse fields
+    try:
+        operating_mode = OperatingMode(data[4])
+    except ValueError:
+        operating_mode = OperatingMode.IDLE
+
+    try:
+        control_mode = ControlMode(data[5])
+    except ValueError:
+        control_mode = ControlMode.LEVEL
+
+    level_or_target = data[6]
+
+    try:
+        running_state = RunningState(data[7])
+    except ValueError:
+        running_state = RunningState.IDLE
+
+    auto_mode = data[8] == 1
+    supply_voltage = data[9]
+
+    try:
+        temperature_unit = TemperatureUnit(data[10])
+    except ValueError:
+        temperature_unit = TemperatureUnit.CELSIUS
+
+    environment_temp = data[11] - 30  # Convert to Celsius
+
+    # Combustion temp is big-endian 16-bit
+    combustion_temp = (data[12] << 8) | data[13]
+
+    try:
+        altitude_unit = AltitudeUnit(data[14])
+    except ValueError:
+        altitude_unit = AltitudeUnit.METERS
+
+    high_altitude_mode = data[15] == 1
+
+    # Altitude is big-endian 16-bit
+    altitude = (data[16] << 8) | data[17]
+
+    return HeaterState(
+        operating_mode=operating_mode,
+        control_mode=control_mode,
+        level_or_target=level_or_target,
+        running_state=running_state,
+        auto_mode=auto_mode,
+        supply_voltage=supply_voltage,
+        temperature_unit=temperature_unit,
+        environment_temp=environment_temp,
+        combustion_temp=combustion_temp,
+        altitude_unit=altitude_unit,
+        high_altitude_mode=high_altitude_mode,
+        altitude=altitude,
+    )
+
+
+def encode_state(state: HeaterState) -> bytes:
+    """Encode a HeaterState into a 21-byte status frame."""
+    frame = RESPONSE_HEADER + bytes([
+        state.operating_mode,
+        state.control_mode,
+        state.level_or_target & 0xFF,
+        state.running_state,
+        1 if state.auto_mode else 0,
+        state.supply_voltage & 0xFF,
+        state.temperature_unit,
+        (state.environment_temp + 30) & 0xFF,
+        (state.combustion_temp >> 8) & 0xFF,
+        state.combustion_temp & 0xFF,
+        state.altitude_unit,
+        1 if state.high_altitude_mode else 0,
+        (state.altitude >> 8) & 0xFF,
+        state.altitude & 0xFF,
+        0x00,
+        0x00,
+    ])
+    return frame + bytes([calculate_checksum(frame)])
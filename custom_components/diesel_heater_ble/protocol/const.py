@@ -0,0 +1,126 @@
+"""Protocol constants for diesel heater BLE communication."""
+from enum import IntEnum
+
+# BLE UUIDs
+SERVICE_UUID = "0000fff0-0000-1000-8000-00805f9b34fb"
+WRITE_CHARACTERISTIC_UUID = "0000fff2-0000-1000-8000-00805f9b34fb"
+NOTIFY_CHARACTERISTIC_UUID = "0000fff1-0000-1000-8000-00805f9b34fb"
+
+# Command header
+CMD_HEADER = bytes([0xBA, 0xAB])
+CMD_LENGTH = 0x04
+COMMAND_LENGTH = 8  # Bytes per command frame
+
+# Command types
+CMD_TYPE_STATUS = 0xCC
+CMD_TYPE_CONTROL = 0xBB
+
+# Control command codes
+CMD_POWER_TOGGLE = 0xA1
+CMD_UP = 0xA2
+CMD_DOWN = 0xA3
+CMD_FAN_MODE = 0xA4
+CMD_PLATEAU_MODE = 0xA5
+CMD_CELSIUS = 0xA7
+CMD_FAHRENHEIT = 0xA8
+CMD_LEVEL_MODE = 0xAC
+CMD_TEMP_MODE = 0xAD
+
+# Pre-built commands (8 bytes each)
+CMD_GET_STATUS = bytes([0xBA, 0xAB, 0x04, 0xCC, 0x00, 0x00, 0x00, 0x35])
+CMD_TOGGLE_POWER = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA1, 0x00, 0x00, 0xC5])
+CMD_PRESS_UP = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA2, 0x00, 0x00, 0xC6])
+CMD_PRESS_DOWN = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA3, 0x00, 0x00, 0xC7])
+CMD_SET_FAN_MODE = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA4, 0x00, 0x00, 0xC8])
+CMD_TOGGLE_PLATEAU_MODE = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA5, 0x00, 0x00, 0xC9])
+CMD_SET_CELSIUS = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA7, 0x00, 0x00, 0xCB])
+CMD_SET_FAHRENHEIT = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xA8, 0x00, 0x00, 0xCC])
+CMD_SET_LEVEL_MODE = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xAC, 0x00, 0x00, 0xD0])
+CMD_SET_TEMP_MODE = bytes([0xBA, 0xAB, 0x04, 0xBB, 0xAD, 0x00, 0x00, 0xD1])
+
+# Response header
+RESPONSE_HEADER = bytes([0xAB, 0xBA, 0x11, 0xCC])
+RESPONSE_LENGTH = 21
+
+# Reply frames: header, payload length, type byte, payload, checksum.
+# Status frames are sent by every heater; the others only by some variants.
+FRAME_HEADER = bytes([0xAB, 0xBA])
+FRAME_TYPE_STATUS = 0xCC
+FRAME_TYPE_ACK = 0xBB  # Echo of an accepted control command
+FRAME_TYPE_ERROR = 0xEE  # Rejected command
+FRAME_TYPE_TELEMETRY = 0xDD  # Extended measurements
+ACK_LENGTH = 8
+ERROR_LENGTH = 8
+TELEMETRY_LENGTH = 21
+
+# GATT writes
+DEFAULT_MTU = 23  # ATT MTU before negotiation
+ATT_HEADER_SIZE = 3  # Bytes of a write taken by the ATT header
+PROBE_TIMEOUT = 2.0  # Seconds to wait for the replies to a probe write
+
+# Connection timing
+CONNECT_LATENCY_ALPHA = 0.3  # Weight of the newest connect in the latency average
+
+# Local socket multiplexer
+MUX_QUEUE_SIZE = 16  # Commands queued per consumer before new ones are refused
+MUX_WRITE_LIMIT = 65536  # Bytes buffered for a consumer before frames are dropped
+
+
+class OperatingMode(IntEnum):
+    """Heater operating mode."""
+
+    IDLE = 0
+    HEATING = 1
+    COOLING = 2
+    FAN_ONLY = 4
+
+
+class ControlMode(IntEnum):
+    """Heater control mode."""
+
+    LEVEL = 0
+    TEMPERATURE = 1
+    ERROR = 0xFF
+
+
+class RunningState(IntEnum):
+    """Heater running state."""
+
+    IDLE = 0
+    COOLING = 1
+    GLOWPLUG = 3
+    HEATING = 5
+    PREHEATING = 7
+
+
+class TemperatureUnit(IntEnum):
+    """Temperature unit."""
+
+    CELSIUS = 0
+    FAHRENHEIT = 1
+
+
+class AltitudeUnit(IntEnum):
+    """Altitude unit."""
+
+    METERS = 0
+    FEET = 1
+
+
+# Polling interval in seconds
+DEFAULT_SCAN_INTERVAL = 2.5
+
+# Level range
+MIN_LEVEL = 1
+MAX_LEVEL = 6
+
+# Temperature range (Celsius)
+MIN_TEMP_C = 8
+MAX_TEMP_C = 36
+
+# Frame archive
+ARCHIVE_MAGIC = b"DHAR"
+ARCHIVE_VERSION = 1
+ARCHIVE_BLOCK_FRAMES = 4096  # Frames per block, the unit of compression and seeking
+ARCHIVE_COMPRESSION = 6  # zlib level applied to each block
+ARCHIVE_TICK = 100  # Milliseconds timestamps are rounded to
@@ -0,0 +1,170 @@
+"""Typed reply frames and the registry that decodes them."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from . import codec
+from .const import (
+    ACK_LENGTH,
+    ERROR_LENGTH,
+    FRAME_HEADER,
+    FRAME_TYPE_ACK,
+    FRAME_TYPE_ERROR,
+    FRAME_TYPE_STATUS,
+    FRAME_TYPE_TELEMETRY,
+    RESPONSE_LENGTH,
+    TELEMETRY_LENGTH,
+)
+from .models import HeaterState
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    """A reply frame from the heater."""
+
+    raw: bytes
+
+
+@dataclass(frozen=True, slots=True)
+class StatusFrame(Frame):
+    """The 21-byte status frame every heater sends."""
+
+    state: HeaterState
+
+
+@dataclass(frozen=True, slots=True)
+class AckFrame(Frame):
+    """Acknowledgement of a control command."""
+
+    code: int
+    param: int
+
+
+@dataclass(frozen=True, slots=True)
+class ErrorFrame(Frame):
+    """A control command the heater rejected."""
+
+    code: int
+    reason: int
+
+
+@dataclass(frozen=True, slots=True)
+class TelemetryFrame(Frame):
+    """Extended measurements as big-endian 16-bit words.
+
+    The meaning of each word differs between heater variants, so they are
+    kept raw.
+    """
+
+    words: tuple[int, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class UnknownFrame(Frame):
+    """Bytes that do not match a registered frame type."""
+
+
+Decoder = Callable[[bytes], Frame | None]
+
+
+@dataclass(frozen=True, slots=True)
+class FrameSpec:
+    """How to recognise and decode one frame type."""
+
+    frame_type: int
+    length: int  # Whole frame including header and checksum
+    decoder: Decoder
+
+    @property
+    def prefix(self) -> bytes:
+        """Return the header, length and type bytes that start the frame."""
+        return FRAME_HEADER + bytes([self.length - 4, self.frame_type])
+
+
+class FrameRegistry:
+    """Frame types keyed by their 4-byte prefix.
+
+    The prefix (header, payload length, type byte) is looked up in a dict
+    built at registration, so dispatch is one lookup per frame instead of
+    trying each decoder in turn.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._table: dict[bytes, FrameSpec] = {}
+
+    def register(self, frame_type: int, length: int, decoder: Decoder) -> None:
+        """Register a frame type, replacing any decoder for the same prefix."""
+        spec = FrameSpec(frame_type, length, decoder)
+        self._table[spec.prefix] = spec
+
+    def spec(self, prefix: bytes) -> FrameSpec | None:
+        """Return the spec for a frame prefix."""
+        return self._table.get(bytes(prefix[:4]))
+
+    def decode(self, data: bytes) -> Frame:
+        """Decode a complete frame."""
+        if (spec := self._table.get(bytes(data[:4]))) is None or len(data) < spec.length:
+            return UnknownFrame(bytes(data))
+        if (frame := spec.decoder(bytes(data[: spec.length]))) is None:
+            return UnknownFrame(bytes(data))
+        return frame
+
+
+def _checksum_ok(data: bytes) -> bool:
+    """Return True if the last byte is the checksum of the rest."""
+    return data[-1] == codec.calculate_checksum(data[:-1])
+
+
+def decode_status(data: bytes) -> Frame | None:
+    """Decode a status frame."""
+    if (state := codec.parse_response(data)) is None:
+        return None
+    return StatusFrame(data, state)
+
+
+def decode_ack(data: bytes) -> Frame | None:
+    """Decode an acknowledgement frame."""
+    if not _checksum_ok(data):
+        return None
+    return AckFrame(data, data[4], (data[5] << 8) | data[6])
+
+
+def decode_error(data: bytes) -> Frame | None:
+    """Decode an error frame."""
+    if not _checksum_ok(data):
+        return None
+    return ErrorFrame(data, data[4], data[5])
+
+
+def decode_telemetry(data: bytes) -> Frame | None:
+    """Decode an extended telemetry frame."""
+    if not _checksum_ok(data):
+        return None
+    payload = data[4:-1]
+    return TelemetryFrame(
+        data,
+        tuple(
+            (payload[index] << 8) | payload[index + 1]
+            for index in range(0, len(payload) - 1, 2)
+        ),
+    )
+
+
+def default_registry() -> FrameRegistry:
+    """Return a registry with the known frame types."""
+    registry = FrameRegistry()
+    registry.register(FRAME_TYPE_STATUS, RESPONSE_LENGTH, decode_status)
+    registry.register(FRAME_TYPE_ACK, ACK_LENGTH, decode_ack)
+    registry.register(FRAME_TYPE_ERROR, ERROR_LENGTH, decode_error)
+    registry.register(FRAME_TYPE_TELEMETRY, TELEMETRY_LENGTH, decode_telemetry)
+    return registry
+
+
+DEFAULT_REGISTRY = default_registry()
+
+
+def decode_frame(data: bytes) -> Frame:
+    """Decode a frame with the default registry."""
+    return DEFAULT_REGISTRY.decode(data)
@@ -0,0 +1,415 @@
+"""Share one heater connection with other local processes.
+
+The heater accepts a single BLE connection. A HeaterMultiplexer attached
+to the client holding it listens on a UNIX socket and/or a TCP port and
+lets other processes use that connection:
+
+- every decoded frame, including the replies to any consumer's commands,
+  is sent to every consumer
+- commands are queued per consumer and forwarded one at a time in
+  round-robin order, so a busy consumer cannot starve the others; each
+  forwarded command then waits for the client lock like any other
+  caller, so the owner of the connection keeps its turn as well
+
+The wire format is one JSON object per line:
+
+    -> {"id": 1, "command": "baab04cc00000035", "wait": true}
+    <- {"type": "result", "id": 1, "response": "abba11cc..."}
+    <- {"type": "frame", "frame": "abba11cc..."}
+    <- {"type": "error", "id": 1, "message": "queue full"}
+
+MultiplexedClient speaks it and can stand in for DieselHeaterBLEClient.
+
+There is no authentication: anyone who can connect can watch the heater
+and send it commands. The UNIX socket is made accessible to its owner
+only, while the TCP port is open to every local process.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from . import codec
+from .const import CMD_HEADER, COMMAND_LENGTH, MUX_QUEUE_SIZE, MUX_WRITE_LIMIT
+from .frames import Frame, decode_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MultiplexClient(Protocol):
+    """What the multiplexer needs from the client holding the connection."""
+
+    @property
+    def address(self) -> str: ...
+
+    async def send_command(
+        self, command: bytes, wait_response: bool = True, timeout: float = 5.0
+    ) -> bytes | None: ...
+
+    def register_monitor(
+        self, monitor: Callable[[Frame], None]
+    ) -> Callable[[], None]: ...
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    """Encode one message line."""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def _valid_command(command: bytes) -> bool:
+    """Return True if command is a well-formed heater command."""
+    return (
+        len(command) == COMMAND_LENGTH
+        and command.startswith(CMD_HEADER)
+        and command[-1] == codec.calculate_checksum(command[:-1])
+    )
+
+
+@dataclass(slots=True)
+class _Request:
+    """A command waiting to be forwarded."""
+
+    id: Any
+    command: bytes
+    wait: bool
+
+
+class _Consumer:
+    """One connected process."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        """Initialize the consumer."""
+        self.writer = writer
+        self.requests: deque[_Request] = deque()
+
+    def send(self, data: bytes) -> None:
+        """Write an encoded message unless the connection is closing."""
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    @property
+    def backlogged(self) -> bool:
+        """Return True if the consumer is not reading fast enough."""
+        return self.writer.transport.get_write_buffer_size() > MUX_WRITE_LIMIT
+
+
+class HeaterMultiplexer:
+    """Serve one heater connection to local consumers."""
+
+    def __init__(
+        self,
+        client: MultiplexClient,
+        path: str | None = None,
+        port: int | None = None,
+        host: str = "127.0.0.1",
+    ) -> None:
+        """Initialize the multiplexer; path and port select the listeners."""
+        self._client = client
+        self._path = path
+        self._port = port
+        self._host = host
+        self._servers: list[asyncio.Server] = []
+        self._consumers: list[_Consumer] = []
+        self._turn = 0  # Index of the consumer served next
+        self._pending = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        self._remove_monitor: Callable[[], None] | None = None
+        self.forwarded = 0
+        self.dropped_frames = 0
+
+    @property
+    def consumers(self) -> int:
+        """Return the number of connected consumers."""
+        return len(self._consumers)
+
+    async def start(self) -> None:
+        """Open the listeners, raises OSError if one cannot be opened."""
+        try:
+            if self._path:
+                self._servers.append(
+                    await asyncio.start_unix_server(self._handle, path=self._path)
+                )
+                os.chmod(self._path, 0o600)
+            if self._port:
+                self._servers.append(
+                    await asyncio.start_server(self._handle, self._host, self._port)
+                )
+        except OSError:
+            await self.stop()
+            raise
+        self._remove_monitor = self._client.register_monitor(self._on_frame)
+        self._worker = asyncio.create_task(self._run())
+        self._worker.add_done_callback(self._worker_done)
+        _LOGGER.debug(
+            "Sharing %s on %s",
+            self._client.address,
+            ", ".join(
+                str(socket.getsockname())
+                for server in self._servers
+                for socket in server.sockets
+            ),
+        )
+
+    async def stop(self) -> None:
+        """Close the listeners and disconnect every consumer."""
+        if self._remove_monitor is not None:
+            self._remove_monitor()
+            self._remove_monitor = None
+        if self._worker is not None:
+            self._worker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+        for server in self._servers:
+            server.close()
+        for consumer in self._consumers:
+            consumer.writer.close()
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+        if self._path:
+            with contextlib.suppress(OSError):
+                os.unlink(self._path)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve one consumer until it disconnects."""
+        consumer = _Consumer(writer)
+        self._consumers.append(consumer)
+        consumer.send(_encode({"type": "hello", "address": self._client.address}))
+        try:
+            while line := await reader.readline():
+                self._enqueue(consumer, line)
+        except (ConnectionError, ValueError) as err:
+            # ValueError is a line longer than the stream limit
+            _LOGGER.debug("Consumer connection lost: %s", err)
+        finally:
+            self._consumers.remove(consumer)
+            consumer.requests.clear()
+            writer.close()
+
+    def _enqueue(self, consumer: _Consumer, line: bytes) -> None:
+        """Queue a command from a consumer, or answer with an error."""
+        request_id = None
+        try:
+            message = json.loads(line)
+            request_id = message.get("id")
+            request = _Request(
+                request_id,
+                bytes.fromhex(message["command"]),
+                bool(message.get("wait", True)),
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            error = "malformed request"
+        else:
+            if not _valid_command(request.command):
+                error = "invalid command"
+            elif len(consumer.requests) >= MUX_QUEUE_SIZE:
+                error = "queue full"
+            else:
+                consumer.requests.append(request)
+                self._pending.set()
+                return
+        consumer.send(_encode({"type": "error", "id": request_id, "message": error}))
+
+    def _next_consumer(self) -> _Consumer | None:
+        """Return the next consumer in turn with a queued command."""
+        consumers = self._consumers
+        for offset in range(len(consumers)):
+            index = (self._turn + offset) % len(consumers)
+            if consumers[index].requests:
+                self._turn = index + 1
+                return consumers[index]
+        return None
+
+    async def _run(self) -> None:
+        """Forward queued commands, one per consumer in turn."""
+        while True:
+            await self._pending.wait()
+            self._pending.clear()
+            while (consumer := self._next_consumer()) is not None:
+                request = consumer.requests.popleft()
+                try:
+                    response = await self._client.send_command(
+                        request.command, request.wait
+                    )
+                except Exception as err:
+                    # One failed command must not stop serving the others
+                    _LOGGER.debug("Forwarding %s failed: %r", request.command.hex(), err)
+                    consumer.send(
+                        _encode(
+                            {
+                                "type": "error",
+                                "id": request.id,
+                                "message": f"command failed: {err!r}",
+                            }
+                        )
+                    )
+                    continue
+                self.forwarded += 1
+                consumer.send(
+                    _encode(
+                        {
+                            "type": "result",
+                            "id": request.id,
+                            "response": response.hex() if response else None,
+                        }
+                    )
+                )
+
+    def _worker_done(self, task: asyncio.Task) -> None:
+        """Log the forwarding task ending other than by stop."""
+        if not task.cancelled() and (err := task.exception()) is not None:
+            _LOGGER.error(
+                "Stopped forwarding commands for %s",
+                self._client.address,
+                exc_info=err,
+            )
+
+    def _on_frame(self, frame: Frame) -> None:
+        """Send a frame to every consumer that keeps up."""
+        if not self._consumers:
+            return
+        data = _encode({"type": "frame", "frame": frame.raw.hex()})
+        for consumer in self._consumers:
+            if consumer.backlogged:
+                self.dropped_frames += 1
+            else:
+                consumer.send(data)
+
+
+class MultiplexedClient:
+    """Use a heater through a HeaterMultiplexer in another process.
+
+    target is a UNIX socket path or host:port. Commands are answered by
+    the multiplexer; frame callbacks see every frame on the connection,
+    including the replies to other consumers' commands.
+    """
+
+    def __init__(self, target: str) -> None:
+        """Initialize the client."""
+        self._target = target
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._task: asyncio.Task | None = None
+        self._ids = itertools.count(1)
+        self._waiting: dict[int, asyncio.Future[bytes | None]] = {}
+        self._callbacks: list[Callable[[Frame], None]] = []
+        self.address = target  # Replaced by the heater address on connect
+        self.last_rtt: float | None = None
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if connected to the multiplexer."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> bool:
+        """Connect to the multiplexer."""
+        if self.is_connected:
+            return True
+        try:
+            if self._target.startswith("/") or ":" not in self._target:
+                reader, writer = await asyncio.open_unix_connection(self._target)
+            else:
+                host, port = self._target.rsplit(":", 1)
+                reader, writer = await asyncio.open_connection(host, int(port))
+            hello = json.loads(await reader.readline())
+            self.address = hello.get("address", self._target)
+        except (AttributeError, OSError, ValueError) as err:
+            _LOGGER.error("Failed to connect to %s: %s", self._target, err)
+            return False
+        self._reader, self._writer = reader, writer
+        self._task = asyncio.create_task(self._read(reader))
+        return True
+
+    async def disconnect(self) -> None:
+        """Disconnect from the multiplexer; the heater stays connected."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def register_callback(self, callback: Callable[[Frame], None]) -> Callable[[], None]:
+        """Register a callback for frames, return a callback to remove it."""
+        self._callbacks.append(callback)
+        return lambda: self._callbacks.remove(callback)
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        """Dispatch messages from the multiplexer."""
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                kind = message.get("type")
+                if kind == "frame":
+                    frame = decode_frame(bytes.fromhex(message["frame"]))
+                    for callback in self._callbacks:
+                        callback(frame)
+                    continue
+                if kind == "error":
+                    _LOGGER.warning("Multiplexer refused command: %s", message["message"])
+                future = self._waiting.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    response = message.get("response")
+                    future.set_result(bytes.fromhex(response) if response else None)
+        except (
+            AttributeError,
+            ConnectionError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as err:
+            # A message that is not a JSON object with the expected fields
+            # means a broken multiplexer, handled like a lost connection
+            _LOGGER.debug("Multiplexer connection lost: %s", err)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_result(None)
+            self._waiting.clear()
+            self._writer = None
+
+    async def send_command(
+        self,
+        command: bytes,
+        wait_response: bool = True,
+        timeout: float = 5.0,
+    ) -> bytes | None:
+        """Send a command through the multiplexer.
+
+        The timeout includes the time the command waits for its turn.
+        """
+        if not await self.connect():
+            return None
+        request_id = next(self._ids)
+        future: asyncio.Future[bytes | None] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._waiting[request_id] = future
+        self._writer.write(
+            _encode(
+                {"id": request_id, "command": command.hex(), "wait": wait_response}
+            )
+        )
+        sent = time.monotonic()
+        try:
+            response = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._waiting.pop(request_id, None)
+            _LOGGER.warning("Timeout waiting for response")
+            return None
+        self.last_rtt = time.monotonic() - sent
+        return response if wait_response else None
@@ -0,0 +1,386 @@
+"""Transactional command plans for compound heater operations."""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Protocol
+
+from . import codec
+from .const import (
+    CMD_GET_STATUS,
+    CMD_LEVEL_MODE,
+    CMD_PRESS_DOWN,
+    CMD_PRESS_UP,
+    CMD_SET_LEVEL_MODE,
+    CMD_SET_TEMP_MODE,
+    CMD_TEMP_MODE,
+    CMD_TOGGLE_PLATEAU_MODE,
+    CMD_TOGGLE_POWER,
+    CMD_TYPE_CONTROL,
+    ControlMode,
+    OperatingMode,
+)
+from .models import HeaterState
+
+if TYPE_CHECKING:
+    from .capabilities import Capabilities
+    from .coalescer import WriteCoalescer
+
+_LOGGER = logging.getLogger(__name__)
+
+Sender = Callable[..., Awaitable[bytes | None]]
+
+# Operating modes of a heater that is on; COOLING follows a power off
+_RUNNING_MODES = frozenset({OperatingMode.HEATING, OperatingMode.FAN_ONLY})
+
+_MODE_COMMANDS = {
+    ControlMode.LEVEL: CMD_SET_LEVEL_MODE,
+    ControlMode.TEMPERATURE: CMD_SET_TEMP_MODE,
+}
+
+
+class PlanClient(Protocol):
+    """A client that can hold the link for a whole plan."""
+
+    coalescer: WriteCoalescer
+
+    def session(self) -> AbstractAsyncContextManager[Sender]:
+        """Return a context manager that holds the link and yields a Sender."""
+
+
+@dataclass(frozen=True, slots=True)
+class PlanStage:
+    """Commands compiled from the last checkpoint, verified at the next one."""
+
+    name: str
+    compile: Callable[[HeaterState], Sequence[bytes]]
+    verify: Callable[[HeaterState, HeaterState], bool] | None = None  # (before, after)
+
+
+@dataclass(slots=True)
+class PlanResult:
+    """Outcome of running a plan."""
+
+    success: bool
+    state: HeaterState | None  # Last state read from the heater
+    sent: int = 0  # Commands written, including checkpoints and rollback
+    writes: int = 0  # GATT writes they took, fewer if commands were packed
+    failed_stage: str | None = None
+    rolled_back: bool = False
+    timed_out: bool = False
+
+
+@dataclass(slots=True)
+class CommandPlan:
+    """A compound operation run as one transaction on the link.
+
+    The client lock is taken once for the whole plan, so no other command
+    can land between a mode switch and the presses that follow it. The
+    heater is only read at checkpoints: once before the first stage,
+    unless the caller has a recent status, and after every stage that
+    sent something. Each stage compiles its commands from the state at
+    the previous checkpoint. If a command is lost or a checkpoint fails to
+    verify, the commands already sent are undone in reverse order and the
+    plan fails. A lost command may still have been applied, so the status
+    is read again to find out what to undo. The commands of a stage are
+    packed into as few writes as the client's coalescer allows.
+    """
+
+    name: str
+    stages: list[PlanStage] = field(default_factory=list)
+
+    def writes(self, state: HeaterState, coalescer: WriteCoalescer) -> int:
+        """Return the stage writes the plan compiles to from state.
+
+        Checkpoints are not counted. Every stage is compiled from state, so
+        a stage that follows a mode switch counts what it would send from
+        the current state.
+        """
+        per_write = coalescer.per_write if coalescer.active else 1
+        return sum(
+            -(-len(stage.compile(state)) // per_write) for stage in self.stages
+        )
+
+    async def execute(
+        self,
+        client: PlanClient,
+        timeout: float | None = None,
+        state: HeaterState | None = None,
+    ) -> PlanResult:
+        """Run the plan against a client.
+
+        timeout counts from the call, including the wait for the link. Once
+        it has passed no further stage command is written, and the commands
+        already sent are rolled back; the rollback itself is not limited.
+        state is a status read recently enough to compile the first stage
+        from, which saves the leading checkpoint.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        async with client.session() as send:
+            return await self._execute(send, client.coalescer, deadline, state)
+
+    async def _execute(
+        self,
+        send: Sender,
+        coalescer: WriteCoalescer,
+        deadline: float | None,
+        state: HeaterState | None = None,
+    ) -> PlanResult:
+        """Run the plan with the link held."""
+        result = PlanResult(False, None)
+        if deadline is not None and time.monotonic() >= deadline:
+            result.failed_stage = "checkpoint"
+            result.timed_out = True
+            return result
+        if state is None and (state := await self._checkpoint(send, result)) is None:
+            result.failed_stage = "checkpoint"
+            return result
+
+        # (command, state before its stage) for rollback
+        done: list[tuple[bytes, HeaterState]] = []
+        for stage in self.stages:
+            before = state
+            commands = stage.compile(before)
+            if not commands:
+                if stage.verify is not None and not stage.verify(before, before):
+                    result.failed_stage = stage.name
+                    break
+                continue
+
+            failed = False
+            mark = len(done)
+            for write in coalescer.pack(commands):
+                if deadline is not None and time.monotonic() >= deadline:
+                    result.timed_out = failed = True
+                    break
+                result.sent += len(write)
+                result.writes += 1
+                if await send(b"".join(write)) is None:
+                    if len(write) > 1:
+                        coalescer.fail()
+                    # The write may have been applied with its reply lost, so
+                    # undo what the status shows rather than what was answered
+                    applied = await self._applied(send, stage, commands, result)
+                    if applied is not None:
+                        done[mark:] = [
+                            (command, before) for command in commands[:applied]
+                        ]
+                    failed = True
+                    break
+                coalescer.answered(write)
+                done.extend((command, before) for command in write)
+            if not failed:
+                state = await self._checkpoint(send, result)
+                failed = state is None or (
+                    stage.verify is not None and not stage.verify(before, state)
+                )
+            if failed:
+                result.failed_stage = stage.name
+                break
+        else:
+            result.success = True
+            return result
+
+        _LOGGER.debug("Plan %s failed at %s, rolling back", self.name, result.failed_stage)
+        await self._rollback(send, done, result)
+        return result
+
+    async def _checkpoint(self, send: Sender, result: PlanResult) -> HeaterState | None:
+        """Read and record the heater state."""
+        result.sent += 1
+        result.writes += 1
+        state = codec.parse_response(await send(CMD_GET_STATUS))
+        if state is not None:
+            result.state = state
+        return state
+
+    async def _applied(
+        self,
+        send: Sender,
+        stage: PlanStage,
+        commands: Sequence[bytes],
+        result: PlanResult,
+    ) -> int | None:
+        """Return how many of a stage's commands a fresh status shows applied.
+
+        The stage compiles what is still missing from the current state; the
+        rest of its commands took effect. None if the heater does not answer.
+        """
+        if (state := await self._checkpoint(send, result)) is None:
+            return None
+        return max(len(commands) - len(stage.compile(state)), 0)
+
+    async def _rollback(
+        self,
+        send: Sender,
+        done: list[tuple[bytes, HeaterState]],
+        result: PlanResult,
+    ) -> None:
+        """Undo sent commands in reverse order, best effort."""
+        undone = False
+        for command, before in reversed(done):
+            if (inverse := _inverse(command, before)) is None:
+                _LOGGER.debug("Plan %s: %s cannot be undone", self.name, command.hex())
+                continue
+            result.sent += 1
+            result.writes += 1
+            if await send(inverse) is None:
+                break
+            undone = True
+        result.rolled_back = undone
+        if undone:
+            await self._checkpoint(send, result)
+
+
+def _inverse(command: bytes, before: HeaterState) -> bytes | None:
+    """Return the command that undoes command, given the state before it."""
+    if command == CMD_PRESS_UP:
+        return CMD_PRESS_DOWN
+    if command == CMD_PRESS_DOWN:
+        return CMD_PRESS_UP
+    if command == CMD_TOGGLE_PLATEAU_MODE:
+        return command
+    if command[3] == CMD_TYPE_CONTROL and command[4] in (CMD_LEVEL_MODE, CMD_TEMP_MODE):
+        if command[5] or command[6]:  # Absolute setpoint, restore the previous one
+            if command[4] == CMD_LEVEL_MODE and before.level is not None:
+                return codec.build_set_level(before.level)
+            if command[4] == CMD_TEMP_MODE and before.target_temperature is not None:
+                return codec.build_set_temperature(before.target_temperature)
+        return _MODE_COMMANDS.get(before.control_mode)
+    return None
+
+
+def _running(state: HeaterState) -> bool:
+    """Return True if the heater is on, counting a cooldown as off."""
+    return state.operating_mode in _RUNNING_MODES
+
+
+def _presses(delta: int) -> list[bytes]:
+    """Return the presses that move a setting by delta."""
+    return [CMD_PRESS_UP if delta > 0 else CMD_PRESS_DOWN] * abs(delta)
+
+
+def command_stage(name: str, command: bytes) -> PlanStage:
+    """Return a stage that sends one command unconditionally."""
+    return PlanStage(name, lambda state: [command])
+
+
+def power_stage(on: bool) -> PlanStage:
+    """Return a stage that turns the heater on or off.
+
+    A heater that is cooling down is already off, and turning it on
+    restarts it. The power toggle is never rolled back: toggling again
+    could restart a heater that was switched off.
+    """
+    return PlanStage(
+        "power",
+        lambda state: [] if _running(state) == on else [CMD_TOGGLE_POWER],
+        lambda before, after: _running(after) == on,
+    )
+
+
+def mode_stage(mode: ControlMode) -> PlanStage:
+    """Return a stage that switches to level or temperature control."""
+    return PlanStage(
+        "mode",
+        lambda state: [] if state.control_mode == mode else [_MODE_COMMANDS[mode]],
+        lambda before, after: after.control_mode == mode,
+    )
+
+
+def level_stage(target: int) -> PlanStage:
+    """Return a stage that presses up or down to a level."""
+    return PlanStage(
+        "level",
+        lambda state: [] if state.level is None else _presses(target - state.level),
+        lambda before, after: after.level == target,
+    )
+
+
+def temperature_stage(target: int) -> PlanStage:
+    """Return a stage that presses up or down to a target temperature."""
+    return PlanStage(
+        "temperature",
+        lambda state: (
+            []
+            if state.target_temperature is None
+            else _presses(target - state.target_temperature)
+        ),
+        lambda before, after: after.target_temperature == target,
+    )
+
+
+def plateau_stage(enabled: bool) -> PlanStage:
+    """Return a stage that sets high altitude mode."""
+    return PlanStage(
+        "plateau",
+        lambda state: (
+            [] if state.high_altitude_mode == enabled else [CMD_TOGGLE_PLATEAU_MODE]
+        ),
+        lambda before, after: after.high_altitude_mode == enabled,
+    )
+
+
+def absolute_level_stage(target: int) -> PlanStage:
+    """Return a stage that sets mode and level with one absolute command."""
+    return PlanStage(
+        "level",
+        lambda state: [] if state.level == target else [codec.build_set_level(target)],
+        lambda before, after: after.level == target,
+    )
+
+
+def absolute_temperature_stage(target: int) -> PlanStage:
+    """Return a stage that sets mode and target with one absolute command."""
+    return PlanStage(
+        "temperature",
+        lambda state: (
+            []
+            if state.target_temperature == target
+            else [codec.build_set_temperature(target)]
+        ),
+        lambda before, after: after.target_temperature == target,
+    )
+
+
+def level_plan(target: int, capabilities: Capabilities | None = None) -> CommandPlan:
+    """Return a plan that switches to level mode and sets a level.
+
+    Firmware with absolute setpoints takes one command, otherwise the
+    level is reached by pressing up or down.
+    """
+    if capabilities is not None and capabilities.absolute_level:
+        return CommandPlan("level", [absolute_level_stage(target)])
+    return CommandPlan("level", [mode_stage(ControlMode.LEVEL), level_stage(target)])
+
+
+def temperature_plan(
+    target: int, capabilities: Capabilities | None = None
+) -> CommandPlan:
+    """Return a plan that switches to temperature mode and sets a target."""
+    if capabilities is not None and capabilities.absolute_temperature:
+        return CommandPlan("temperature", [absolute_temperature_stage(target)])
+    return CommandPlan(
+        "temperature",
+        [mode_stage(ControlMode.TEMPERATURE), temperature_stage(target)],
+    )
+
+
+def start_plan(
+    level: int | None = None,
+    temperature: int | None = None,
+    plateau: bool | None = None,
+    capabilities: Capabilities | None = None,
+) -> CommandPlan:
+    """Return a plan that turns the heater on and applies its settings."""
+    plan = CommandPlan("start", [power_stage(True)])
+    if level is not None:
+        plan.stages += level_plan(level, capabilities).stages
+    elif temperature is not None:
+        plan.stages += temperature_plan(temperature, capabilities).stages
+    if plateau is not None:
+        plan.stages.append(plateau_stage(plateau))
+    return plan
@@ -0,0 +1,72 @@
+"""Reassembly of notification chunks into complete frames."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+from .const import FRAME_HEADER
+from .frames import DEFAULT_REGISTRY, FrameRegistry
+
+
+class FrameReassembler:
+    """Rebuild reply frames from BLE notifications.
+
+    With the default 23-byte ATT MTU a 21-byte status frame can arrive
+    split across notifications, and some adapters deliver two frames in
+    one. Bytes from a registered frame prefix on are buffered until the
+    frame is complete, using the length of its type in the registry.
+    Bytes that are not part of a registered frame are passed through
+    unchanged, so other replies still reach the caller.
+    """
+
+    def __init__(self, registry: FrameRegistry = DEFAULT_REGISTRY) -> None:
+        """Initialize the reassembler."""
+        self._registry = registry
+        self._buffer = bytearray()
+
+    def reset(self) -> None:
+        """Drop any partial frame."""
+        self._buffer.clear()
+
+    def _find(self, start: int = 0, end: int | None = None) -> int:
+        """Return the offset of the next frame start before end, or -1.
+
+        A header too close to the end of the buffer to check its prefix
+        counts as a frame start until more bytes arrive.
+        """
+        buffer = self._buffer
+        end = len(buffer) if end is None else min(end, len(buffer))
+        while 0 <= (index := buffer.find(FRAME_HEADER, start)) < end:
+            if len(buffer) - index < 4 or self._registry.spec(buffer[index : index + 4]):
+                return index
+            start = index + 1
+        # First header byte at the very end
+        last = len(buffer) - 1
+        if start <= last < end and buffer[last] == FRAME_HEADER[0]:
+            return last
+        return -1
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """Add notification bytes and yield every complete frame."""
+        buffer = self._buffer
+        buffer += data
+        while buffer:
+            start = self._find()
+            if start != 0:
+                end = len(buffer) if start < 0 else start
+                chunk = bytes(buffer[:end])
+                del buffer[:end]
+                yield chunk
+                continue
+            if len(buffer) < 4:
+                return
+            length = self._registry.spec(buffer[:4]).length
+            # A new prefix inside a partial frame means the rest was lost
+            restart = self._find(1, length)
+            if 0 < restart < length and len(buffer) - restart >= 4:
+                del buffer[:restart]
+                continue
+            if len(buffer) < length:
+                return
+            frame = bytes(buffer[:length])
+            del buffer[:length]
+            yield frame
@@ -0,0 +1,295 @@
+"""In-process simulated diesel heater for benches and tests."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+from . import codec
+from .const import (
+    CMD_CELSIUS,
+    CMD_DOWN,
+    CMD_FAHRENHEIT,
+    CMD_FAN_MODE,
+    CMD_LEVEL_MODE,
+    CMD_PLATEAU_MODE,
+    CMD_POWER_TOGGLE,
+    CMD_TEMP_MODE,
+    CMD_TYPE_CONTROL,
+    CMD_TYPE_STATUS,
+    CMD_UP,
+    COMMAND_LENGTH,
+    MAX_LEVEL,
+    MAX_TEMP_C,
+    MIN_LEVEL,
+    MIN_TEMP_C,
+    AltitudeUnit,
+    ControlMode,
+    OperatingMode,
+    RunningState,
+    TemperatureUnit,
+)
+from .coalescer import WriteCoalescer
+from .frames import Frame, decode_frame
+from .models import HeaterState
+from .plan import Sender
+
+# Seconds spent in each start-up phase, and in cool down
+PREHEAT_TIME = 20
+GLOWPLUG_TIME = 40
+COOLDOWN_TIME = 60
+
+SIMULATED_MTU = 247  # What current phones and adapters negotiate
+
+
+class SimulatedHeater:
+    """A heater that answers commands with status frames like the real device.
+
+    Start-up runs through PREHEATING, GLOWPLUG and HEATING on a timer, and
+    switching off cools down before going idle. The clock is injectable
+    and speed scales all phase durations. With absolute_setpoints the mode
+    commands take a level or target temperature from their param field,
+    like newer firmware, and with concatenated_writes every command in a
+    write is applied, where older firmware drops writes of more than one.
+    """
+
+    def __init__(
+        self,
+        address: str = "00:00:00:00:00:00",
+        clock: Callable[[], float] = time.monotonic,
+        speed: float = 1.0,
+        absolute_setpoints: bool = False,
+        concatenated_writes: bool = False,
+    ) -> None:
+        """Initialize the heater."""
+        self.address = address
+        self.absolute_setpoints = absolute_setpoints
+        self.concatenated_writes = concatenated_writes
+        self._clock = clock
+        self._speed = speed
+        self.is_on = False
+        self.control_mode = ControlMode.LEVEL
+        self.level = 3
+        self.target_temp = 20
+        self.fan_only = False
+        self.high_altitude_mode = False
+        self.temperature_unit = TemperatureUnit.CELSIUS
+        self.supply_voltage = 13
+        self.environment_temp = 15
+        self._changed_at = clock()
+
+    def _elapsed(self) -> float:
+        """Return scaled seconds since the last power change."""
+        return (self._clock() - self._changed_at) * self._speed
+
+    def state(self) -> HeaterState:
+        """Return the current heater state."""
+        elapsed = self._elapsed()
+        if self.is_on:
+            if self.fan_only:
+                running_state = RunningState.IDLE
+            elif elapsed < PREHEAT_TIME:
+                running_state = RunningState.PREHEATING
+            elif elapsed < PREHEAT_TIME + GLOWPLUG_TIME:
+                running_state = RunningState.GLOWPLUG
+            else:
+                running_state = RunningState.HEATING
+        elif elapsed < COOLDOWN_TIME:
+            running_state = RunningState.COOLING
+        else:
+            running_state = RunningState.IDLE
+
+        if running_state == RunningState.HEATING:
+            combustion_temp = min(60 + int(elapsed - PREHEAT_TIME - GLOWPLUG_TIME), 200)
+        elif running_state == RunningState.GLOWPLUG:
+            combustion_temp = 20 + int(elapsed - PREHEAT_TIME)
+        elif running_state == RunningState.COOLING:
+            combustion_temp = max(120 - 2 * int(elapsed), 20)
+        else:
+            combustion_temp = 20
+
+        if not self.is_on:
+            operating_mode = (
+                OperatingMode.COOLING
+                if running_state == RunningState.COOLING
+                else OperatingMode.IDLE
+            )
+        elif self.fan_only:
+            operating_mode = OperatingMode.FAN_ONLY
+        else:
+            operating_mode = OperatingMode.HEATING
+
+        return HeaterState(
+            operating_mode=operating_mode,
+            control_mode=self.control_mode,
+            level_or_target=(
+                self.level if self.control_mode == ControlMode.LEVEL else self.target_temp
+            ),
+            running_state=running_state,
+            auto_mode=False,
+            supply_voltage=(
+                self.supply_voltage - 1
+                if running_state == RunningState.GLOWPLUG
+                else self.supply_voltage
+            ),
+            temperature_unit=self.temperature_unit,
+            environment_temp=self.environment_temp,
+            combustion_temp=combustion_temp,
+            altitude_unit=AltitudeUnit.METERS,
+            high_altitude_mode=self.high_altitude_mode,
+            altitude=0,
+        )
+
+    def handle_write(self, data: bytes) -> list[bytes]:
+        """Apply the commands in one write and return the replies."""
+        if len(data) == COMMAND_LENGTH or not self.concatenated_writes:
+            return [reply] if (reply := self.handle(data)) is not None else []
+        return [
+            reply
+            for index in range(0, len(data), COMMAND_LENGTH)
+            if (reply := self.handle(data[index : index + COMMAND_LENGTH])) is not None
+        ]
+
+    def handle(self, command: bytes) -> bytes | None:
+        """Apply a command and return the status frame the heater replies with."""
+        if len(command) != COMMAND_LENGTH or command[:2] != b"\xba\xab":
+            return None
+        if command[7] != codec.calculate_checksum(command[:7]):
+            return None
+
+        cmd_type, code = command[3], command[4]
+        if cmd_type == CMD_TYPE_CONTROL:
+            self._apply(code, (command[5] << 8) | command[6])
+        elif cmd_type != CMD_TYPE_STATUS:
+            return None
+        return codec.encode_state(self.state())
+
+    def _apply(self, code: int, param: int) -> None:
+        """Apply a control code."""
+        if code == CMD_POWER_TOGGLE:
+            self.is_on = not self.is_on
+            self.fan_only = False
+            self._changed_at = self._clock()
+        elif code in (CMD_UP, CMD_DOWN):
+            step = 1 if code == CMD_UP else -1
+            if self.control_mode == ControlMode.LEVEL:
+                self.level = min(max(self.level + step, MIN_LEVEL), MAX_LEVEL)
+            else:
+                self.target_temp = min(max(self.target_temp + step, MIN_TEMP_C), MAX_TEMP_C)
+        elif code == CMD_FAN_MODE:
+            self.fan_only = not self.fan_only
+        elif code == CMD_PLATEAU_MODE:
+            self.high_altitude_mode = not self.high_altitude_mode
+        elif code == CMD_CELSIUS:
+            self.temperature_unit = TemperatureUnit.CELSIUS
+        elif code == CMD_FAHRENHEIT:
+            self.temperature_unit = TemperatureUnit.FAHRENHEIT
+        elif code == CMD_LEVEL_MODE:
+            self.control_mode = ControlMode.LEVEL
+            if param and self.absolute_setpoints:
+                self.level = min(max(param, MIN_LEVEL), MAX_LEVEL)
+        elif code == CMD_TEMP_MODE:
+            self.control_mode = ControlMode.TEMPERATURE
+            if param and self.absolute_setpoints:
+                self.target_temp = min(max(param, MIN_TEMP_C), MAX_TEMP_C)
+
+
+class SimulatedClient:
+    """Drop-in stand-in for DieselHeaterBLEClient backed by a SimulatedHeater."""
+
+    def __init__(
+        self,
+        heater: SimulatedHeater,
+        latency: float = 0.03,
+        connect_time: float = 0.5,
+    ) -> None:
+        """Initialize the client."""
+        self.heater = heater
+        self.latency = latency
+        self.connect_time = connect_time
+        self.mtu = SIMULATED_MTU
+        self._connected = False
+        self._lock = asyncio.Lock()
+        self.last_rtt: float | None = None
+        self.connect_latency: float | None = None
+        self.last_activity: float | None = None
+        self.frame_types: set[int] = set()
+        self.write_with_response = False
+        self.coalescer = WriteCoalescer()
+        self._monitors: list[Callable[[Frame], None]] = []
+
+    @property
+    def address(self) -> str:
+        """Return the simulated address."""
+        return self.heater.address
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if connected."""
+        return self._connected
+
+    def set_ble_device(self, ble_device: object) -> None:
+        """Ignore device updates."""
+
+    def register_callback(self, callback: Callable[[Frame], None]) -> Callable[[], None]:
+        """Accept a frame callback; the simulator sends no unsolicited frames."""
+        return lambda: None
+
+    def register_monitor(self, monitor: Callable[[Frame], None]) -> Callable[[], None]:
+        """Register a callback for every simulated reply."""
+        self._monitors.append(monitor)
+        return lambda: self._monitors.remove(monitor)
+
+    async def connect(self) -> bool:
+        """Simulate connecting."""
+        if not self._connected:
+            await asyncio.sleep(self.connect_time)
+            self._connected = True
+            self.connect_latency = self.connect_time
+            self.coalescer.connected(self.mtu)
+        return True
+
+    async def disconnect(self) -> None:
+        """Simulate disconnecting."""
+        self._connected = False
+
+    async def send_command(
+        self,
+        command: bytes,
+        wait_response: bool = True,
+        timeout: float = 5.0,
+        response: bool | None = None,
+    ) -> bytes | None:
+        """Send a command to the simulated heater."""
+        async with self._lock:
+            return await self._send(command, wait_response, timeout, response)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Sender]:
+        """Hold the simulated link for a sequence of commands."""
+        async with self._lock:
+            yield self._send
+
+    async def _send(
+        self,
+        command: bytes,
+        wait_response: bool = True,
+        timeout: float = 5.0,
+        response: bool | None = None,
+    ) -> bytes | None:
+        """Send a command, or several in one write, with the lock held."""
+        if not self._connected:
+            await self.connect()
+        sent = self.last_activity = time.monotonic()
+        await asyncio.sleep(self.latency)
+        replies = self.heater.handle_write(command)
+        self.last_rtt = time.monotonic() - sent
+        for reply in replies:
+            self.frame_types.add(reply[3])
+            frame = decode_frame(reply)
+            for monitor in self._monitors:
+                monitor(frame)
+        if len(replies) < max(len(command) // COMMAND_LENGTH, 1):
+            return None
+        return replies[-1] if wait_response else None
@@ -1,9 +1,8 @@
 """Sensor platform for Diesel Heater BLE."""
 from __future__ import annotations
 
-import json
 import logging
-from pathlib import Path
+import time
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -11,43 +10,26 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfElectricPotential, UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
+    EntityCategory,
+    UnitOfElectricPotential,
+    UnitOfTemperature,
+    UnitOfTime,
+    UnitOfVolume,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
+from .breaker import BreakerState
+from .const import DATA_LOCALIZATION, DOMAIN, OperatingMode, RunningState
 from .coordinator import DieselHeaterCoordinator
 from .entity import DieselHeaterEntity
+from .filters import FilterConfig, PublishFilter, get_filter_config
+from .localization import LocalizationIndex
 
 _LOGGER = logging.getLogger(__name__)
 
-# Cache for loaded translations
-_translations_cache: dict[str, dict[str, str]] = {}
-
-
-def get_error_description(language: str, error_code: int) -> str:
-    """Get error description from translation files."""
-    global _translations_cache
-
-    # Default to English if language not supported
-    if language not in ("en", "da"):
-        language = "en"
-
-    # Load translations if not cached
-    if language not in _translations_cache:
-        translations_path = Path(__file__).parent / "translations" / f"{language}.json"
-        try:
-            with open(translations_path, encoding="utf-8") as f:
-                data = json.load(f)
-                _translations_cache[language] = data.get("error_descriptions", {})
-        except (OSError, json.JSONDecodeError) as err:
-            _LOGGER.warning("Failed to load translations for %s: %s", language, err)
-            _translations_cache[language] = {}
-
-    # Get description
-    descriptions = _translations_cache.get(language, {})
-    return descriptions.get(str(error_code), descriptions.get("unknown", "Unknown error"))
-
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -56,85 +38,121 @@ async def async_setup_entry(
 ) -> None:
     """Set up the sensor platform."""
     coordinator: DieselHeaterCoordinator = hass.data[DOMAIN][entry.entry_id]
+    localization: LocalizationIndex = hass.data[DOMAIN][DATA_LOCALIZATION]
 
     entities = [
-        DieselHeaterVoltageSensor(coordinator),
-        DieselHeaterEnvironmentTempSensor(coordinator),
-        DieselHeaterCombustionTempSensor(coordinator),
+        DieselHeaterVoltageSensor(
+            coordinator, get_filter_config(entry.options, "voltage")
+        ),
+        DieselHeaterEnvironmentTempSensor(
+            coordinator, get_filter_config(entry.options, "environment_temp")
+        ),
+        DieselHeaterCombustionTempSensor(
+            coordinator, get_filter_config(entry.options, "combustion_temp")
+        ),
         DieselHeaterRunningStateSensor(coordinator),
         DieselHeaterOperatingModeSensor(coordinator),
+        DieselHeaterFuelConsumedSensor(coordinator),
+        DieselHeaterHeatingTimeSensor(coordinator),
+        DieselHeaterGlowPlugCyclesSensor(coordinator),
+        DieselHeaterIgnitionAttemptsSensor(coordinator),
+        DieselHeaterSignalStrengthSensor(coordinator),
+        DieselHeaterBreakerSensor(coordinator),
+        DieselHeaterSavedWritesSensor(coordinator),
     ]
 
     # Add error code sensor if in error state
-    entities.append(DieselHeaterErrorCodeSensor(coordinator))
+    entities.append(DieselHeaterErrorCodeSensor(coordinator, localization))
 
     async_add_entities(entities)
 
 
-class DieselHeaterVoltageSensor(DieselHeaterEntity, SensorEntity):
-    """Sensor for supply voltage."""
+class DieselHeaterMeasurementSensor(DieselHeaterEntity, SensorEntity):
+    """Measurement sensor with filtered state publication."""
 
-    _attr_translation_key = "voltage"
-    _attr_device_class = SensorDeviceClass.VOLTAGE
     _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
+    _value_key: str
 
-    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+    def __init__(
+        self,
+        coordinator: DieselHeaterCoordinator,
+        filter_config: FilterConfig | None = None,
+    ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator, "voltage")
+        super().__init__(coordinator, self._attr_translation_key)
+        self._filter: PublishFilter | None = None
+        if filter_config is not None and not filter_config.passthrough:
+            self._filter = PublishFilter(filter_config)
+        self._published_value: int | None = None
+
+    def _read_value(self) -> int | None:
+        """Return the latest value from the coordinator."""
+        if self.coordinator.data is None:
+            return None
+        return getattr(self.coordinator.data, self._value_key)
 
     @property
     def native_value(self) -> int | None:
-        """Return the voltage."""
-        if self.coordinator.data is None:
-            return None
-        return self.coordinator.data.supply_voltage
+        """Return the published value."""
+        if self._filter is None:
+            return self._read_value()
+        return self._published_value
+
+    async def async_added_to_hass(self) -> None:
+        """Publish the initial value."""
+        await super().async_added_to_hass()
+        if self._filter is not None:
+            self._published_value = self._read_value()
+            self._filter.reset(self._published_value, self.available, time.monotonic())
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the publication filter lets the value through."""
+        if self._filter is None:
+            super()._handle_coordinator_update()
+            return
+
+        value = self._read_value()
+        if not self._filter.update(value, self.available, time.monotonic()):
+            return
+
+        self._published_value = value
+        self.async_write_ha_state()
+
+
+class DieselHeaterVoltageSensor(DieselHeaterMeasurementSensor):
+    """Sensor for supply voltage."""
+
+    _attr_translation_key = "voltage"
+    _attr_device_class = SensorDeviceClass.VOLTAGE
+    _attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
+    _value_key = "supply_voltage"
 
 
-class DieselHeaterEnvironmentTempSensor(DieselHeaterEntity, SensorEntity):
+class DieselHeaterEnvironmentTempSensor(DieselHeaterMeasurementSensor):
     """Sensor for environment temperature."""
 
     _attr_translation_key = "environment_temp"
     _attr_device_class = SensorDeviceClass.TEMPERATURE
-    _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-
-    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator, "environment_temp")
-
-    @property
-    def native_value(self) -> int | None:
-        """Return the temperature."""
-        if self.coordinator.data is None:
-            return None
-        return self.coordinator.data.environment_temp
+    _value_key = "environment_temp"
 
 
-class DieselHeaterCombustionTempSensor(DieselHeaterEntity, SensorEntity):
+class DieselHeaterCombustionTempSensor(DieselHeaterMeasurementSensor):
     """Sensor for combustion chamber temperature."""
 
     _attr_translation_key = "combustion_temp"
     _attr_device_class = SensorDeviceClass.TEMPERATURE
-    _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-
-    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator, "combustion_temp")
-
-    @property
-    def native_value(self) -> int | None:
-        """Return the temperature."""
-        if self.coordinator.data is None:
-            return None
-        return self.coordinator.data.combustion_temp
+    _value_key = "combustion_temp"
 
 
 class DieselHeaterRunningStateSensor(DieselHeaterEntity, SensorEntity):
     """Sensor for running state."""
 
     _attr_translation_key = "running_state"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = [state.name.lower() for state in RunningState]
     _attr_icon = "mdi:state-machine"
 
     def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
@@ -143,16 +161,21 @@ class DieselHeaterRunningStateSensor(DieselHeaterEntity, SensorEntity):
 
     @property
     def native_value(self) -> str | None:
-        """Return the running state."""
+        """Return the running state, None if the heater reports an unknown one."""
         if self.coordinator.data is None:
             return None
-        return self.coordinator.data.running_state_text
+        try:
+            return RunningState(self.coordinator.data.running_state).name.lower()
+        except ValueError:
+            return None
 
 
 class DieselHeaterOperatingModeSensor(DieselHeaterEntity, SensorEntity):
     """Sensor for operating mode."""
 
     _attr_translation_key = "operating_mode"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = [mode.name.lower() for mode in OperatingMode]
     _attr_icon = "mdi:thermostat"
 
     def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
@@ -161,10 +184,13 @@ class DieselHeaterOperatingModeSensor(DieselHeaterEntity, SensorEntity):
 
     @property
     def native_value(self) -> str | None:
-        """Return the operating mode."""
+        """Return the operating mode, None if the heater reports an unknown one."""
         if self.coordinator.data is None:
             return None
-        return self.coordinator.data.operating_mode_text
+        try:
+            return OperatingMode(self.coordinator.data.operating_mode).name.lower()
+        except ValueError:
+            return None
 
 
 class DieselHeaterErrorCodeSensor(DieselHeaterEntity, SensorEntity):
@@ -174,9 +200,12 @@ class DieselHeaterErrorCodeSensor(DieselHeaterEntity, SensorEntity):
     _attr_icon = "mdi:alert-circle"
     _attr_entity_registry_enabled_default = False
 
-    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+    def __init__(
+        self, coordinator: DieselHeaterCoordinator, localization: LocalizationIndex
+    ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator, "error_code")
+        self._localization = localization
 
     @property
     def native_value(self) -> str | None:
@@ -196,7 +225,180 @@ class DieselHeaterErrorCodeSensor(DieselHeaterEntity, SensorEntity):
         error_code = self.coordinator.data.error_code
         if error_code is None:
             return None
-        # Get description from translation files based on HA language
-        language = self.hass.config.language
-        description = get_error_description(language, error_code)
+        description = self._localization.error_description(
+            self.hass.config.language, error_code
+        )
         return {"description": description}
+
+
+class DieselHeaterMetricSensor(DieselHeaterEntity, SensorEntity):
+    """Base sensor for cumulative derived metrics."""
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def available(self) -> bool:
+        """Return True, totals are known even while the heater is unreachable."""
+        return True
+
+
+class DieselHeaterFuelConsumedSensor(DieselHeaterMetricSensor):
+    """Sensor for estimated total fuel consumption."""
+
+    _attr_translation_key = "fuel_consumed"
+    _attr_device_class = SensorDeviceClass.VOLUME
+    _attr_native_unit_of_measurement = UnitOfVolume.LITERS
+    _attr_suggested_display_precision = 2
+
+    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "fuel_consumed")
+
+    @property
+    def native_value(self) -> float:
+        """Return the fuel consumed in litres."""
+        return round(self.coordinator.metrics.fuel_consumed, 3)
+
+
+class DieselHeaterHeatingTimeSensor(DieselHeaterMetricSensor):
+    """Sensor for total heating runtime."""
+
+    _attr_translation_key = "heating_time"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "heating_time")
+
+    @property
+    def native_value(self) -> float:
+        """Return the heating runtime in hours."""
+        return round(self.coordinator.metrics.heating_time / 3600, 2)
+
+
+class DieselHeaterGlowPlugCyclesSensor(DieselHeaterMetricSensor):
+    """Sensor for total glow plug cycles."""
+
+    _attr_translation_key = "glowplug_cycles"
+    _attr_icon = "mdi:lightning-bolt"
+
+    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "glowplug_cycles")
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of glow plug cycles."""
+        return self.coordinator.metrics.glowplug_cycles
+
+
+class DieselHeaterIgnitionAttemptsSensor(DieselHeaterMetricSensor):
+    """Sensor for total ignition attempts."""
+
+    _attr_translation_key = "ignition_attempts"
+    _attr_icon = "mdi:fire-alert"
+
+    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "ignition_attempts")
+
+    @property
+    def native_value(self) -> int:
+        """Return the number of ignition attempts."""
+        return self.coordinator.metrics.ignition_attempts
+
+
+class DieselHeaterSignalStrengthSensor(DieselHeaterEntity, SensorEntity):
+    """Sensor for the RSSI of the last advertisement."""
+
+    _attr_translation_key = "rssi"
+    _attr_device_class = SensorDeviceClass.SIGNAL_STRENGTH
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = SIGNAL_STRENGTH_DECIBELS_MILLIWATT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "rssi")
+
+    @property
+    def available(self) -> bool:
+        """Return True if an advertisement has been seen."""
+        return self.coordinator.rssi is not None
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the signal strength."""
+        return self.coordinator.rssi
+
+    @property
+    def extra_state_attributes(self) -> dict[str, str | None]:
+        """Return the adapter or proxy in use."""
+        return {"source": self.coordinator.source}
+
+
+class DieselHeaterBreakerSensor(DieselHeaterEntity, SensorEntity):
+    """Sensor for the connection circuit breaker state."""
+
+    _attr_translation_key = "breaker"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = [state.value for state in BreakerState]
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "breaker")
+
+    @property
+    def available(self) -> bool:
+        """Return True, the breaker state is always known."""
+        return True
+
+    @property
+    def native_value(self) -> str:
+        """Return the breaker state."""
+        return self.coordinator.breaker.state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, int]:
+        """Return failure counters."""
+        breaker = self.coordinator.breaker
+        return {"failures": breaker.failures, "trips": breaker.trips}
+
+
+class DieselHeaterSavedWritesSensor(DieselHeaterEntity, SensorEntity):
+    """Sensor for the GATT writes saved by packing commands."""
+
+    _attr_translation_key = "saved_writes"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_icon = "mdi:package-variant-closed"
+
+    def __init__(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, "saved_writes")
+
+    @property
+    def available(self) -> bool:
+        """Return True, the counter is always known."""
+        return True
+
+    @property
+    def native_value(self) -> int:
+        """Return the writes saved since start."""
+        return self.coordinator.coalescer.writes_saved
+
+    @property
+    def extra_state_attributes(self) -> dict[str, bool | int]:
+        """Return whether packing is in use and its counters."""
+        coalescer = self.coordinator.coalescer
+        return {
+            "active": coalescer.active,
+            "mtu": coalescer.mtu,
+            "commands": coalescer.commands,
+            "writes": coalescer.writes,
+        }
@@ -0,0 +1,291 @@
+"""Domain services for Diesel Heater BLE."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_CAPABILITIES,
+    DEFAULT_FLEET_PER_ADAPTER,
+    DEFAULT_FLEET_TIMEOUT,
+    DOMAIN,
+    MAX_LEVEL,
+    MAX_TEMP_C,
+    MIN_LEVEL,
+    MIN_TEMP_C,
+)
+from .coordinator import DieselHeaterCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_FLEET_COMMAND = "fleet_command"
+SERVICE_READY_BY = "ready_by"
+SERVICE_PROBE_CAPABILITIES = "probe_capabilities"
+
+ATTR_DEVICE_ID = "device_id"
+ATTR_COMMAND = "command"
+ATTR_VALUE = "value"
+ATTR_TIMEOUT = "timeout"
+ATTR_MAX_PER_ADAPTER = "max_per_adapter"
+ATTR_TARGET_TEMPERATURE = "target_temperature"
+ATTR_READY_TIME = "ready_time"
+ATTR_SCHEDULE = "schedule"
+
+COMMAND_POWER = "power"
+COMMAND_LEVEL = "level"
+COMMAND_TEMPERATURE = "temperature"
+COMMAND_MODE = "mode"
+
+MODES = ("level", "temperature", "fan")
+
+FLEET_COMMAND_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE_ID, default=list): vol.All(cv.ensure_list, [cv.string]),
+        vol.Required(ATTR_COMMAND): vol.In(
+            [COMMAND_POWER, COMMAND_LEVEL, COMMAND_TEMPERATURE, COMMAND_MODE]
+        ),
+        # Coerced per command in _validate_value
+        vol.Required(ATTR_VALUE): vol.Any(bool, int, float, str),
+        vol.Optional(ATTR_TIMEOUT, default=DEFAULT_FLEET_TIMEOUT): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=600)
+        ),
+        vol.Optional(ATTR_MAX_PER_ADAPTER, default=DEFAULT_FLEET_PER_ADAPTER): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10)
+        ),
+    }
+)
+
+READY_BY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Required(ATTR_TARGET_TEMPERATURE): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=40)
+        ),
+        vol.Required(ATTR_READY_TIME): cv.datetime,
+        vol.Optional(ATTR_SCHEDULE, default=True): cv.boolean,
+    }
+)
+
+PROBE_CAPABILITIES_SCHEMA = vol.Schema({vol.Required(ATTR_DEVICE_ID): cv.string})
+
+
+def _coordinators(hass: HomeAssistant) -> dict[str, DieselHeaterCoordinator]:
+    """Return loaded coordinators by address."""
+    return {
+        coordinator.address: coordinator
+        for coordinator in hass.data.get(DOMAIN, {}).values()
+        if isinstance(coordinator, DieselHeaterCoordinator)
+    }
+
+
+def resolve_coordinators(
+    hass: HomeAssistant, device_ids: list[str]
+) -> dict[str, DieselHeaterCoordinator]:
+    """Map device ids to coordinators, or every heater if none are given."""
+    coordinators = _coordinators(hass)
+    if not device_ids:
+        device_registry = dr.async_get(hass)
+        return {
+            (
+                device.id
+                if (device := device_registry.async_get_device({(DOMAIN, address)}))
+                else address
+            ): coordinator
+            for address, coordinator in coordinators.items()
+        }
+
+    device_registry = dr.async_get(hass)
+    targets: dict[str, DieselHeaterCoordinator] = {}
+    for device_id in device_ids:
+        if (device := device_registry.async_get(device_id)) is None:
+            raise ServiceValidationError(f"Unknown device {device_id}")
+        address = next(
+            (ident for domain, ident in device.identifiers if domain == DOMAIN), None
+        )
+        if address is None or (coordinator := coordinators.get(address)) is None:
+            raise ServiceValidationError(f"Device {device_id} is not a loaded heater")
+        targets[device_id] = coordinator
+    return targets
+
+
+def _validate_value(command: str, value: Any) -> Any:
+    """Validate the value for a command."""
+    try:
+        if command == COMMAND_POWER:
+            return cv.boolean(value)
+        if isinstance(value, bool):
+            raise vol.Invalid(f"expected a number, got {value}")
+        if command == COMMAND_LEVEL:
+            return vol.All(vol.Coerce(int), vol.Range(min=MIN_LEVEL, max=MAX_LEVEL))(value)
+        if command == COMMAND_TEMPERATURE:
+            return vol.All(vol.Coerce(int), vol.Range(min=MIN_TEMP_C, max=MAX_TEMP_C))(
+                value
+            )
+        return vol.In(MODES)(value)
+    except vol.Invalid as err:
+        raise ServiceValidationError(f"Invalid value for {command}: {err}") from err
+
+
+async def _async_run_command(
+    coordinator: DieselHeaterCoordinator, command: str, value: Any, timeout: float
+) -> bool:
+    """Run one command against one heater, rolled back if it overruns timeout."""
+    if command == COMMAND_POWER:
+        return await coordinator.async_set_power(value, timeout)
+    if command == COMMAND_LEVEL:
+        return await coordinator.async_set_level(value, timeout)
+    if command == COMMAND_TEMPERATURE:
+        return await coordinator.async_set_temperature(value, timeout)
+    if value == "level":
+        return await coordinator.async_set_level_mode(timeout)
+    if value == "temperature":
+        return await coordinator.async_set_temp_mode(timeout)
+    return await coordinator.async_set_fan_mode(timeout)
+
+
+async def async_fleet_command(call: ServiceCall) -> ServiceResponse:
+    """Send one command to many heaters concurrently.
+
+    Heaters run in parallel with at most max_per_adapter in flight per
+    adapter or proxy, since one radio serializes connection setup anyway;
+    heaters that have not connected yet have no adapter and are not
+    limited. Each heater's deadline starts once it has its turn on the
+    adapter, so heaters queued behind a dead one still get their full
+    time, and a plan that overruns is rolled back rather than cancelled
+    mid-stage. The per-heater outcome is returned as the service response.
+    """
+    hass = call.hass
+    command: str = call.data[ATTR_COMMAND]
+    value = _validate_value(command, call.data[ATTR_VALUE])
+    timeout: float = call.data[ATTR_TIMEOUT]
+    limit: int = call.data[ATTR_MAX_PER_ADAPTER]
+    targets = resolve_coordinators(hass, call.data[ATTR_DEVICE_ID])
+
+    semaphores: dict[str, asyncio.Semaphore] = {}
+    for coordinator in targets.values():
+        semaphores.setdefault(
+            coordinator.source or coordinator.address, asyncio.Semaphore(limit)
+        )
+
+    async def _async_one(coordinator: DieselHeaterCoordinator) -> dict[str, Any]:
+        started = time.monotonic()
+        error: str | None = None
+        async with semaphores[coordinator.source or coordinator.address]:
+            turn = time.monotonic()
+            success = await _async_run_command(coordinator, command, value, timeout)
+        if not success:
+            overran = time.monotonic() - turn >= timeout
+            error = "timeout" if overran else "command failed"
+        return {
+            "name": coordinator.name,
+            "success": success,
+            "error": error,
+            "elapsed": round(time.monotonic() - started, 2),
+        }
+
+    results = await asyncio.gather(
+        *(_async_one(coordinator) for coordinator in targets.values())
+    )
+    response = dict(zip(targets, results))
+    succeeded = sum(1 for result in results if result["success"])
+    _LOGGER.debug(
+        "Fleet %s=%s: %d of %d heaters succeeded", command, value, succeeded, len(results)
+    )
+    return {
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": response,
+    }
+
+
+async def async_ready_by(call: ServiceCall) -> ServiceResponse:
+    """Plan a pre-heat that is warm by a given time, and optionally schedule it.
+
+    The heater's thermal model predicts the warm-up at every level; the
+    level that gets there on the least fuel is picked and the heater is
+    started as late as that allows.
+    """
+    targets = resolve_coordinators(call.hass, [call.data[ATTR_DEVICE_ID]])
+    coordinator = next(iter(targets.values()))
+    if not coordinator.thermal.ready:
+        raise ServiceValidationError(
+            f"{coordinator.name} has not heated long enough to fit its thermal model"
+        )
+    target: float = call.data[ATTR_TARGET_TEMPERATURE]
+    deadline = dt_util.as_utc(call.data[ATTR_READY_TIME])
+    plan = coordinator.ready_by_plan(target, deadline.timestamp())
+    if plan is None:
+        raise ServiceValidationError(
+            f"{coordinator.name} is not predicted to reach {target} °C at any level"
+        )
+    if call.data[ATTR_SCHEDULE]:
+        coordinator.async_schedule_start(plan)
+    return {
+        "start": dt_util.utc_from_timestamp(plan.start).isoformat(),
+        "level": plan.level,
+        "warmup_minutes": round(plan.warmup / 60, 1),
+        "fuel": round(plan.fuel, 2),
+        "late": plan.late,
+        "scheduled": call.data[ATTR_SCHEDULE],
+    }
+
+
+async def async_probe_capabilities(call: ServiceCall) -> ServiceResponse:
+    """Probe the firmware features of a heater on demand.
+
+    Setup only probes an idle heater, once. This runs whatever the heater
+    is doing, so a running heater sees its setpoint move by one step and
+    back; the result is stored in the config entry.
+    """
+    hass = call.hass
+    targets = resolve_coordinators(hass, [call.data[ATTR_DEVICE_ID]])
+    coordinator = next(iter(targets.values()))
+    if (capabilities := await coordinator.async_probe_capabilities()) is None:
+        raise HomeAssistantError(f"{coordinator.name} did not answer the probe")
+    for entry_id, loaded in hass.data[DOMAIN].items():
+        if loaded is coordinator and (
+            entry := hass.config_entries.async_get_entry(entry_id)
+        ):
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_CAPABILITIES: capabilities.as_dict()}
+            )
+    return capabilities.as_dict()
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the domain services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FLEET_COMMAND,
+        async_fleet_command,
+        schema=FLEET_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_READY_BY,
+        async_ready_by,
+        schema=READY_BY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROBE_CAPABILITIES,
+        async_probe_capabilities,
+        schema=PROBE_CAPABILITIES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -45,13 +45,11 @@ class DieselHeaterSwitch(DieselHeaterEntity, SwitchEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on the heater."""
-        if self.coordinator.data is None or not self.coordinator.data.is_on:
-            await self.coordinator.async_toggle_power()
+        await self.coordinator.async_set_power(True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off the heater."""
-        if self.coordinator.data is not None and self.coordinator.data.is_on:
-            await self.coordinator.async_toggle_power()
+        await self.coordinator.async_set_power(False)
 
 
 class DieselHeaterPlateauModeSwitch(DieselHeaterEntity, SwitchEntity):
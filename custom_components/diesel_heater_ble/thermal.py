@@ -0,0 +1,219 @@
+"""Online thermal model and pre-heat planning for Diesel Heater BLE."""
+from __future__ import annotations
+
+import math
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, replace
+from typing import Any
+
+from .const import (
+    MAX_INTEGRATION_GAP,
+    MAX_LEVEL,
+    MIN_LEVEL,
+    THERMAL_FORGETTING,
+    THERMAL_INITIAL_COVARIANCE,
+    THERMAL_MAX_COVARIANCE,
+    THERMAL_MIN_UPDATES,
+    THERMAL_SAFETY_MARGIN,
+    THERMAL_STARTUP_TIME,
+    THERMAL_WINDOW,
+    RunningState,
+)
+from .models import HeaterState
+
+PARAMETERS = 3
+
+
+def _identity(scale: float) -> list[list[float]]:
+    """Return a scaled identity matrix."""
+    return [
+        [scale if row == column else 0.0 for column in range(PARAMETERS)]
+        for row in range(PARAMETERS)
+    ]
+
+
+class ThermalModel:
+    """First-order room temperature model fitted by recursive least squares.
+
+    Over each THERMAL_WINDOW the rate of change of the room temperature in
+    degrees per hour is regressed on [outside - room, heat, 1], where heat
+    is the output level while the heater is heating and 0 otherwise. The
+    parameters are the loss coefficient (per hour), the warming per level
+    (degrees per hour) and a constant for everything else, including the
+    outside temperature when no outside sensor is configured (outside is
+    then 0). Frames only add to running sums; the 3x3 update runs once
+    per window. Forgetting pauses while the covariance is large, so long
+    stretches without excitation, such as days switched off, do not wind
+    it up.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an untrained model."""
+        self.theta = [0.0] * PARAMETERS
+        self.covariance = _identity(THERMAL_INITIAL_COVARIANCE)
+        self.updates = 0
+        self.heating_updates = 0
+        self._last_time: float | None = None
+        self._last_level = MIN_LEVEL
+        self._window_start: float | None = None
+        self._start_temperature = 0.0
+        self._sums = [0.0, 0.0]
+        self._count = 0
+
+    @property
+    def ready(self) -> bool:
+        """Return True once the model has seen enough heating to predict."""
+        return self.heating_updates >= THERMAL_MIN_UPDATES and self.theta[1] > 0
+
+    def update(
+        self, room: float, outside: float, state: HeaterState, now: float
+    ) -> bool:
+        """Add a frame, return True if a window was fitted."""
+        if (level := state.level) is not None and MIN_LEVEL <= level <= MAX_LEVEL:
+            self._last_level = level
+        heating = state.running_state == RunningState.HEATING
+        heat = float(self._last_level) if heating else 0.0
+
+        if self._last_time is not None and now - self._last_time > MAX_INTEGRATION_GAP:
+            self._window_start = None
+        self._last_time = now
+        if self._window_start is None:
+            self._start_window(room, now)
+
+        self._sums[0] += outside - room
+        self._sums[1] += heat
+        self._count += 1
+
+        elapsed = now - self._window_start
+        if elapsed < THERMAL_WINDOW:
+            return False
+        regressors = [self._sums[0] / self._count, self._sums[1] / self._count, 1.0]
+        self._fit(regressors, (room - self._start_temperature) * 3600 / elapsed)
+        if regressors[1] > 0:
+            self.heating_updates += 1
+        self._start_window(room, now)
+        return True
+
+    def _start_window(self, room: float, now: float) -> None:
+        """Start averaging a new window."""
+        self._window_start = now
+        self._start_temperature = room
+        self._sums = [0.0, 0.0]
+        self._count = 0
+
+    def _fit(self, regressors: Sequence[float], rate: float) -> None:
+        """Run one recursive least squares update."""
+        covariance = self.covariance
+        gain_vector = [
+            sum(value * regressor for value, regressor in zip(row, regressors))
+            for row in covariance
+        ]
+        trace = sum(covariance[index][index] for index in range(PARAMETERS))
+        forgetting = THERMAL_FORGETTING if trace < THERMAL_MAX_COVARIANCE else 1.0
+        denominator = forgetting + sum(
+            regressors[index] * gain_vector[index] for index in range(PARAMETERS)
+        )
+        gain = [value / denominator for value in gain_vector]
+        error = rate - sum(
+            self.theta[index] * regressors[index] for index in range(PARAMETERS)
+        )
+        self.theta = [
+            self.theta[index] + gain[index] * error for index in range(PARAMETERS)
+        ]
+        self.covariance = [
+            [
+                (covariance[row][column] - gain[row] * gain_vector[column]) / forgetting
+                for column in range(PARAMETERS)
+            ]
+            for row in range(PARAMETERS)
+        ]
+        self.updates += 1
+
+    def warmup_time(
+        self, room: float, outside: float, target: float, level: int
+    ) -> float | None:
+        """Return the seconds of heating at level to reach target, None if never."""
+        if room >= target:
+            return 0.0
+        loss, warming, constant = self.theta
+        drive = warming * level + constant
+        if loss > 1e-3:
+            equilibrium = outside + drive / loss
+            if equilibrium <= target:
+                return None
+            hours = math.log((equilibrium - room) / (equilibrium - target)) / loss
+        else:
+            if (rate := drive + loss * (outside - room)) <= 0:
+                return None
+            hours = (target - room) / rate
+        return hours * 3600
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the persisted parameters."""
+        return {
+            "theta": self.theta,
+            "covariance": self.covariance,
+            "updates": self.updates,
+            "heating_updates": self.heating_updates,
+            "last_level": self._last_level,
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore persisted parameters."""
+        theta = data.get("theta", [])
+        covariance = data.get("covariance", [])
+        if len(theta) != PARAMETERS or len(covariance) != PARAMETERS:
+            return
+        self.theta = [float(value) for value in theta]
+        self.covariance = [[float(value) for value in row] for row in covariance]
+        self.updates = int(data.get("updates", 0))
+        self.heating_updates = int(data.get("heating_updates", 0))
+        self._last_level = int(data.get("last_level", MIN_LEVEL))
+
+
+@dataclass(frozen=True, slots=True)
+class ReadyPlan:
+    """When and how hard to run the heater to be warm by a deadline."""
+
+    level: int
+    start: float  # Unix time to power on
+    warmup: float  # Seconds from power on to the target temperature
+    fuel: float  # Litres burnt during the warm-up
+    late: bool  # No level reaches the target by the deadline
+
+
+def plan_ready_by(
+    model: ThermalModel,
+    room: float,
+    outside: float,
+    target: float,
+    deadline: float,
+    now: float,
+    fuel_rates: Sequence[float],
+) -> ReadyPlan | None:
+    """Return the plan that reaches target by deadline on the least fuel.
+
+    Every level is simulated with the model; the warm-up includes the
+    start sequence and a safety margin. If no level makes it in time, the
+    fastest one starting now is returned, marked late. Returns None if no
+    level reaches the target at all.
+    """
+    plans = []
+    for level in range(MIN_LEVEL, MAX_LEVEL + 1):
+        if (heating := model.warmup_time(room, outside, target, level)) is None:
+            continue
+        warmup = THERMAL_STARTUP_TIME + heating * (1 + THERMAL_SAFETY_MARGIN)
+        plans.append(
+            ReadyPlan(
+                level=level,
+                start=deadline - warmup,
+                warmup=warmup,
+                fuel=fuel_rates[level - MIN_LEVEL] * warmup / 3600,
+                late=deadline - warmup < now,
+            )
+        )
+    if not plans:
+        return None
+    if on_time := [plan for plan in plans if not plan.late]:
+        return min(on_time, key=lambda plan: plan.fuel)
+    return replace(min(plans, key=lambda plan: plan.warmup), start=now)
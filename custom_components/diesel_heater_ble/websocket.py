@@ -0,0 +1,280 @@
+"""WebSocket API for live frames and telemetry history of Diesel Heater BLE."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import fields
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DATA_BATCHER,
+    DOMAIN,
+    HISTORY_DEFAULT_POINTS,
+    HISTORY_MAX_POINTS,
+    HISTORY_SERIES,
+    SIGNAL_HEATER_LOADED,
+    SIGNAL_HEATER_UNLOADED,
+    WS_DEFAULT_RATE,
+    WS_MAX_RATE,
+    WS_QUEUE_SIZE,
+)
+from .coordinator import DieselHeaterCoordinator
+from .models import HeaterState
+from .services import resolve_coordinators
+
+# Dataclass fields plus the derived values entities show
+STATE_FIELDS = (
+    *(field.name for field in fields(HeaterState)),
+    "is_on",
+    "level",
+    "target_temperature",
+    "error_code",
+)
+
+
+def _project(state: HeaterState, names: tuple[str, ...]) -> dict[str, Any]:
+    """Return the requested fields of a state."""
+    return {name: getattr(state, name) for name in names}
+
+
+class FrameSubscription:
+    """Forward frames to one websocket subscriber at a bounded rate.
+
+    Frames go into a deque of WS_QUEUE_SIZE that drops the oldest entry
+    when full, and a drain task sends at most max_rate messages a second.
+    A slow or paused client therefore costs a fixed amount of memory and
+    always resumes with the newest frames; each message carries the
+    number of frames dropped since the previous one.
+
+    The subscription follows heaters by address rather than holding on to
+    coordinators, so a reloaded heater is picked up again, and with no
+    addresses every heater that is loaded later is added.
+    """
+
+    def __init__(
+        self,
+        connection: websocket_api.ActiveConnection,
+        msg_id: int,
+        addresses: frozenset[str] | None,
+        names: tuple[str, ...],
+        raw: bool,
+        max_rate: float,
+    ) -> None:
+        """Initialize the subscription; addresses None follows every heater."""
+        self._connection = connection
+        self._msg_id = msg_id
+        self._addresses = addresses
+        self._unsubscribers: dict[str, CALLBACK_TYPE] = {}
+        self._names = names
+        self._raw = raw
+        self._interval = 1 / max_rate
+        self._queue: deque[dict[str, Any]] = deque(maxlen=WS_QUEUE_SIZE)
+        self._pending = asyncio.Event()
+        self._dropped = 0
+        self._task: asyncio.Task | None = None
+
+    @callback
+    def async_attach(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Follow the frames of a loaded heater if it is one of ours."""
+        address = coordinator.address
+        if self._addresses is not None and address not in self._addresses:
+            return
+        self.async_detach(coordinator)
+        self._unsubscribers[address] = coordinator.async_subscribe_frames(
+            self.async_add
+        )
+
+    @callback
+    def async_detach(self, coordinator: DieselHeaterCoordinator) -> None:
+        """Stop following an unloaded heater."""
+        unsubscribe = self._unsubscribers.pop(coordinator.address, None)
+        if unsubscribe is not None:
+            unsubscribe()
+
+    @callback
+    def async_add(
+        self,
+        coordinator: DieselHeaterCoordinator,
+        state: HeaterState,
+        raw: bytes | None,
+    ) -> None:
+        """Queue a frame."""
+        if len(self._queue) == self._queue.maxlen:
+            self._dropped += 1
+        event: dict[str, Any] = {
+            "address": coordinator.address,
+            "name": coordinator.name,
+            "timestamp": time.time(),
+            "state": _project(state, self._names),
+        }
+        if self._raw:
+            event["raw"] = raw.hex() if raw is not None else None
+        self._queue.append(event)
+        self._pending.set()
+
+    async def _async_drain(self) -> None:
+        """Send queued frames, paced to the rate limit."""
+        while True:
+            await self._pending.wait()
+            while self._queue:
+                event = self._queue.popleft()
+                event["dropped"] = self._dropped
+                self._dropped = 0
+                self._connection.send_message(
+                    websocket_api.event_message(self._msg_id, event)
+                )
+                await asyncio.sleep(self._interval)
+            self._pending.clear()
+
+    @callback
+    def async_start(self, hass: HomeAssistant) -> None:
+        """Start sending."""
+        self._task = hass.async_create_background_task(
+            self._async_drain(), f"{DOMAIN} websocket {self._msg_id}"
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop sending and following heaters."""
+        for unsubscribe in self._unsubscribers.values():
+            unsubscribe()
+        self._unsubscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+        self._queue.clear()
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe",
+        vol.Optional("device_id", default=list): vol.All(cv.ensure_list, [str]),
+        vol.Optional("fields"): vol.All([vol.In(STATE_FIELDS)], vol.Length(min=1)),
+        vol.Optional("raw", default=False): bool,
+        vol.Optional("max_rate", default=WS_DEFAULT_RATE): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1, max=WS_MAX_RATE)
+        ),
+    }
+)
+@callback
+def ws_subscribe(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Stream decoded frames from one or more heaters."""
+    try:
+        targets = resolve_coordinators(hass, msg["device_id"])
+    except ServiceValidationError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, str(err))
+        return
+
+    subscription = FrameSubscription(
+        connection,
+        msg["id"],
+        (
+            frozenset(coordinator.address for coordinator in targets.values())
+            if msg["device_id"]
+            else None
+        ),
+        tuple(msg.get("fields", STATE_FIELDS)),
+        msg["raw"],
+        msg["max_rate"],
+    )
+    for coordinator in targets.values():
+        subscription.async_attach(coordinator)
+    unsubscribers = [
+        async_dispatcher_connect(hass, SIGNAL_HEATER_LOADED, subscription.async_attach),
+        async_dispatcher_connect(
+            hass, SIGNAL_HEATER_UNLOADED, subscription.async_detach
+        ),
+    ]
+
+    @callback
+    def _async_unsubscribe() -> None:
+        for unsubscribe in unsubscribers:
+            unsubscribe()
+        subscription.async_stop()
+
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+    connection.send_result(msg["id"])
+    subscription.async_start(hass)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/history",
+        vol.Required("device_id"): str,
+        vol.Optional("series", default=list(HISTORY_SERIES)): vol.All(
+            cv.ensure_list, [vol.In(HISTORY_SERIES)]
+        ),
+        vol.Required("start_time"): str,
+        vol.Optional("end_time"): str,
+        vol.Optional("points", default=HISTORY_DEFAULT_POINTS): vol.All(
+            vol.Coerce(int), vol.Range(min=3, max=HISTORY_MAX_POINTS)
+        ),
+    }
+)
+@callback
+def ws_history(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return telemetry of one heater downsampled to a point budget."""
+    start = dt_util.parse_datetime(msg["start_time"])
+    end = (
+        dt_util.parse_datetime(msg["end_time"])
+        if "end_time" in msg
+        else dt_util.utcnow()
+    )
+    if start is None or end is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_INVALID_FORMAT, "Invalid start or end time"
+        )
+        return
+    try:
+        targets = resolve_coordinators(hass, [msg["device_id"]])
+    except ServiceValidationError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, str(err))
+        return
+
+    coordinator = next(iter(targets.values()))
+    resolution, series = coordinator.history.query(
+        msg["series"],
+        dt_util.as_utc(start).timestamp(),
+        dt_util.as_utc(end).timestamp(),
+        msg["points"],
+    )
+    connection.send_result(msg["id"], {"resolution": resolution, "series": series})
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/dispatch_stats"})
+@callback
+def ws_dispatch_stats(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the batch metrics of the update batcher."""
+    batcher = hass.data.get(DOMAIN, {}).get(DATA_BATCHER)
+    connection.send_result(
+        msg["id"],
+        {"enabled": False} if batcher is None else {"enabled": True, **batcher.as_dict()},
+    )
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe)
+    websocket_api.async_register_command(hass, ws_history)
+    websocket_api.async_register_command(hass, ws_dispatch_stats)
@@ -0,0 +1,44 @@
+"""Run the diesel heater protocol CLI without Home Assistant.
+
+The protocol package lives inside the integration, whose own __init__
+imports Home Assistant, and the integration directory cannot go on
+sys.path because its select platform shadows the standard library
+module of that name. Load the package straight from its directory
+instead:
+
+    python scripts/heater_cli.py scan
+    python scripts/heater_cli.py bench --simulate 20 --count 200
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+PACKAGE = "diesel_heater_protocol"
+PACKAGE_DIR = (
+    Path(__file__).resolve().parent.parent
+    / "custom_components"
+    / "diesel_heater_ble"
+    / "protocol"
+)
+
+
+def load_protocol():
+    """Import the protocol package under a standalone name."""
+    if PACKAGE in sys.modules:
+        return sys.modules[PACKAGE]
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE,
+        PACKAGE_DIR / "__init__.py",
+        submodule_search_locations=[str(PACKAGE_DIR)],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+if __name__ == "__main__":
+    load_protocol()
+    from diesel_heater_protocol.cli import main
+
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""Measure how the integration scales with the number of heaters.
+
+For each fleet size N this starts N DieselHeaterCoordinator instances
+inside a bare Home Assistant core, each with the entity set of every
+platform, against in-process simulated heaters, and lets them poll for
+a fixed window. Entities are not added to an entity platform; instead
+each one renders its state into the state machine on every coordinator
+update, which is the work the platform would do.
+
+Reported per N:
+
+- event loop lag percentiles, from a task that sleeps LAG_INTERVAL and
+  measures how late it wakes up
+- process CPU time per poll
+- resident memory per heater, against the RSS before the fleet started
+- update jitter, the deviation of poll intervals from DEFAULT_SCAN_INTERVAL
+- latency of level commands sent to a sample of heaters while all of them
+  keep polling
+- with --batch, the batch metrics of the shared update batcher
+
+Needs Home Assistant installed; bleak is not used.
+
+    python scripts/scale_harness.py --sizes 1,10,100,500 --duration 60 -o report.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.diesel_heater_ble import (  # noqa: E402
+    binary_sensor,
+    climate,
+    number,
+    select,
+    sensor,
+    switch,
+)
+from custom_components.diesel_heater_ble.const import (  # noqa: E402
+    DATA_LOCALIZATION,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    MAX_LEVEL,
+    MIN_LEVEL,
+)
+from custom_components.diesel_heater_ble.coordinator import (  # noqa: E402
+    DieselHeaterCoordinator,
+)
+from custom_components.diesel_heater_ble.dispatch import (  # noqa: E402
+    UpdateBatcher,
+)
+from custom_components.diesel_heater_ble.localization import (  # noqa: E402
+    LocalizationIndex,
+)
+from custom_components.diesel_heater_ble.protocol import (  # noqa: E402
+    SimulatedClient,
+    SimulatedHeater,
+)
+
+PLATFORMS = (sensor, binary_sensor, switch, number, select, climate)
+LAG_INTERVAL = 0.05  # Seconds between event loop lag samples
+COMMAND_SAMPLE = 20  # Heaters that receive commands during a run
+COMMAND_INTERVAL = 5.0  # Seconds between commands to one heater
+
+
+def _percentiles(values: list[float], scale: float = 1.0) -> dict[str, float]:
+    """Return p50/p95/p99/max of values, multiplied by scale."""
+    if not values:
+        return {}
+    values = sorted(values)
+    last = len(values) - 1
+    return {
+        "p50": values[int(0.50 * last)] * scale,
+        "p95": values[int(0.95 * last)] * scale,
+        "p99": values[int(0.99 * last)] * scale,
+        "max": values[-1] * scale,
+    }
+
+
+def _rss() -> int:
+    """Return the current resident set size in bytes."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak RSS, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _render(hass: HomeAssistant, entity: Any) -> None:
+    """Write an entity state the way the entity platform would."""
+    if not entity.available:
+        hass.states.async_set(entity.entity_id, "unavailable")
+        return
+    for name in ("native_value", "is_on", "current_option", "hvac_mode"):
+        if hasattr(type(entity), name):
+            state = getattr(entity, name)
+            break
+    else:
+        state = None
+    hass.states.async_set(
+        entity.entity_id, str(state), entity.extra_state_attributes or {}
+    )
+
+
+class _Heater:
+    """One simulated heater with its coordinator and entities."""
+
+    def __init__(
+        self, hass: HomeAssistant, index: int, latency: float, speed: float
+    ) -> None:
+        """Initialize the heater."""
+        address = f"SIM:{index:04d}"
+        self.coordinator = DieselHeaterCoordinator(
+            hass, SimpleNamespace(address=address, name=address), f"Heater {index}"
+        )
+        self.coordinator._client = SimulatedClient(  # noqa: SLF001
+            SimulatedHeater(address, speed=speed), latency=latency, connect_time=0
+        )
+        self.entry = SimpleNamespace(
+            entry_id=f"scale_{index}", title=f"Heater {index}", data={}, options={}
+        )
+        self.entities: list[Any] = []
+        self.updates: list[float] = []
+        self._remove_listener: Callable[[], None] = lambda: None
+
+    async def async_start(self, hass: HomeAssistant) -> None:
+        """Connect, create the entities and start polling."""
+        coordinator = self.coordinator
+        hass.data[DOMAIN][self.entry.entry_id] = coordinator
+        await coordinator._client.connect()  # noqa: SLF001
+        # Connected, so the coordinator never asks the bluetooth manager for paths
+        coordinator._last_rebalance = time.monotonic()  # noqa: SLF001
+        await coordinator.async_refresh()
+
+        for platform in PLATFORMS:
+            domain = platform.__name__.rsplit(".", 1)[-1]
+            added: list[Any] = []
+            await platform.async_setup_entry(
+                hass,
+                self.entry,
+                lambda entities, update_before_add=False: added.extend(entities),
+            )
+            for entity in added:
+                entity.hass = hass
+                number_ = len(self.entities)
+                entity.entity_id = f"{domain}.{self.entry.entry_id}_{number_}"
+                self.entities.append(entity)
+
+        def _async_update() -> None:
+            self.updates.append(time.monotonic())
+            for entity in self.entities:
+                _render(hass, entity)
+
+        self._remove_listener = coordinator.async_add_listener(_async_update)
+
+    async def async_stop(self) -> None:
+        """Stop polling and disconnect."""
+        # Removing the last listener cancels the scheduled refresh
+        self._remove_listener()
+        await self.coordinator.async_shutdown()
+
+    def jitter(self) -> list[float]:
+        """Return the deviation of each poll interval from the scan interval."""
+        return [
+            abs(later - earlier - DEFAULT_SCAN_INTERVAL)
+            for earlier, later in zip(self.updates, self.updates[1:])
+        ]
+
+
+async def _measure_lag(stop: asyncio.Event, samples: list[float]) -> None:
+    """Record how late the event loop runs a sleeping task."""
+    while not stop.is_set():
+        expected = time.monotonic() + LAG_INTERVAL
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(time.monotonic() - expected, 0.0))
+
+
+async def _send_commands(
+    heater: _Heater, stop: asyncio.Event, latencies: list[float], failures: list[int]
+) -> None:
+    """Step one heater through its levels while everything keeps polling."""
+    level = MIN_LEVEL
+    while not stop.is_set():
+        level = level + 1 if level < MAX_LEVEL else MIN_LEVEL
+        started = time.monotonic()
+        if await heater.coordinator.async_set_level(level):
+            latencies.append(time.monotonic() - started)
+        else:
+            failures.append(1)
+        try:
+            await asyncio.wait_for(stop.wait(), COMMAND_INTERVAL)
+        except TimeoutError:
+            pass
+
+
+async def run_size(
+    size: int, duration: float, latency: float, speed: float, batch: bool = False
+) -> dict[str, Any]:
+    """Run a fleet of size heaters for duration seconds and return its figures."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[DOMAIN] = {
+            DATA_LOCALIZATION: await hass.async_add_executor_job(LocalizationIndex.load)
+        }
+        rss_before = _rss()
+
+        heaters = [_Heater(hass, index, latency, speed) for index in range(size)]
+        batcher = UpdateBatcher(hass.loop) if batch else None
+        for heater in heaters:
+            heater.coordinator.batcher = batcher
+        started = time.monotonic()
+        await asyncio.gather(*(heater.async_start(hass) for heater in heaters))
+        setup_time = time.monotonic() - started
+        for heater in heaters:
+            heater.updates.clear()
+
+        stop = asyncio.Event()
+        lag: list[float] = []
+        latencies: list[float] = []
+        failures: list[int] = []
+        cpu_before = time.process_time()
+        tasks = [asyncio.create_task(_measure_lag(stop, lag))] + [
+            asyncio.create_task(_send_commands(heater, stop, latencies, failures))
+            for heater in heaters[:COMMAND_SAMPLE]
+        ]
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+        cpu = time.process_time() - cpu_before
+        rss_after = _rss()
+
+        polls = sum(len(heater.updates) for heater in heaters)
+        jitter = [value for heater in heaters for value in heater.jitter()]
+
+        await asyncio.gather(*(heater.async_stop() for heater in heaters))
+        await hass.async_stop(force=True)
+
+    return {
+        "heaters": size,
+        "entities_per_heater": len(heaters[0].entities) if heaters else 0,
+        "setup_s": setup_time,
+        "polls": polls,
+        "polls_per_second": polls / duration,
+        "expected_polls_per_second": size / DEFAULT_SCAN_INTERVAL,
+        "loop_lag_ms": _percentiles(lag, 1000),
+        "cpu_ms_per_poll": cpu / polls * 1000 if polls else None,
+        "cpu_utilisation": cpu / duration,
+        "rss_bytes_per_heater": (rss_after - rss_before) / size,
+        "update_jitter_ms": _percentiles(jitter, 1000),
+        "command_latency_ms": _percentiles(latencies, 1000),
+        "command_failures": len(failures),
+        "batching": None if batcher is None else batcher.as_dict(),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run every fleet size in turn."""
+    results = []
+    for size in args.sizes:
+        logging.getLogger(__name__).info("Running %s heaters", size)
+        results.append(
+            await run_size(size, args.duration, args.latency, args.speed, args.batch)
+        )
+    return {
+        "scan_interval_s": DEFAULT_SCAN_INTERVAL,
+        "duration_s": args.duration,
+        "simulated_latency_s": args.latency,
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def _sizes(value: str) -> list[int]:
+    """Parse a comma separated list of fleet sizes."""
+    return [int(size) for size in value.split(",") if size]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the harness and write the report."""
+    parser = argparse.ArgumentParser(
+        prog="scale_harness", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument(
+        "--sizes", type=_sizes, default=[1, 10, 50, 100, 200, 500], help="e.g. 1,10,100"
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per size")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="simulated round trip (s)"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=10.0, help="simulated start-up speed factor"
+    )
+    parser.add_argument(
+        "--batch", action="store_true", help="deliver updates through the batcher"
+    )
+    parser.add_argument("-o", "--output", type=Path, help="write the JSON report here")
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""Load the protocol package for the tests without Home Assistant.
+
+The package is imported the way scripts/heater_cli.py runs it, as
+diesel_heater_protocol, since the integration directory cannot go on
+sys.path. The integration's own modules that do not need Home Assistant
+(filters, breaker, history and the like) import as diesel_heater_ble,
+registered without running its __init__, which does.
+"""
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import heater_cli  # noqa: E402
+
+heater_cli.load_protocol()
+
+integration = types.ModuleType("diesel_heater_ble")
+integration.__path__ = [str(ROOT / "custom_components" / "diesel_heater_ble")]
+sys.modules["diesel_heater_ble"] = integration
@@ -0,0 +1,95 @@
+"""Tests for the frame archive."""
+import io
+
+import pytest
+from diesel_heater_protocol.archive import ArchiveError, ArchiveReader, ArchiveWriter
+
+
+def _frame(value: int) -> bytes:
+    return bytes([value]) * 4
+
+
+def test_seek_into_tick_spanning_blocks() -> None:
+    """Blocks that start in the same tick are all read from their start."""
+    file = io.BytesIO()
+    writer = ArchiveWriter(file, frame_length=4, block_frames=1)
+    writer.write(100.0, _frame(1))
+    writer.write(100.0, _frame(2))
+    writer.write(100.5, _frame(3))
+    writer.flush()
+
+    reader = ArchiveReader(file)
+    assert [frame for _, frame in reader.frames(start=100.0)] == [
+        _frame(1),
+        _frame(2),
+        _frame(3),
+    ]
+    assert [frame for _, frame in reader.frames(start=100.1)] == [_frame(3)]
+
+
+def _archive(count: int, **kwargs: int) -> io.BytesIO:
+    file = io.BytesIO()
+    writer = ArchiveWriter(file, frame_length=4, **kwargs)
+    for index in range(count):
+        writer.write(1000 + index, _frame(index // 3))
+    writer.flush()
+    return file
+
+
+def test_roundtrip_keeps_frames_and_times() -> None:
+    file = _archive(100, block_frames=16)
+    frames = list(ArchiveReader(file).frames())
+    assert frames == [(1000 + index, _frame(index // 3)) for index in range(100)]
+
+
+def test_seek_reads_only_the_range() -> None:
+    reader = ArchiveReader(_archive(100, block_frames=16))
+    frames = list(reader.frames(start=1040, end=1049.5))
+    assert [when for when, _ in frames] == list(range(1040, 1050))
+    assert list(reader.frames(start=2000)) == []
+
+
+def test_reopened_archive_appends() -> None:
+    file = _archive(10)
+    writer = ArchiveWriter(file)
+    assert writer.frame_length == 4
+    writer.write(2000, _frame(9))
+    writer.flush()
+    frames = list(ArchiveReader(file).frames())
+    assert len(frames) == 11
+    assert frames[-1] == (2000, _frame(9))
+
+
+def test_closed_archive_has_an_index(tmp_path) -> None:
+    path = tmp_path / "frames.dhar"
+    with ArchiveWriter.open(path, frame_length=4, block_frames=8) as writer:
+        for index in range(20):
+            writer.write(1000 + index, _frame(index))
+    with ArchiveReader.open(path) as reader:
+        assert reader.blocks == 3
+        assert [when for when, _ in reader.frames(start=1010)] == list(
+            range(1010, 1020)
+        )
+
+
+def test_torn_block_is_dropped() -> None:
+    file = _archive(20, block_frames=8)
+    data = file.getvalue()
+    torn = io.BytesIO(data[:-3])
+    assert [when for when, _ in ArchiveReader(torn).frames()] == list(
+        range(1000, 1016)
+    )
+
+
+def test_out_of_order_frame_is_refused() -> None:
+    writer = ArchiveWriter(io.BytesIO(), frame_length=4)
+    writer.write(1000, _frame(1))
+    with pytest.raises(ValueError):
+        writer.write(999, _frame(1))
+    with pytest.raises(ValueError):
+        writer.write(1001, b"short")
+
+
+def test_not_an_archive() -> None:
+    with pytest.raises(ArchiveError):
+        ArchiveReader(io.BytesIO(b"not an archive at all"))
@@ -0,0 +1,57 @@
+"""Tests for the circuit breaker."""
+from diesel_heater_ble.breaker import BreakerState, CircuitBreaker
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(
+        failure_threshold=2, base_backoff=10, max_backoff=40, jitter=lambda: 1.0
+    )
+    breaker.record_failure(0)
+    breaker.record_failure(0)
+    return breaker
+
+
+def test_opens_after_threshold() -> None:
+    breaker = CircuitBreaker(failure_threshold=2, base_backoff=10, jitter=lambda: 1.0)
+    breaker.record_failure(0)
+    assert breaker.allow(0, None)
+    breaker.record_failure(0)
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow(5, 5)
+
+
+def test_half_open_waits_for_advertisement() -> None:
+    breaker = _open_breaker()
+    assert not breaker.allow(10, None)
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert not breaker.allow(11, -1)  # Seen before the breaker opened
+    assert breaker.allow(12, 12)
+
+
+def test_half_open_allows_trial_while_connected() -> None:
+    breaker = _open_breaker()
+    assert breaker.allow(10, None, connected=True)
+
+
+def test_backoff_grows_and_is_capped() -> None:
+    breaker = _open_breaker()
+    retries = []
+    for now in (100, 200, 300, 400):
+        breaker.allow(now, now)
+        breaker.record_failure(now)
+        retries.append(breaker.retry_at - now)
+    assert retries == [20, 40, 40, 40]
+
+
+def test_jitter_waits_at_least_half_the_backoff() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, base_backoff=10, jitter=lambda: 0.0)
+    breaker.record_failure(0)
+    assert breaker.retry_at == 5
+
+
+def test_success_closes() -> None:
+    breaker = _open_breaker()
+    breaker.allow(10, 10)
+    breaker.record_success()
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.trips == 0
@@ -0,0 +1,30 @@
+"""Tests for firmware capability probing."""
+import asyncio
+
+from diesel_heater_protocol.capabilities import Capabilities, probe_capabilities
+from diesel_heater_protocol.simulator import SimulatedClient, SimulatedHeater
+
+
+def _probe(heater: SimulatedHeater) -> Capabilities | None:
+    client = SimulatedClient(heater, latency=0, connect_time=0)
+    return asyncio.run(probe_capabilities(client))
+
+
+def test_probe_restores_setpoint() -> None:
+    heater = SimulatedHeater(absolute_setpoints=True)
+    level = heater.level
+    capabilities = _probe(heater)
+    assert capabilities.absolute_level
+    assert capabilities.probed
+    assert heater.level == level
+
+
+def test_probe_is_recorded_when_inconclusive() -> None:
+    capabilities = Capabilities(probed=True)
+    assert not capabilities.complete
+    assert Capabilities.from_dict(capabilities.as_dict()).probed
+
+
+def test_stored_results_without_flag_count_as_probed() -> None:
+    assert Capabilities.from_dict({"absolute_level": None}).probed
+    assert not Capabilities.from_dict({}).probed
@@ -0,0 +1,31 @@
+"""Tests for packing commands into writes."""
+from diesel_heater_protocol.coalescer import WriteCoalescer
+from diesel_heater_protocol.const import ATT_HEADER_SIZE, COMMAND_LENGTH
+
+COMMANDS = [bytes([index]) * COMMAND_LENGTH for index in range(7)]
+
+
+def test_disabled_sends_one_command_per_write() -> None:
+    assert WriteCoalescer().pack(COMMANDS) == [[command] for command in COMMANDS]
+
+
+def test_packs_up_to_mtu_in_order() -> None:
+    coalescer = WriteCoalescer(enabled=True, mtu=ATT_HEADER_SIZE + 3 * COMMAND_LENGTH)
+    assert coalescer.pack(COMMANDS) == [COMMANDS[0:3], COMMANDS[3:6], COMMANDS[6:7]]
+
+
+def test_failure_lasts_until_next_connection() -> None:
+    coalescer = WriteCoalescer(enabled=True, mtu=247)
+    coalescer.fail()
+    assert not coalescer.active
+    assert len(coalescer.pack(COMMANDS)) == len(COMMANDS)
+    coalescer.connected(247)
+    assert coalescer.active
+
+
+def test_counts_writes_saved() -> None:
+    coalescer = WriteCoalescer(enabled=True, mtu=247)
+    for write in coalescer.pack(COMMANDS):
+        coalescer.answered(write)
+    assert coalescer.writes == 1
+    assert coalescer.writes_saved == len(COMMANDS) - 1
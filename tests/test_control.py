@@ -0,0 +1,58 @@
+"""Tests for the local climate loop."""
+from diesel_heater_ble.const import CONTROL_INTERVAL, MAX_LEVEL, MIN_LEVEL
+from diesel_heater_ble.control import ClimateController, CommandBudget, PIController
+
+
+def _presses(level: int) -> int:
+    return 1
+
+
+def test_pi_output_is_clamped() -> None:
+    pi = PIController(kp=1.0, ki=0.0, out_min=MIN_LEVEL, out_max=MAX_LEVEL)
+    assert pi.update(100, 1) == MAX_LEVEL
+    assert pi.update(-100, 1) == MIN_LEVEL
+
+
+def test_pi_does_not_wind_up_while_saturated() -> None:
+    pi = PIController(kp=0.0, ki=1.0, out_min=1, out_max=6)
+    pi.reset(6)
+    for _ in range(100):
+        pi.update(10, 1)
+    assert pi.integral == 6
+    assert pi.update(-1, 1) == 5  # Comes back at once
+
+
+def test_budget_window_slides() -> None:
+    budget = CommandBudget(3)
+    budget.consume(2, 0)
+    budget.consume(1, 1800)
+    assert budget.remaining(1800) == 0
+    assert budget.remaining(3600) == 2
+    assert budget.remaining(5400) == 3
+
+
+def test_controller_acts_once_per_interval() -> None:
+    controller = ClimateController(max_commands_per_hour=10)
+    controller.enable(20, 1)
+    assert controller.update(10, 1, 0, _presses) == MAX_LEVEL
+    assert controller.update(10, 1, CONTROL_INTERVAL - 1, _presses) is None
+    assert controller.update(10, 1, CONTROL_INTERVAL, _presses) == MAX_LEVEL
+
+
+def test_controller_does_not_charge_the_budget() -> None:
+    controller = ClimateController(max_commands_per_hour=10)
+    controller.enable(20, 1)
+    controller.update(10, 1, 0, _presses)
+    assert controller.budget.remaining(0) == 10
+
+
+def test_controller_clamps_step_to_budget() -> None:
+    controller = ClimateController(max_commands_per_hour=2)
+    controller.enable(20, 1)
+    assert controller.update(10, 1, 0, lambda level: level - 1) == 3
+
+
+def test_disabled_controller_only_tracks_temperature() -> None:
+    controller = ClimateController(max_commands_per_hour=10)
+    assert controller.update(10, 1, 0, _presses) is None
+    assert controller.current_temperature == 10
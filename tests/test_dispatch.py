@@ -0,0 +1,72 @@
+"""Tests for batched update delivery."""
+import asyncio
+
+import pytest
+
+from diesel_heater_ble.dispatch import UpdateBatcher
+
+
+class FakeCoordinator:
+    """Counts listener passes."""
+
+    def __init__(self, name: str, fail: bool = False) -> None:
+        self.name = name
+        self.fail = fail
+        self.flushes = 0
+
+    def async_flush_listeners(self) -> None:
+        self.flushes += 1
+        if self.fail:
+            raise RuntimeError("listener failed")
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def _run(loop: asyncio.AbstractEventLoop, seconds: float) -> None:
+    loop.run_until_complete(asyncio.sleep(seconds))
+
+
+def test_updates_within_window_share_one_pass(loop) -> None:
+    batcher = UpdateBatcher(loop, window=0.01)
+    first, second = FakeCoordinator("first"), FakeCoordinator("second")
+    batcher.async_add(first)
+    batcher.async_add(second)
+    batcher.async_add(first)
+    assert first.flushes == 0
+    _run(loop, 0.05)
+    assert (first.flushes, second.flushes) == (1, 1)
+    assert batcher.batches == 1
+    assert batcher.coalesced == 1
+
+
+def test_full_batch_flushes_at_once(loop) -> None:
+    batcher = UpdateBatcher(loop, window=10, max_size=2)
+    coordinators = [FakeCoordinator(str(index)) for index in range(2)]
+    for coordinator in coordinators:
+        batcher.async_add(coordinator)
+    assert all(coordinator.flushes == 1 for coordinator in coordinators)
+    assert batcher.as_dict()["largest_batch"] == 2
+
+
+def test_discarded_update_is_not_delivered(loop) -> None:
+    batcher = UpdateBatcher(loop, window=10)
+    coordinator = FakeCoordinator("gone")
+    batcher.async_add(coordinator)
+    batcher.async_discard(coordinator)
+    batcher.async_flush()
+    assert coordinator.flushes == 0
+    assert batcher.batches == 0
+
+
+def test_failing_listener_does_not_starve_batch(loop) -> None:
+    batcher = UpdateBatcher(loop, window=10)
+    broken, healthy = FakeCoordinator("broken", fail=True), FakeCoordinator("ok")
+    batcher.async_add(broken)
+    batcher.async_add(healthy)
+    batcher.async_flush()
+    assert healthy.flushes == 1
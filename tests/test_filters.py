@@ -0,0 +1,59 @@
+"""Tests for sensor publication filters."""
+from diesel_heater_ble.const import CONF_AGGREGATE_STATISTICS, CONF_FILTERS
+from diesel_heater_ble.filters import FilterConfig, PublishFilter, get_filter_config
+
+
+def _filter(**settings: float) -> PublishFilter:
+    publish_filter = PublishFilter(FilterConfig(**settings))
+    assert publish_filter.update(20.0, True, 0)  # The first value always publishes
+    return publish_filter
+
+
+def test_passthrough_publishes_every_change() -> None:
+    publish_filter = _filter()
+    assert publish_filter.config.passthrough
+    assert publish_filter.update(20.1, True, 1)
+    assert not publish_filter.update(20.1, True, 2)
+
+
+def test_abs_deadband() -> None:
+    publish_filter = _filter(abs_deadband=1.0)
+    assert not publish_filter.update(20.5, True, 1)
+    assert publish_filter.update(21.0, True, 2)
+
+
+def test_rel_deadband_follows_last_published_value() -> None:
+    publish_filter = _filter(rel_deadband=10)
+    assert not publish_filter.update(21.5, True, 1)
+    assert publish_filter.update(22.0, True, 2)
+
+
+def test_hysteresis_applies_on_reversal() -> None:
+    publish_filter = _filter(abs_deadband=1.0, hysteresis=1.0)
+    assert publish_filter.update(21.0, True, 1)
+    assert not publish_filter.update(20.0, True, 2)  # Reversal needs 2
+    assert publish_filter.update(19.0, True, 3)
+
+
+def test_min_interval_and_heartbeat() -> None:
+    publish_filter = _filter(min_interval=10, heartbeat=60)
+    assert not publish_filter.update(25.0, True, 5)
+    assert publish_filter.update(25.0, True, 10)
+    assert not publish_filter.update(25.0, True, 30)
+    assert publish_filter.update(25.0, True, 70)
+
+
+def test_availability_and_none_always_publish() -> None:
+    publish_filter = _filter(abs_deadband=5.0, min_interval=60)
+    assert publish_filter.update(20.0, False, 1)
+    assert publish_filter.update(20.0, True, 2)
+    assert publish_filter.update(None, True, 3)
+    assert publish_filter.update(20.0, True, 4)
+
+
+def test_config_falls_back_to_aggregation_deadband() -> None:
+    assert get_filter_config({}, "supply_voltage").passthrough
+    aggregated = get_filter_config({CONF_AGGREGATE_STATISTICS: True}, "supply_voltage")
+    assert not aggregated.passthrough
+    explicit = {CONF_FILTERS: {"supply_voltage": {"abs_deadband": 0.5}}}
+    assert get_filter_config(explicit, "supply_voltage").abs_deadband == 0.5
@@ -0,0 +1,70 @@
+"""Tests for reply frame decoding and reassembly."""
+from diesel_heater_protocol.codec import calculate_checksum, encode_state
+from diesel_heater_protocol.const import (
+    ACK_LENGTH,
+    FRAME_HEADER,
+    FRAME_TYPE_ACK,
+    FRAME_TYPE_TELEMETRY,
+    TELEMETRY_LENGTH,
+)
+from diesel_heater_protocol.frames import (
+    AckFrame,
+    StatusFrame,
+    TelemetryFrame,
+    UnknownFrame,
+    decode_frame,
+)
+from diesel_heater_protocol.reassembler import FrameReassembler
+from diesel_heater_protocol.simulator import SimulatedHeater
+
+STATUS = encode_state(SimulatedHeater().state())
+
+
+def _frame(frame_type: int, length: int, payload: bytes) -> bytes:
+    data = FRAME_HEADER + bytes([length - 4, frame_type]) + payload
+    return data + bytes([calculate_checksum(data)])
+
+
+ACK = _frame(FRAME_TYPE_ACK, ACK_LENGTH, bytes([0x02, 0x01, 0x04]))
+
+
+def test_decodes_status() -> None:
+    frame = decode_frame(STATUS)
+    assert isinstance(frame, StatusFrame)
+    assert encode_state(frame.state) == STATUS
+
+
+def test_decodes_ack() -> None:
+    assert decode_frame(ACK) == AckFrame(ACK, 0x02, 0x0104)
+
+
+def test_decodes_telemetry_words() -> None:
+    payload = bytes(range(TELEMETRY_LENGTH - 5))
+    frame = decode_frame(_frame(FRAME_TYPE_TELEMETRY, TELEMETRY_LENGTH, payload))
+    assert isinstance(frame, TelemetryFrame)
+    assert frame.words[:2] == (0x0001, 0x0203)
+
+
+def test_bad_checksum_is_unknown() -> None:
+    assert isinstance(decode_frame(ACK[:-1] + bytes([ACK[-1] ^ 1])), UnknownFrame)
+
+
+def test_reassembles_split_frame() -> None:
+    reassembler = FrameReassembler()
+    assert list(reassembler.feed(STATUS[:3])) == []
+    assert list(reassembler.feed(STATUS[3:15])) == []
+    assert list(reassembler.feed(STATUS[15:])) == [STATUS]
+
+
+def test_splits_frames_in_one_notification() -> None:
+    assert list(FrameReassembler().feed(ACK + STATUS)) == [ACK, STATUS]
+
+
+def test_passes_through_unregistered_bytes() -> None:
+    assert list(FrameReassembler().feed(b"\x01\x02" + ACK)) == [b"\x01\x02", ACK]
+
+
+def test_drops_frame_whose_tail_was_lost() -> None:
+    reassembler = FrameReassembler()
+    assert list(reassembler.feed(STATUS[:10])) == []
+    assert list(reassembler.feed(STATUS)) == [STATUS]
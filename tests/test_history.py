@@ -0,0 +1,73 @@
+"""Tests for the multi-resolution telemetry history."""
+from types import SimpleNamespace
+
+from diesel_heater_ble.history import HistoryTier, TelemetryHistory, lttb
+
+
+def _state(value: float) -> SimpleNamespace:
+    return SimpleNamespace(
+        supply_voltage=value, environment_temp=value, combustion_temp=value
+    )
+
+
+def _sample(value: float) -> dict[str, float]:
+    return vars(_state(value))
+
+
+def test_lttb_keeps_ends_and_peak() -> None:
+    times = list(range(100))
+    values = [0.0] * 100
+    values[37] = 50.0
+    sampled = lttb(times, values, 10)
+    assert len(sampled) == 10
+    assert sampled[0] == (0, 0.0)
+    assert sampled[-1] == (99, 0.0)
+    assert (37, 50.0) in sampled
+
+
+def test_lttb_returns_short_series_unchanged() -> None:
+    assert lttb([0, 1], [1.0, 2.0], 10) == [(0, 1.0), (1, 2.0)]
+
+
+def test_tier_stores_bucket_means_when_next_bucket_starts() -> None:
+    tier = HistoryTier(step=60, retention=3600)
+    tier.add(_sample(10), 0)
+    tier.add(_sample(20), 30)
+    assert not tier.times
+    tier.add(_sample(0), 60)
+    assert list(tier.times) == [0]
+    assert list(tier.values["supply_voltage"]) == [15]
+
+
+def test_tier_trims_past_retention() -> None:
+    tier = HistoryTier(step=0, retention=100)
+    for now in range(0, 300, 10):
+        tier.add(_sample(now), now)
+    assert tier.times[0] >= 290 - 100 * 1.1
+
+
+def test_query_uses_coarse_tier_for_long_range() -> None:
+    history = TelemetryHistory()
+    for now in range(0, 3 * 86400, 30):
+        history.add(_state(now % 100), now)
+    resolution, series = history.query(["supply_voltage"], 0, 3 * 86400, 100)
+    assert resolution >= 600
+    assert 0 < len(series["supply_voltage"]) <= 100
+    fine, _ = history.query(["supply_voltage"], 3 * 86400 - 600, 3 * 86400, 100)
+    assert fine < resolution
+
+
+def test_rollups_survive_restore() -> None:
+    history = TelemetryHistory()
+    for now in range(0, 7200, 30):
+        history.add(_state(1), now)
+    restored = TelemetryHistory()
+    restored.restore(history.as_dict())
+    assert not restored.tiers[0].times  # Per-frame points are not saved
+    assert list(restored.tiers[1].times) == list(history.tiers[1].times)
+
+
+def test_add_reports_coarsest_rollup() -> None:
+    history = TelemetryHistory()
+    stored = [now for now in range(0, 7300, 30) if history.add(_state(1), now)]
+    assert stored == [3600, 7200]
@@ -0,0 +1,74 @@
+"""Tests for lifecycle edge detection."""
+from types import SimpleNamespace
+
+from diesel_heater_ble.const import (
+    LIFECYCLE_COOLDOWN_FINISHED,
+    LIFECYCLE_COOLDOWN_STARTED,
+    LIFECYCLE_ERROR_CLEARED,
+    LIFECYCLE_ERROR_RAISED,
+    LIFECYCLE_IGNITION_STARTED,
+    RunningState,
+)
+from diesel_heater_ble.lifecycle import PHASE_OFF, LifecycleDetector
+
+
+def _state(running_state: RunningState, error_code: int | None = None):
+    return SimpleNamespace(
+        running_state=running_state,
+        is_error=error_code is not None,
+        error_code=error_code,
+    )
+
+
+def _types(detector: LifecycleDetector, state, now: float) -> list[str]:
+    return [edge.type for edge in detector.update(state, now)]
+
+
+def test_first_frame_raises_nothing() -> None:
+    detector = LifecycleDetector(debounce=10)
+    assert _types(detector, _state(RunningState.HEATING), 0) == []
+    assert detector.phase == "heating"
+
+
+def test_edge_waits_for_debounce() -> None:
+    detector = LifecycleDetector(debounce=10)
+    detector.update(_state(RunningState.IDLE), 0)
+    assert _types(detector, _state(RunningState.PREHEATING), 1) == []
+    assert _types(detector, _state(RunningState.GLOWPLUG), 5) == []
+    assert _types(detector, _state(RunningState.GLOWPLUG), 11) == [
+        LIFECYCLE_IGNITION_STARTED
+    ]
+
+
+def test_flap_is_ignored() -> None:
+    detector = LifecycleDetector(debounce=10)
+    detector.update(_state(RunningState.HEATING), 0)
+    assert _types(detector, _state(RunningState.COOLING), 1) == []
+    assert _types(detector, _state(RunningState.HEATING), 2) == []
+    assert _types(detector, _state(RunningState.COOLING), 5) == []
+    assert _types(detector, _state(RunningState.COOLING), 14) == []  # Restarted at 5
+    assert _types(detector, _state(RunningState.COOLING), 15) == [
+        LIFECYCLE_COOLDOWN_STARTED
+    ]
+
+
+def test_cooldown_finishes_when_off() -> None:
+    detector = LifecycleDetector(debounce=0)
+    detector.update(_state(RunningState.COOLING), 0)
+    assert _types(detector, _state(RunningState.IDLE), 1) == [
+        LIFECYCLE_COOLDOWN_FINISHED
+    ]
+    assert detector.phase == PHASE_OFF
+
+
+def test_error_code_change_and_clear() -> None:
+    detector = LifecycleDetector(debounce=0)
+    detector.update(_state(RunningState.HEATING), 0)
+    assert _types(detector, _state(RunningState.HEATING, 3), 1) == [
+        LIFECYCLE_ERROR_RAISED
+    ]
+    edges = detector.update(_state(RunningState.HEATING, 5), 2)
+    assert [(edge.type, edge.error_code) for edge in edges] == [
+        (LIFECYCLE_ERROR_RAISED, 5)
+    ]
+    assert _types(detector, _state(RunningState.IDLE), 3) == [LIFECYCLE_ERROR_CLEARED]
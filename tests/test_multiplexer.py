@@ -0,0 +1,42 @@
+"""Tests for sharing a heater connection."""
+import asyncio
+import os
+import stat
+
+from diesel_heater_protocol.multiplexer import HeaterMultiplexer, MultiplexedClient
+
+
+class IdleClient:
+    """A heater client that never sends a frame."""
+
+    address = "AA:BB:CC:DD:EE:FF"
+
+    def register_monitor(self, callback):
+        return lambda: None
+
+
+def test_unix_socket_is_private(tmp_path) -> None:
+    path = str(tmp_path / "heater.sock")
+
+    async def run() -> int:
+        multiplexer = HeaterMultiplexer(IdleClient(), path=path)
+        await multiplexer.start()
+        try:
+            return stat.S_IMODE(os.stat(path).st_mode)
+        finally:
+            await multiplexer.stop()
+
+    assert asyncio.run(run()) == 0o600
+
+
+def test_client_treats_non_object_message_as_lost_connection() -> None:
+    async def run() -> bytes | None:
+        client = MultiplexedClient("/nonexistent")
+        waiting = client._waiting[1] = asyncio.get_running_loop().create_future()
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"[1, 2]\n")
+        reader.feed_eof()
+        await client._read(reader)
+        return await waiting
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,193 @@
+"""Tests for command plans against the simulated heater."""
+import asyncio
+
+from diesel_heater_protocol.capabilities import Capabilities
+from diesel_heater_protocol.const import (
+    CMD_GET_STATUS,
+    COMMAND_LENGTH,
+    ControlMode,
+    OperatingMode,
+)
+from diesel_heater_protocol.plan import (
+    CommandPlan,
+    level_plan,
+    power_stage,
+    start_plan,
+    temperature_plan,
+)
+from diesel_heater_protocol.simulator import SimulatedClient, SimulatedHeater
+
+
+def _client(**kwargs: bool) -> SimulatedClient:
+    return SimulatedClient(SimulatedHeater(**kwargs), latency=0, connect_time=0)
+
+
+class FlakyClient(SimulatedClient):
+    """A simulated client whose heater stops answering after some writes.
+
+    With partial set, a dropped write of several commands still applies
+    that many of them, like a write whose replies were lost.
+    """
+
+    def __init__(
+        self, heater: SimulatedHeater, answered: int, partial: int = 0
+    ) -> None:
+        super().__init__(heater, latency=0, connect_time=0)
+        self.answered = answered
+        self.partial = partial
+
+    async def _send(self, command: bytes, *args, **kwargs) -> bytes | None:
+        if command != CMD_GET_STATUS:
+            if self.answered == 0:
+                for index in range(0, self.partial * COMMAND_LENGTH, COMMAND_LENGTH):
+                    self.heater.handle(command[index : index + COMMAND_LENGTH])
+                self.answered = -1
+                return None
+            self.answered -= 1
+        return await super()._send(command, *args, **kwargs)
+
+
+def test_level_plan_presses_to_target() -> None:
+    client = _client()
+    result = asyncio.run(level_plan(6).execute(client))
+    assert result.success
+    assert result.state.level == 6
+    assert client.heater.level == 6
+    assert result.failed_stage is None
+
+
+def test_temperature_plan_switches_mode_first() -> None:
+    client = _client()
+    result = asyncio.run(temperature_plan(23).execute(client))
+    assert result.success
+    assert client.heater.control_mode == ControlMode.TEMPERATURE
+    assert client.heater.target_temp == 23
+
+
+def test_absolute_plan_takes_one_command() -> None:
+    client = _client(absolute_setpoints=True)
+    plan = level_plan(6, Capabilities(absolute_level=True))
+    result = asyncio.run(plan.execute(client))
+    assert result.success
+    assert client.heater.level == 6
+    assert result.sent == 3  # Checkpoint, command, checkpoint
+
+
+def test_lost_press_rolls_back() -> None:
+    heater = SimulatedHeater()
+    result = asyncio.run(level_plan(6).execute(FlakyClient(heater, answered=1)))
+    assert not result.success
+    assert result.failed_stage == "level"
+    assert result.rolled_back
+    assert heater.level == 3
+
+
+def test_expired_timeout_sends_nothing() -> None:
+    client = _client()
+    result = asyncio.run(level_plan(6).execute(client, timeout=0))
+    assert not result.success
+    assert result.timed_out
+    assert result.sent == 0
+    assert client.heater.level == 3
+
+
+def test_writes_counts_compiled_commands() -> None:
+    client = _client()
+    state = client.heater.state()
+    assert level_plan(6).writes(state, client.coalescer) == 3
+    assert level_plan(6, Capabilities(absolute_level=True)).writes(
+        state, client.coalescer
+    ) == 1
+    assert level_plan(3).writes(state, client.coalescer) == 0
+
+
+def test_level_plan_presses_down() -> None:
+    client = _client()
+    client.heater.level = 6
+    result = asyncio.run(level_plan(1).execute(client))
+    assert result.success
+    assert client.heater.level == 1
+
+
+class Clock:
+    """A clock the tests move by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _heater(on: bool, cooling: bool = False) -> SimulatedHeater:
+    """Return a heater that is on, cooling down or idle."""
+    clock = Clock()
+    heater = SimulatedHeater(clock=clock)
+    heater.is_on = on
+    clock.now = 0 if cooling else 1000  # Seconds since the last power change
+    return heater
+
+
+def _power(on: bool, heater: SimulatedHeater):
+    client = SimulatedClient(heater, latency=0, connect_time=0)
+    return asyncio.run(CommandPlan("power", [power_stage(on)]).execute(client))
+
+
+def test_power_off_is_confirmed_by_cooling() -> None:
+    heater = _heater(on=True)
+    result = _power(False, heater)
+    assert result.success
+    assert result.state.operating_mode == OperatingMode.COOLING
+    assert not result.rolled_back
+    assert not heater.is_on
+
+
+def test_power_off_during_cooldown_sends_nothing() -> None:
+    heater = _heater(on=False, cooling=True)
+    result = _power(False, heater)
+    assert result.success
+    assert result.sent == 1  # The checkpoint only
+    assert not heater.is_on
+
+
+def test_power_on_during_cooldown_restarts() -> None:
+    heater = _heater(on=False, cooling=True)
+    assert _power(True, heater).success
+    assert heater.is_on
+
+
+def test_power_is_not_rolled_back() -> None:
+    heater = _heater(on=False)
+    result = asyncio.run(start_plan(level=6).execute(FlakyClient(heater, answered=2)))
+    assert not result.success
+    assert result.failed_stage == "level"
+    assert heater.is_on
+
+
+def test_lost_reply_to_applied_command_is_undone() -> None:
+    heater = SimulatedHeater()
+    client = FlakyClient(heater, answered=0, partial=1)
+    result = asyncio.run(temperature_plan(23).execute(client))
+    assert not result.success
+    assert result.failed_stage == "mode"
+    assert result.rolled_back
+    assert heater.control_mode == ControlMode.LEVEL
+
+
+def test_recent_state_skips_first_checkpoint() -> None:
+    read = asyncio.run(level_plan(6).execute(_client()))
+    client = _client()
+    result = asyncio.run(level_plan(6).execute(client, state=client.heater.state()))
+    assert result.success
+    assert result.sent == read.sent - 1
+
+
+def test_partial_packed_write_is_undone_from_status() -> None:
+    heater = SimulatedHeater(concatenated_writes=True)
+    client = FlakyClient(heater, answered=0, partial=2)
+    client.coalescer.enabled = True
+    result = asyncio.run(level_plan(6).execute(client))
+    assert not result.success
+    assert result.rolled_back
+    assert heater.level == 3
+    assert client.coalescer.failed
@@ -0,0 +1,81 @@
+"""Tests for the thermal model and pre-heat planning."""
+from types import SimpleNamespace
+
+import pytest
+
+from diesel_heater_ble.const import (
+    MAX_LEVEL,
+    MIN_LEVEL,
+    THERMAL_STARTUP_TIME,
+    RunningState,
+)
+from diesel_heater_ble.thermal import ThermalModel, plan_ready_by
+
+LOSS = 0.5  # Per hour
+WARMING = 2.0  # Degrees per hour per level
+FUEL_RATES = [0.1 * level for level in range(MIN_LEVEL, MAX_LEVEL + 1)]
+
+
+def _trained_model() -> ThermalModel:
+    """Fit a model to a room that follows the model's own equation."""
+    model = ThermalModel()
+    room, outside = 5.0, 0.0
+    for step in range(3 * 24 * 120):  # Three days of 30 s frames
+        level = 1 + (step // 480) % MAX_LEVEL
+        heating = (step // 240) % 3 != 0
+        state = SimpleNamespace(
+            level=level,
+            running_state=RunningState.HEATING if heating else RunningState.IDLE,
+        )
+        model.update(room, outside, state, step * 30)
+        rate = LOSS * (outside - room) + (WARMING * level if heating else 0.0)
+        room += rate * 30 / 3600
+    return model
+
+
+def test_rls_recovers_parameters() -> None:
+    model = _trained_model()
+    assert model.ready
+    assert model.theta[0] == pytest.approx(LOSS, rel=0.1)
+    assert model.theta[1] == pytest.approx(WARMING, rel=0.1)
+
+
+def test_untrained_model_is_not_ready() -> None:
+    assert not ThermalModel().ready
+
+
+def test_parameters_survive_restore() -> None:
+    model = _trained_model()
+    restored = ThermalModel()
+    restored.restore(model.as_dict())
+    assert restored.theta == model.theta
+    assert restored.ready
+
+
+def test_warmup_time_follows_first_order_response() -> None:
+    model = ThermalModel()
+    model.theta = [LOSS, WARMING, 0.0]
+    assert model.warmup_time(20, 0, 20, 1) == 0
+    assert model.warmup_time(10, 0, 20, 1) is None  # Settles at 4 degrees
+    assert model.warmup_time(10, 0, 20, 6) > model.warmup_time(10, 0, 15, 6)
+
+
+def test_plan_picks_least_fuel_in_time() -> None:
+    model = ThermalModel()
+    model.theta = [LOSS, WARMING, 0.0]
+    plan = plan_ready_by(model, 10, 0, 15, 10 * 3600, 0, FUEL_RATES)
+    assert not plan.late
+    assert plan.warmup > THERMAL_STARTUP_TIME
+    assert plan.start == pytest.approx(10 * 3600 - plan.warmup)
+    thirsty = [*FUEL_RATES[:-1], 10.0]  # Full power costs far more
+    assert plan_ready_by(model, 10, 0, 15, 10 * 3600, 0, thirsty).level < MAX_LEVEL
+
+
+def test_plan_is_late_or_impossible() -> None:
+    model = ThermalModel()
+    model.theta = [LOSS, WARMING, 0.0]
+    late = plan_ready_by(model, 10, 0, 15, 60, 0, FUEL_RATES)
+    assert late.late
+    assert late.level == MAX_LEVEL
+    assert late.start == 0
+    assert plan_ready_by(model, 10, 0, 40, 3600, 0, FUEL_RATES) is None